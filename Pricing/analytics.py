@@ -0,0 +1,12 @@
+"""The parts of the app built on pandas and numpy that the views call, in one module.
+
+views.py imports it lazily (views.analytics), so a worker only loads the scientific stack
+once it serves a report, claim or decision page.
+"""
+import pandas as pd
+from . import reports
+from .claim_trends import ClaimTrendAnalysis, IncompleteFinancials, COVERAGES as CLAIM_TREND_COVERAGES
+from .triangles import ChainLadder
+from .utils import perform_logistic_regression_indication
+
+pd.set_option('display.max_columns', None)  # None means show all columns
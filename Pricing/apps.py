@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class PricingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Pricing'
+
+    def ready(self):
+        from .models import game_event_recorded
+        from .warmup import warm_on_review
+        game_event_recorded.connect(warm_on_review, dispatch_uid='pricing-report-warmup')
@@ -0,0 +1,224 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from django.core.cache import cache
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.db import connection
+from django.db.models import Subquery
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+LOCAL_MAX_ENTRIES = 256
+# Longest an entry is served from a worker's own memory before the shared tier is read again
+LOCAL_TIMEOUT = 60
+REVALIDATE_WORKERS = 2
+GAME_REPORT_CACHE_TIMEOUT = 60 * 60
+
+
+class TieredCache(BaseCache):
+    """A size-bounded LRU in each process in front of a cache shared by every worker.
+
+    The shared tier is any Django cache backend, configured by OPTIONS['SHARED'] as a CACHES
+    entry of its own: a file-based cache serves the gunicorn workers of one node, Redis all
+    of them.  Reads are answered from the process when they can be, without unpickling;
+    writes go to both tiers.  Values held in the process are shared by every request that
+    reads them, so callers treat cached objects as read-only.
+
+    OPTIONS['LOCAL_MAX_ENTRIES'] and OPTIONS['LOCAL_TIMEOUT'] bound the process tier.
+    stats() returns the hit, miss and eviction counters of this process.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        shared = dict(options.get('SHARED', {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}))
+        shared.setdefault('TIMEOUT', params.get('TIMEOUT', 300))
+        for setting in ('KEY_PREFIX', 'VERSION', 'KEY_FUNCTION'):
+            if setting in params:
+                shared.setdefault(setting, params[setting])
+        self.shared = import_string(shared['BACKEND'])(shared.get('LOCATION', location), shared)
+        self.local_max_entries = int(options.get('LOCAL_MAX_ENTRIES', LOCAL_MAX_ENTRIES))
+        self.local_timeout = options.get('LOCAL_TIMEOUT', LOCAL_TIMEOUT)
+        self.local = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = dict.fromkeys(['local_hits', 'shared_hits', 'misses', 'sets', 'evictions'], 0)
+
+    def count(self, counter, n=1):
+        with self.lock:
+            self.counters[counter] += n
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, local_entries=len(self.local), local_max_entries=self.local_max_entries)
+
+    def local_expiry(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if self.local_timeout is not None:
+            timeout = self.local_timeout if timeout is None else min(timeout, time.time() + self.local_timeout)
+        return timeout
+
+    def remember(self, key, value, expires):
+        with self.lock:
+            self.local[key] = (expires, value)
+            self.local.move_to_end(key)
+            while len(self.local) > self.local_max_entries:
+                self.local.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def forget(self, key):
+        with self.lock:
+            self.local.pop(key, None)
+
+    def get_local(self, key):
+        with self.lock:
+            entry = self.local.get(key)
+            if entry is None:
+                return self._missing_key
+            expires, value = entry
+            if expires is not None and expires <= time.time():
+                del self.local[key]
+                return self._missing_key
+            self.local.move_to_end(key)
+            self.counters['local_hits'] += 1
+            return value
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        value = self.get_local(local_key)
+        if value is not self._missing_key:
+            return value
+        return self.get_shared(key, default, version)
+
+    def get_shared(self, key, default=None, version=None):
+        """Read past this process's copy, and keep what the shared tier holds now."""
+        value = self.shared.get(key, self._missing_key, version=version)
+        if value is self._missing_key:
+            self.count('misses')
+            return default
+        self.count('shared_hits')
+        self.remember(self.make_key(key, version=version), value, self.local_expiry(DEFAULT_TIMEOUT))
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        self.shared.set(key, value, timeout, version=version)
+        self.remember(local_key, value, self.local_expiry(timeout))
+        self.count('sets')
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        if not self.shared.add(key, value, timeout, version=version):
+            return False
+        self.remember(local_key, value, self.local_expiry(timeout))
+        self.count('sets')
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.forget(self.make_and_validate_key(key, version=version))
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.forget(self.make_and_validate_key(key, version=version))
+        return self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        return self.get_local(local_key) is not self._missing_key or self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.forget(self.make_and_validate_key(key, version=version))
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        with self.lock:
+            self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+
+class Revalidator:
+    """Rebuilds stale cache entries on a small thread pool, at most one rebuild per key at a time."""
+
+    def __init__(self, workers=REVALIDATE_WORKERS):
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.executor = None
+        self.pending = set()
+        self.counters = dict.fromkeys(['stale_served', 'revalidations', 'revalidation_failures'], 0)
+
+    def submit(self, key, version, build, timeout):
+        with self.lock:
+            self.counters['stale_served'] += 1
+            if key in self.pending:
+                return
+            self.pending.add(key)
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='cache-revalidate')
+        self.executor.submit(self.rebuild, key, version, build, timeout)
+
+    def rebuild(self, key, version, build, timeout):
+        try:
+            cache.set(key, (version, build()), timeout)
+            outcome = 'revalidations'
+        except Exception:
+            logger.exception('Revalidating cache entry %s failed', key)
+            outcome = 'revalidation_failures'
+        finally:
+            with self.lock:
+                self.pending.discard(key)
+            connection.close()
+        with self.lock:
+            self.counters[outcome] += 1
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, revalidating=len(self.pending))
+
+
+revalidator = Revalidator()
+
+
+def latest_id(queryset):
+    """Subquery for the newest row id; a new row changes it and so retires cached results."""
+    return Subquery(queryset.order_by('-id').values('id')[:1])
+
+
+def cached_versioned(key, version, build, timeout=DEFAULT_TIMEOUT, published=None):
+    """build() cached under key, served stale-while-revalidate against the data version it was built from.
+
+    key names the entry by what it shows, e.g. (report, game, latest year, selected year);
+    version is the current version of the data behind it.  An entry built from that version
+    is returned as is.  One built from an older version is still returned, and rebuilt in
+    the background for the next request; only a missing entry is built in the request.
+
+    published, when given, is the latest year (or years) the data covers.  An entry built
+    before the latest publication is rebuilt in the request instead: that first request is
+    the player opening the new year, so the stale copy would be exactly the wrong one.
+    """
+    if published is not None:
+        version = (published, version)
+    entry = cache.get(key)
+    if entry is not None and entry[0] != version and hasattr(cache, 'get_shared'):
+        # another worker may already have rebuilt it
+        entry = cache.get_shared(key)
+    if entry is not None and published is not None and entry[0][0] != published:
+        entry = None
+    if entry is None:
+        value = build()
+        cache.set(key, (version, value), timeout)
+        return value
+    built_version, value = entry
+    if built_version != version:
+        revalidator.submit(key, version, build, timeout)
+    return value
+
+
+def cache_stats():
+    """Counters of the cache tiers and the revalidator in this process."""
+    stats = cache.stats() if hasattr(cache, 'stats') else {}
+    return dict(stats, **revalidator.stats())
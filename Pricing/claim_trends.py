@@ -0,0 +1,99 @@
+from decimal import Decimal
+from .cache import cached_versioned, latest_id
+from .models import IndivGames, Financials, Triangles, ClaimTrends
+from .triangles import ChainLadder
+from .utils import perform_logistic_regressions
+
+CLAIM_TREND_CACHE_TIMEOUT = 60 * 60
+COVERAGES = ['Bodily Injury', 'Collision', 'Total']
+COVERAGE_KEYS = ['paid_bi', 'paid_cl', 'paid_to']
+
+
+class IncompleteFinancials(ValueError):
+    """A year of the claim triangle has no Financials row yet, e.g. while a year is being published."""
+
+
+def coverage_reform_fact(claim_trends, clm_yrs, coverage_idx):
+    """Per-year reform flags for a coverage, latest accident year first."""
+    reform_fact = []
+    for yr in reversed(clm_yrs):
+        if coverage_idx == 2:  # Total
+            reform_fact.append(claim_trends['bi_reform'][f'{yr}'] or claim_trends['cl_reform'][f'{yr}'])
+        elif coverage_idx == 1:  # Collision
+            reform_fact.append(claim_trends['cl_reform'][f'{yr}'])
+        elif coverage_idx == 0:  # Bodily Injury
+            reform_fact.append(claim_trends['bi_reform'][f'{yr}'])
+    return reform_fact
+
+
+class ClaimTrendAnalysis:
+    """Developed losses, loss cost, frequency, severity and trend fits for one player's game year.
+
+    Every row is ordered latest accident year first, as in the claim trend report.  The
+    analysis covers all requested coverages at once so the report table and the chart are
+    served from the same object, and it is cached until a new Triangles, ClaimTrends or
+    Financials row arrives for the player.
+    """
+
+    def __init__(self, year, claim_data, financials, claim_trends, coverages=(0, 1, 2)):
+        self.year = year
+        self.claim_trends = claim_trends
+        self.clm_yrs = list(claim_data['acc_yrs'])
+        n_yrs = len(self.clm_yrs)
+
+        # financials maps game year to its row; column m is the m-th year back from the selected one
+        missing = [year - m for m in range(n_yrs) if year - m not in financials]
+        if missing:
+            raise IncompleteFinancials(f'No Financials rows for years {missing} of the {n_yrs}-year claim triangle')
+        fin_rows = [financials[year - m] for m in range(n_yrs)]
+        in_force = [row['in_force'] for row in fin_rows]
+
+        self.coverages = {}
+        trend_series = []
+        for coverage_idx in coverages:
+            ladder = ChainLadder(claim_data[COVERAGE_KEYS[coverage_idx]])
+            ultimates = ladder.ultimates[::-1]
+            claim_count = [row['clm_cl'] if coverage_idx in [1, 2] else row['clm_bi'] for row in fin_rows]  # collision or total
+            trend = {
+                'actual_paid': ladder.latest[::-1],
+                'devl_factor': ladder.to_ultimate[ladder.latest_devl][::-1],
+                'ultimate': ultimates,
+                'in_force': in_force,
+                'loss_cost': [Decimal(ult) / inf if inf != 0 else 0 for ult, inf in zip(ultimates, in_force)],
+                'claim_count': claim_count,
+                'frequency': [100 * Decimal(cnt) / inf if inf != 0 else 0 for cnt, inf in zip(claim_count, in_force)],
+                'severity': [Decimal(ult) / cnt if cnt != 0 else 0 for ult, cnt in zip(ultimates, claim_count)],
+                'reform_fact': coverage_reform_fact(claim_trends, self.clm_yrs, coverage_idx),
+            }
+            for measure in ['loss_cost', 'frequency', 'severity']:
+                trend_series.append([(self.clm_yrs[n_yrs - q - 1], float(value)) for q, value in enumerate(trend[measure])])
+            self.coverages[coverage_idx] = trend
+
+        # one batched fit for loss cost, frequency and severity of every coverage
+        trend_fits = perform_logistic_regressions(trend_series, [trend['reform_fact'] for trend in self.coverages.values() for _ in range(3)])
+        for k, trend in enumerate(self.coverages.values()):
+            trend['lcost_fit'], trend['freq_fit'], trend['sev_fit'] = trend_fits[3 * k:3 * k + 3]
+
+    @classmethod
+    def build(cls, game, player, year, coverages=(0, 1, 2)):
+        triangle_obj = Triangles.objects.filter(game_id=game, player_id=player, year=year).first()
+        claimtrend_obj = ClaimTrends.objects.filter(game_id=game, year=year).first()
+        claim_data = triangle_obj.triangles['triangles']
+        n_yrs = len(claim_data['acc_yrs'])
+        financials = {row['year']: row for row in Financials.objects.filter(
+            game_id=game, player_id=player, year__gt=year - n_yrs, year__lte=year).values('year', 'in_force', 'clm_bi', 'clm_cl')}
+        claim_trends = claimtrend_obj.claim_trends if claimtrend_obj else None
+        return cls(year, claim_data, financials, claim_trends, coverages)
+
+    @classmethod
+    def for_player_year(cls, game, player, year, latest_year, coverages=(0, 1, 2)):
+        """Return the cached analysis, rebuilt when the player's claim data has changed."""
+        versions = IndivGames.objects.filter(pk=game.pk).annotate(
+            latest_triangle=latest_id(Triangles.objects.filter(game_id=game, player_id=player)),
+            latest_claim_trend=latest_id(ClaimTrends.objects.filter(game_id=game)),
+            latest_financial=latest_id(Financials.objects.filter(game_id=game, player_id=player)),
+        ).values_list('latest_triangle', 'latest_claim_trend', 'latest_financial').get()
+        cache_key = 'claim-trend-analysis:{}:{}:{}:{}:{}'.format(
+            game.game_id, player.id, latest_year, year, '-'.join(str(c) for c in coverages))
+        return cached_versioned(cache_key, '-'.join(str(v) for v in versions),
+                                lambda: cls.build(game, player, year, coverages), CLAIM_TREND_CACHE_TIMEOUT)
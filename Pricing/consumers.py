@@ -0,0 +1,53 @@
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.http import Http404
+from .events import GameMessageWatcher, game_group_name, message_event, messages_after
+from .game_context import GameContext
+
+
+def can_view_game(game_id, user):
+    try:
+        return GameContext.load(game_id, user).can_view
+    except Http404:
+        return False
+
+
+class GameEventsConsumer(AsyncJsonWebsocketConsumer):
+    """Pushes a game's new ChatMessage rows, including "Review decisions.", to the dashboard.
+
+    ChatMessage.save() sends each message written through Django to the game's channel layer
+    group once it is committed (see events.push_message).  The game server's notices are
+    inserted straight into the table, so while a socket is open the game's
+    GameMessageWatcher claims and sends those.  This consumer relays the group to its socket.
+
+    The client passes ``?after=<sequence_number>`` with the last message it rendered so
+    anything written between its initial fetch and the subscription is sent first; the
+    client drops any message it has already seen by sequence number.
+    """
+
+    async def connect(self):
+        self.game_id = self.scope['url_route']['kwargs']['game_id']
+        user = self.scope['user']
+        if not user.is_authenticated or not await database_sync_to_async(can_view_game)(self.game_id, user):
+            await self.close()
+            return
+
+        self.group_name = game_group_name(self.game_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        GameMessageWatcher.subscribe(self.game_id)
+
+        # catch up from the client's last message; the group covers everything from here on
+        after = parse_qs(self.scope['query_string'].decode()).get('after', [''])[0]
+        if after.isdigit():
+            for message in await database_sync_to_async(messages_after)(self.game_id, int(after)):
+                await self.send_json(message_event(message))
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            GameMessageWatcher.unsubscribe(self.game_id)
+
+    async def game_event(self, event):
+        await self.send_json({'event': event['event'], 'message': event['message']})
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.utils import timezone
+from .models import ChatMessage, classify_message
+
+logger = logging.getLogger(__name__)
+
+CHAT_PUSH_POLL_SECONDS = 1.0
+CHAT_BACKLOG_LIMIT = 50
+
+
+def game_group_name(game_id):
+    return f'game-events-{game_id}'
+
+
+def serialize_message(msg):
+    """The message centre's JSON form of a ChatMessage, shared by polling and push."""
+    from_sender = msg.from_user.username if msg.from_user else "game_server"
+    return {
+        'from_sender': from_sender,
+        'time': timezone.localtime(msg.timestamp).strftime('%H:%M:%S'),
+        'content': msg.content,
+        'sequence_number': msg.sequence_number,
+        'kind': msg.kind or classify_message(msg.content, msg.from_user_id is None),
+    }
+
+
+def is_review_message(message):
+    return message['kind'] == 'review'
+
+
+def message_event(message):
+    return {'event': 'review' if is_review_message(message) else 'chat', 'message': message}
+
+
+def messages_after(game_id, latest_sequence, limit=CHAT_BACKLOG_LIMIT, kinds=None):
+    """Serialized messages newer than latest_sequence, oldest first, at most the last ``limit``.
+
+    ``kinds`` restricts the result to those event kinds.
+    """
+    messages = ChatMessage.objects.filter(game_id=game_id, sequence_number__gt=latest_sequence)
+    if kinds:
+        messages = messages.filter(kind__in=kinds)
+    messages = messages.select_related('from_user').order_by('-sequence_number')[:limit]
+    return [serialize_message(msg) for msg in reversed(list(messages))]
+
+
+def latest_sequence_number(game_id):
+    return ChatMessage.objects.filter(game_id=game_id).order_by('-sequence_number') \
+        .values_list('sequence_number', flat=True).first() or 0
+
+
+def push_message(message):
+    """Send a committed ChatMessage to every socket open on its game, in any process."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(game_group_name(message.game_id_id),
+                                                {'type': 'game.event', **message_event(serialize_message(message))})
+    except Exception:
+        # the message is saved either way; sockets that missed it catch up on their next connect or poll
+        logger.exception('Pushing message %s of game %s failed', message.sequence_number, message.game_id_id)
+
+
+def push_pending(game_id):
+    """Claim the game's rows written outside the ORM and push them; returns how many this process claimed."""
+    claimed = ChatMessage.classify_pending(game_id)
+    for message in claimed:
+        push_message(message)
+    return len(claimed)
+
+
+class GameMessageWatcher:
+    """Picks up one game's ChatMessage rows written straight to the table, for every socket open on it.
+
+    The game server inserts its notices ("Review decisions.", OSFI and reform messages)
+    without going through ChatMessage.save(), so they arrive with no kind.  One watcher per
+    game and process looks for such rows every CHAT_PUSH_POLL_SECONDS and pushes those it
+    claims; the claim makes each row go out once even with several processes watching.
+    It stops when the last subscriber disconnects.
+    """
+    _watchers = {}
+
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.subscribers = 0
+        self.task = None
+
+    @classmethod
+    def subscribe(cls, game_id):
+        watcher = cls._watchers.setdefault(game_id, cls(game_id))
+        watcher.subscribers += 1
+        if watcher.task is None or watcher.task.done():
+            watcher.task = asyncio.ensure_future(watcher.run())
+
+    @classmethod
+    def unsubscribe(cls, game_id):
+        watcher = cls._watchers.get(game_id)
+        if watcher is None:
+            return
+        watcher.subscribers -= 1
+        if watcher.subscribers <= 0:
+            if watcher.task is not None:
+                watcher.task.cancel()
+            del cls._watchers[game_id]
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(CHAT_PUSH_POLL_SECONDS)
+            try:
+                await database_sync_to_async(push_pending)(self.game_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # keep watching: the rows stay unclaimed and are picked up on the next pass
+                logger.exception('Message watcher for game %s failed', self.game_id)
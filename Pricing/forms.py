@@ -1,4 +1,3 @@
-import numpy as np
 from django import forms
 from django.utils.html import format_html
 from PricingProject.settings import CONFIG_MAX_TYPES, CONFIG_AVG_PLAYERS, CONFIG_STD_DEV, CONFIG_OBSERVABLE
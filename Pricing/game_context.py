@@ -0,0 +1,71 @@
+from functools import wraps
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from .models import GamePrefs, IndivGames
+
+
+class GameContext:
+    """Game row, roster and initiator preferences for one request.
+
+    Built from two queries (the game joined to the initiator's GamePrefs, then the
+    prefetched roster) and reused by everything the view needs to know about the game.
+    """
+
+    def __init__(self, game, user):
+        self.game = game
+        self.user = user
+        self.roster = list(game.players.all())
+        self.human_players = [player.player_name for player in self.roster if player.player_type == 'user']
+        try:
+            self.difficulty = game.initiator.gameprefs.game_difficulty
+        except GamePrefs.DoesNotExist:
+            self.difficulty = None
+        self._year_memo = {}
+
+    @classmethod
+    def load(cls, game_id, user):
+        games = IndivGames.objects.select_related('initiator__gameprefs').prefetch_related('players')
+        return cls(get_object_or_404(games, game_id=game_id), user)
+
+    @classmethod
+    def for_request(cls, request, game_id):
+        """Return the context for game_id, building it at most once per request."""
+        contexts = request.__dict__.setdefault('_game_contexts', {})
+        if game_id not in contexts:
+            contexts[game_id] = cls.load(game_id, request.user)
+        return contexts[game_id]
+
+    @property
+    def is_member(self):
+        return self.user.username in self.human_players
+
+    @property
+    def can_view(self):
+        return self.game.game_observable or self.is_member
+
+    @property
+    def is_novice_game(self):
+        return self.difficulty == 'Novice'
+
+    @property
+    def force_term(self):
+        """'Customers' for Novice games, 'In-Force' otherwise"""
+        return 'Customers' if self.is_novice_game else 'In-Force'
+
+    def year_memo(self, year, key, factory):
+        """Memoize factory() per (game year, key) for the rest of the request."""
+        memo_key = (year, key)
+        if memo_key not in self._year_memo:
+            self._year_memo[memo_key] = factory()
+        return self._year_memo[memo_key]
+
+
+def game_view(view_func):
+    """Load the GameContext for game_id, enforce visibility and pass it to the view."""
+    @wraps(view_func)
+    def _wrapped_view(request, game_id, *args, **kwargs):
+        game_ctx = GameContext.for_request(request, game_id)
+        if not game_ctx.can_view:
+            raise Http404("You are not permitted to view the game.")
+        return view_func(request, game_id, game_ctx, *args, **kwargs)
+    return _wrapped_view
@@ -0,0 +1,65 @@
+import uuid
+from django.db import transaction
+from .models import IndivGames, Players, LobbyVersion
+
+PROFILE_TYPES = {'Balanced': 'balanced', 'Growth': 'growth', 'Profit': 'profitability'}
+
+
+class GameFactory:
+    """Builds games and their rosters in memory and writes them with bulk_create.
+
+    ``game_prefs`` supplies the CPU company counts (sel_type_01/02/03 for growth, profit and
+    balanced companies) and game_observable, as stored on GamePrefs.  Any number of games
+    is written in one transaction: one insert for the games and one for all the players.
+    """
+
+    def __init__(self, game_prefs):
+        self.game_prefs = game_prefs
+
+    def build(self, initiator, profile_type, status, human_player_cnt=1):
+        """Return an unsaved game and its roster: the initiator first, then the CPU companies."""
+        game = IndivGames(
+            game_id=str(uuid.uuid4()),
+            initiator=initiator,
+            initiator_name=str(initiator),
+            status=status,
+            human_player_cnt=human_player_cnt,
+            game_observable=self.game_prefs.game_observable,
+        )
+        players = [Players(
+            game=game,
+            player_id=initiator,
+            player_name=str(initiator),
+            player_id_display=0,
+            player_type='user',
+            profile=profile_type,
+        )]
+
+        n_growth = int(self.game_prefs.sel_type_01)
+        n_profit = int(self.game_prefs.sel_type_02)
+        n_balanced = int(self.game_prefs.sel_type_03)
+        cpu_names = ([('growth', f'growth_{i + 1:02}') for i in range(n_growth)] +
+                     [('profitability', f'profit_{n_growth + i + 1:02}') for i in range(n_profit)] +
+                     [('balanced', f'balanced_{n_growth + n_profit + i + 1:02}') for i in range(n_balanced)])
+        for profile, player_name in cpu_names:
+            players.append(Players(
+                game=game,
+                player_id=None,
+                player_name=player_name,
+                player_id_display=len(players),
+                player_type='computer',
+                profile=profile,
+            ))
+        return game, players
+
+    def create(self, initiator, profile_type, status, human_player_cnt=1):
+        return self.create_many([initiator], profile_type, status, human_player_cnt)[0]
+
+    def create_many(self, initiators, profile_type, status, human_player_cnt=1):
+        """Create one game per initiator (repeat an initiator to give them several games)."""
+        built = [self.build(initiator, profile_type, status, human_player_cnt) for initiator in initiators]
+        with transaction.atomic():
+            IndivGames.objects.bulk_create([game for game, _ in built])
+            Players.objects.bulk_create([player for _, players in built for player in players])
+            LobbyVersion.bump_users({initiator.pk for initiator in initiators})
+        return [game for game, _ in built]
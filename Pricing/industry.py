@@ -0,0 +1,101 @@
+from decimal import Decimal
+import numpy as np
+from django.core.cache import cache
+from .kpis import ratio
+from .models import Industry
+
+INDUSTRY_CUBE_CACHE_TIMEOUT = 60 * 60
+INDUSTRY_TOTAL_NAME = 'Total Industry'
+# Industry columns held in the cube and their decimal places; values are kept as exact fixed-point integers
+CUBE_METRICS = [('written_premium', 2), ('annual_expenses', 2), ('cy_losses', 2), ('profit', 2), ('capital', 2),
+                ('capital_ratio', 5)]
+
+
+class IndustryCube:
+    """Every Industry row of a game as a year x company x metric array, from a single query.
+
+    Amounts are stored as integers in units of their column's last decimal place, so
+    display values convert back to the same Decimal.  Companies are in order of their
+    first row, and each cell remembers its row id so a year's companies can be listed
+    in row order.  The Total Industry line comes from IndustryTotals.
+    """
+
+    def __init__(self, rows):
+        self.roster = []
+        company_idx = {}
+        for row in rows:
+            if row['player_name'] not in company_idx:
+                company_idx[row['player_name']] = len(self.roster)
+                self.roster.append(row['player_name'])
+        self.years = sorted({row['year'] for row in rows}, reverse=True)
+        year_idx = {year: i for i, year in enumerate(self.years)}
+
+        shape = (len(self.years), len(self.roster))
+        self.values = np.zeros(shape + (len(CUBE_METRICS),), dtype=np.int64)
+        self.row_id = np.full(shape, -1, dtype=np.int64)
+        self.capital_test = np.full(shape, None, dtype=object)
+        for row in rows:
+            cell = (year_idx[row['year']], company_idx[row['player_name']])
+            self.row_id[cell] = row['id']
+            self.capital_test[cell] = row['capital_test']
+            self.values[cell] = [int((row[metric] or 0).scaleb(places)) for metric, places in CUBE_METRICS]
+
+        amounts = self.values.astype(float) / 100
+        written = amounts[:, :, self.metric('written_premium')]
+        self.loss_ratio = ratio(amounts[:, :, self.metric('cy_losses')], written)
+        self.expense_ratio = ratio(amounts[:, :, self.metric('annual_expenses')], written)
+
+    @staticmethod
+    def metric(name):
+        return [metric for metric, _ in CUBE_METRICS].index(name)
+
+    @classmethod
+    def build(cls, game):
+        fields = ['id', 'player_name', 'year', 'capital_test'] + [metric for metric, _ in CUBE_METRICS]
+        return cls(list(Industry.objects.filter(game_id=game).order_by('id').values(*fields)))
+
+    @classmethod
+    def for_game(cls, game, version):
+        """Return the cached cube for version, the game's IndustryTotals.sync() version."""
+        cache_key = f'industry-cube:{game.game_id}:{version}'
+        cube = cache.get(cache_key)
+        if cube is None:
+            cube = cls.build(game)
+            cache.set(cache_key, cube, INDUSTRY_CUBE_CACHE_TIMEOUT)
+        return cube
+
+    def companies(self, year, exclude_total=False):
+        """Indices of the companies with a row in year, in row order."""
+        y = self.years.index(year)
+        idx = [c for c in np.argsort(self.row_id[y], kind='stable') if self.row_id[y, c] >= 0]
+        if exclude_total:
+            idx = [c for c in idx if self.roster[c] != INDUSTRY_TOTAL_NAME]
+        return idx
+
+    def decimal(self, units, metric):
+        return Decimal(int(units)).scaleb(-dict(CUBE_METRICS)[metric])
+
+    def company_rows(self, year):
+        """The year's rows as Industry values() dicts, Decimal amounts included, with their loss and expense ratios."""
+        y = self.years.index(year)
+        return [{'player_name': self.roster[c],
+                 **{metric: self.decimal(self.values[y, c, m], metric) for m, (metric, _) in enumerate(CUBE_METRICS)},
+                 'capital_test': self.capital_test[y, c],
+                 'loss_ratio': float(self.loss_ratio[y, c]),
+                 'expense_ratio': float(self.expense_ratio[y, c])}
+                for c in self.companies(year)]
+
+    def chart(self, year):
+        """Per-company series for the industry chart, excluding any Total Industry row."""
+        y = self.years.index(year)
+        idx = self.companies(year, exclude_total=True)
+        amounts = self.values[y, idx].astype(float) / 100
+        return {
+            'companies': [self.roster[c] for c in idx],
+            'written_premium': amounts[:, self.metric('written_premium')].tolist(),
+            'profitability': amounts[:, self.metric('profit')].tolist(),
+            'capital': amounts[:, self.metric('capital')].tolist(),
+            'loss_ratio': self.loss_ratio[y, idx].tolist(),
+            'expense_ratio': self.expense_ratio[y, idx].tolist(),
+            'mct_failures': [self.capital_test[y, c] in ['Fail', 'fail', 'False', False] for c in idx],
+        }
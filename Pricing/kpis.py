@@ -0,0 +1,89 @@
+from collections import Counter
+import numpy as np
+from .models import Players, MktgSales, Financials, Industry, IndustryTotals, Decisions
+
+MKTG_FIELDS = ['beg_in_force', 'mktg_expense', 'mktg_expense_ind', 'quotes', 'sales', 'canx', 'end_in_force',
+               'in_force_ind']
+
+
+def ratio(numerator, denominator, scale=100):
+    """numerator / denominator * scale elementwise, 0 where the denominator is not positive."""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator * scale, 0.0)
+
+
+class PlayerKPIs:
+    """The derived metrics of one player's game years, computed together over a common year axis.
+
+    Built from the player's MktgSales, Financials and Decisions rows and the game's industry
+    MCT failures.  Every metric is an array over ``years`` (ascending) so the report tables,
+    charts and the scatter all read the same numbers; at() picks any years in any order,
+    with 0 for years the player has no row.
+    """
+
+    def __init__(self, mktg_rows, financial_rows, decision_rows, industry_failures, host_failures):
+        self.years = sorted({row['year'] for row in mktg_rows} | {row['year'] for row in financial_rows}
+                            | {row['year'] for row in decision_rows} | set(industry_failures))
+        self.year_idx = {year: i for i, year in enumerate(self.years)}
+
+        mktg = self.columns(mktg_rows, MKTG_FIELDS)
+        self.close_ratio = ratio(mktg['sales'], mktg['quotes'])
+        self.retention_ratio = ratio(mktg['beg_in_force'] - mktg['canx'], mktg['beg_in_force'])
+        # the same over the year's ending customers, as the scatter has always shown it
+        self.ending_retention_ratio = ratio(mktg['end_in_force'] - mktg['canx'], mktg['end_in_force'])
+        self.cancellation_rate = ratio(mktg['canx'], mktg['end_in_force'])
+        self.market_share = ratio(mktg['end_in_force'], mktg['in_force_ind'])
+        self.mktg_share = ratio(mktg['mktg_expense'], mktg['mktg_expense_ind'])
+
+        self.mct_failed = np.zeros(len(self.years), dtype=bool)
+        for row in financial_rows:
+            self.mct_failed[self.year_idx[row['year']]] = row['capital_test'] == 'Fail'
+
+        # percentage change of the selected average premium from the prior year's decision
+        avg_prem = self.columns(decision_rows, ['sel_avg_prem'], missing=np.nan)['sel_avg_prem']
+        prior = np.array([self.year_idx.get(year - 1, -1) for year in self.years], dtype=np.int64)
+        prior_prem = np.where(prior >= 0, avg_prem[prior], np.nan)
+        with np.errstate(invalid='ignore'):
+            self.rate_change = np.where((prior_prem > 0) & ~np.isnan(avg_prem), (avg_prem / prior_prem - 1) * 100, 0.0)
+
+        # MCT failures among the other companies of the industry
+        self.osfi_interventions = np.array([industry_failures.get(year, 0) - host_failures[year]
+                                            for year in self.years], dtype=np.int64)
+
+    def columns(self, rows, fields, missing=0.0):
+        """Float arrays over years of each field, from the first row of each year."""
+        out = {field: np.full(len(self.years), missing) for field in fields}
+        seen = set()
+        for row in rows:
+            if row['year'] in seen:
+                continue
+            seen.add(row['year'])
+            for field in fields:
+                out[field][self.year_idx[row['year']]] = float(row[field] or 0)
+        return out
+
+    def at(self, name, years):
+        """The metric for each of years, as Python values."""
+        values = getattr(self, name)
+        return [values[self.year_idx[year]].item() if year in self.year_idx else values.dtype.type(0).item()
+                for year in years]
+
+    @classmethod
+    def for_player(cls, game, user, mktg_rows=None):
+        """Load the player's rows (reusing mktg_rows when the caller already has them) and compute."""
+        if mktg_rows is None:
+            mktg_rows = list(MktgSales.objects.filter(game_id=game, player_id=user).values('year', *MKTG_FIELDS))
+        financial_rows = list(Financials.objects.filter(game_id=game, player_id=user).values('year', 'capital_test'))
+        decision_rows = list(Decisions.objects.filter(game_id=game, player_id=user).order_by('year', 'id')
+                             .values('year', 'sel_avg_prem'))
+
+        IndustryTotals.sync(game)
+        industry_failures = IndustryTotals.failures(game)
+        # The player's own Industry failures are not counted against the rest of the industry
+        host_failures = Counter()
+        if Players.objects.filter(game=game, player_id=user).exists():
+            host_failures.update(Industry.objects.filter(game_id=game, player_id=user, capital_test='Fail')
+                                 .values_list('year', flat=True))
+        return cls(mktg_rows, financial_rows, decision_rows, industry_failures, host_failures)
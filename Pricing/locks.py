@@ -0,0 +1,111 @@
+import hashlib
+import threading
+import time
+from datetime import timedelta
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Lock
+
+# Seconds a claim lasts unless renewed, and at most how often one process sweeps expired claims
+LOCK_TTL = 60
+SWEEP_INTERVAL = 5 * 60
+
+
+def advisory_key(name):
+    """Signed 64-bit key of name for pg_advisory_* functions."""
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), 'big', signed=True)
+
+
+SWEEP_KEY = advisory_key('Pricing.locks.sweep')
+
+
+class LockService:
+    """Named locks held by one holder at a time for a TTL, stored as Lock rows.
+
+    A claim must outlive the request that took it (decision_input claims, decision_confirm
+    releases), so it is a row with its holder and expiry rather than a database session lock.
+    acquire() takes or renews it in one atomic step: on PostgreSQL a single upsert guarded by
+    a transaction-scoped advisory lock, so claimants racing for the same id give up at once
+    instead of queueing on the row; elsewhere a conditional UPDATE, then an INSERT that the
+    unique lock_id turns away if another claimant got there first.
+
+    holder identifies the claimant (the request's session key), and may renew its own claim
+    before it expires or release it; an empty holder never matches, so such a claim only
+    frees on expiry.  sweep() deletes every expired claim in one statement.
+    """
+
+    def __init__(self, ttl=LOCK_TTL, sweep_interval=SWEEP_INTERVAL):
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.lock = threading.Lock()
+        self.last_sweep = time.monotonic()
+
+    def acquire(self, lock_id, user, holder='', ttl=None):
+        holder = holder or ''
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=self.ttl if ttl is None else ttl)
+        if connection.vendor == 'postgresql':
+            acquired = self.claim_advisory(lock_id, user, holder, now, expires_at)
+        else:
+            acquired = self.claim_row(lock_id, user, holder, now, expires_at)
+        self.maybe_sweep()
+        return acquired
+
+    def claim_advisory(self, lock_id, user, holder, now, expires_at):
+        table = connection.ops.quote_name(Lock._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                WITH claim AS (SELECT pg_try_advisory_xact_lock(%s) AS won)
+                INSERT INTO {table} (lock_id, user_id, holder, created_at, expires_at)
+                SELECT %s, %s, %s, %s, %s FROM claim WHERE claim.won
+                ON CONFLICT (lock_id) DO UPDATE
+                    SET user_id = EXCLUDED.user_id, holder = EXCLUDED.holder,
+                        created_at = EXCLUDED.created_at, expires_at = EXCLUDED.expires_at
+                    WHERE {table}.expires_at <= EXCLUDED.created_at
+                       OR ({table}.holder = EXCLUDED.holder AND EXCLUDED.holder <> '')
+                RETURNING id
+            """, [advisory_key(lock_id), lock_id, user.pk, holder, now, expires_at])
+            return cursor.fetchone() is not None
+
+    def claim_row(self, lock_id, user, holder, now, expires_at):
+        claimable = Q(expires_at__lte=now)
+        if holder:
+            claimable |= Q(holder=holder)
+        if Lock.objects.filter(claimable, lock_id=lock_id).update(
+                user=user, holder=holder, created_at=now, expires_at=expires_at):
+            return True
+        try:
+            with transaction.atomic():
+                Lock.objects.create(lock_id=lock_id, user=user, holder=holder, created_at=now, expires_at=expires_at)
+        except IntegrityError:
+            return False  # held, or claimed between the update and the insert
+        return True
+
+    def release(self, lock_id, holder):
+        """Drop holder's claim on lock_id; returns whether there was one.  An empty holder releases nothing."""
+        if not holder:
+            return False
+        deleted, _ = Lock.objects.filter(lock_id=lock_id, holder=holder).delete()
+        return deleted > 0
+
+    def sweep(self):
+        """Delete every expired claim; returns how many.  Concurrent sweeps on PostgreSQL skip."""
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_try_advisory_xact_lock(%s)', [SWEEP_KEY])
+                    if not cursor.fetchone()[0]:
+                        return 0
+            deleted, _ = Lock.objects.filter(expires_at__lte=timezone.now()).delete()
+        return deleted
+
+    def maybe_sweep(self):
+        with self.lock:
+            if time.monotonic() - self.last_sweep < self.sweep_interval:
+                return
+            self.last_sweep = time.monotonic()
+        self.sweep()
+
+
+lock_service = LockService()
@@ -0,0 +1,66 @@
+import time
+from types import SimpleNamespace
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from Pricing.game_factory import GameFactory
+from Pricing.models import IndivGames, Players
+
+
+def create_game_per_row(initiator, game_prefs, profile_type, status):
+    """The per-row path individual()/group() used: update_or_create, then one create per CPU company."""
+    factory = GameFactory(game_prefs)
+    game, players = factory.build(initiator, profile_type, status)
+    game, created = IndivGames.objects.update_or_create(
+        game_id=game.game_id,
+        initiator=initiator,
+        initiator_name=str(initiator),
+        status=status,
+        game_observable=game_prefs.game_observable,
+    )
+    for player in players:
+        Players.objects.create(game=game, player_id=player.player_id, player_name=player.player_name,
+                               player_id_display=player.player_id_display, player_type=player.player_type,
+                               profile=player.profile)
+    return game
+
+
+class Command(BaseCommand):
+    help = 'Benchmark games created per second: per-row inserts against the bulk GameFactory. Rolled back afterwards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=40)
+        parser.add_argument('--growth', type=int, default=10)
+        parser.add_argument('--profit', type=int, default=10)
+        parser.add_argument('--balanced', type=int, default=10)
+
+    def handle(self, *args, **options):
+        n_games = options['games']
+        game_prefs = SimpleNamespace(sel_type_01=options['growth'], sel_type_02=options['profit'],
+                                     sel_type_03=options['balanced'], game_observable=False)
+        roster_size = 1 + options['growth'] + options['profit'] + options['balanced']
+
+        with transaction.atomic():
+            instructor = User.objects.create_user(username='bench_game_factory_instructor')
+
+            start = time.perf_counter()
+            for _ in range(n_games):
+                create_game_per_row(instructor, game_prefs, 'balanced', 'active')
+            per_row_secs = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(n_games):
+                GameFactory(game_prefs).create(instructor, 'balanced', 'active')
+            single_secs = time.perf_counter() - start
+
+            start = time.perf_counter()
+            GameFactory(game_prefs).create_many([instructor] * n_games, 'balanced', 'active')
+            many_secs = time.perf_counter() - start
+
+            assert Players.objects.filter(game__initiator=instructor).count() == 3 * n_games * roster_size
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'{n_games} games x {roster_size} players')
+        for label, secs in (('per-row create', per_row_secs), ('GameFactory.create', single_secs),
+                            ('GameFactory.create_many', many_secs)):
+            self.stdout.write(f'{label:<24} {secs:8.3f} s  {n_games / secs:8.1f} games/s')
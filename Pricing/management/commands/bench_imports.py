@@ -0,0 +1,61 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+
+PROJECT_DIR = Path(__file__).resolve().parents[3]
+
+# A fresh worker: set up Django and load the URLconf (and so every view module), as the first
+# request does; then load the analytics module, as the first report request does.
+WORKER = '''
+import json, sys, time
+from importlib import import_module
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+
+start = time.perf_counter()
+import django
+django.setup()
+from django.conf import settings
+import_module(settings.ROOT_URLCONF)
+booted = time.perf_counter()
+stats = {'boot': booted - start, 'boot_rss': rss_mb(),
+         'loaded': [name for name in ('numpy', 'pandas', 'sklearn') if name in sys.modules]}
+import_module('Pricing.analytics')
+stats.update(analytics=time.perf_counter() - booted, analytics_rss=rss_mb())
+print(json.dumps(stats))
+'''
+
+
+class Command(BaseCommand):
+    help = ('Measure import time and RSS of a fresh worker once its views are loaded, and again once the '
+            'pandas/numpy analytics module is, with the current settings.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+
+    def worker(self):
+        result = subprocess.run([sys.executable, '-c', WORKER], cwd=PROJECT_DIR, env=dict(os.environ),
+                                capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(f'Worker failed:\n{result.stderr}')
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        runs = [self.worker() for _ in range(options['runs'])]
+        boot = statistics.median(run['boot'] for run in runs)
+        analytics = statistics.median(run['analytics'] for run in runs)
+        boot_rss = statistics.median(run['boot_rss'] for run in runs)
+        analytics_rss = statistics.median(run['analytics_rss'] for run in runs)
+        self.stdout.write(f'views loaded:     {boot * 1000:7.0f} ms  {boot_rss:6.1f} MB RSS  '
+                          f'(scientific modules loaded: {", ".join(runs[0]["loaded"]) or "none"})')
+        self.stdout.write(f'+ analytics:      {analytics * 1000:7.0f} ms  {analytics_rss:6.1f} MB RSS')
+        self.stdout.write(f'lazy saving per worker until its first report: {analytics * 1000:.0f} ms, '
+                          f'{analytics_rss - boot_rss:.1f} MB')
@@ -0,0 +1,81 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from Pricing.locks import LockService
+from Pricing.models import Lock
+
+
+class Command(BaseCommand):
+    help = ('Hammer the lock service from many threads, each a different holder racing for a few lock ids, '
+            'and fail if two holders ever held the same id at once.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--locks', type=int, default=2, help='Distinct lock ids the threads race for')
+        parser.add_argument('--attempts', type=int, default=200, help='Acquire attempts per thread')
+        parser.add_argument('--hold', type=float, default=0.001, help='Seconds a won lock is held')
+
+    def handle(self, *args, **options):
+        service = LockService()
+        user, _ = User.objects.get_or_create(username='lock-bench')
+        lock_ids = [f'bench-{i}' for i in range(options['locks'])]
+        owners = {}
+        owners_lock = threading.Lock()
+        totals = {'acquired': 0, 'refused': 0, 'errors': 0, 'violations': 0}
+        latencies = []
+
+        def hammer(worker):
+            holder = f'holder-{worker}'
+            counts = dict.fromkeys(totals, 0)
+            spent = []
+            try:
+                for attempt in range(options['attempts']):
+                    lock_id = lock_ids[(worker + attempt) % len(lock_ids)]
+                    start = time.perf_counter()
+                    try:
+                        acquired = service.acquire(lock_id, user, holder, ttl=30)
+                    except Exception:
+                        counts['errors'] += 1
+                        continue
+                    spent.append(time.perf_counter() - start)
+                    if not acquired:
+                        counts['refused'] += 1
+                        continue
+                    counts['acquired'] += 1
+                    with owners_lock:
+                        if owners.get(lock_id) is not None:
+                            counts['violations'] += 1
+                        owners[lock_id] = holder
+                    time.sleep(options['hold'])
+                    with owners_lock:
+                        if owners.get(lock_id) == holder:
+                            del owners[lock_id]
+                    service.release(lock_id, holder)
+            finally:
+                connection.close()
+            with owners_lock:
+                for key, value in counts.items():
+                    totals[key] += value
+                latencies.extend(spent)
+
+        Lock.objects.filter(lock_id__in=lock_ids).delete()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            list(executor.map(hammer, range(options['threads'])))
+        elapsed = time.perf_counter() - start
+        Lock.objects.filter(lock_id__in=lock_ids).delete()
+        user.delete()
+
+        latencies.sort()
+        calls = len(latencies)
+        self.stdout.write(f'{options["threads"]} threads x {options["attempts"]} attempts on {len(lock_ids)} ids '
+                          f'({connection.vendor}) in {elapsed:.2f}s')
+        self.stdout.write(', '.join(f'{key} {value}' for key, value in totals.items()))
+        if calls:
+            self.stdout.write(f'acquire latency: median {latencies[calls // 2] * 1000:.2f} ms, '
+                              f'p99 {latencies[min(calls - 1, int(calls * 0.99))] * 1000:.2f} ms')
+        if totals['violations']:
+            raise CommandError(f'{totals["violations"]} acquisitions of a lock another holder still held')
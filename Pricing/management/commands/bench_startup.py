@@ -0,0 +1,98 @@
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from PricingProject.secrets import SECRET_KEYS, CachedSecrets, FileSecrets
+
+PROJECT_DIR = Path(__file__).resolve().parents[3]
+
+# What a gunicorn worker does on boot: import the settings and build the WSGI application; then its
+# first request's first use of a secret, which is when they are loaded
+BOOT = '''
+import time
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+booted = time.perf_counter()
+from django.conf import settings
+str(settings.SECRET_KEY)
+print(booted - start, time.perf_counter() - booted)
+'''
+
+# Just the settings import, then the first secret
+SETTINGS = '''
+import time
+start = time.perf_counter()
+import PricingProject.settings
+imported = time.perf_counter()
+str(PricingProject.settings.SECRET_KEY)
+print(imported - start, time.perf_counter() - imported)
+'''
+
+SAMPLE_SECRETS = {
+    'DJANGO_SECRET_KEY': 'bench-startup', 'POSTGRES_DB': 'pricing', 'POSTGRES_USER': 'pricing',
+    'POSTGRES_PASSWORD': 'pricing', 'POSTGRES_HOST': 'localhost', 'POSTGRES_PORT': '5432',
+    'POSTGRES_HOST_DEV': 'localhost', 'POSTGRES_PORT_DEV': '5432',
+}
+
+
+class Command(BaseCommand):
+    help = ('Time a worker boot (settings import and WSGI application) in a fresh interpreter, and the first use '
+            'of a secret that loads them, with each secrets provider: environment, file and the encrypted disk '
+            'cache, plus AWS Secrets Manager with --aws.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--aws', action='store_true', help='Also fetch from AWS, with the credentials in the environment')
+        parser.add_argument('--settings-only', action='store_true',
+                            help='Time the settings import alone, e.g. where the database driver is not installed')
+
+    def boot(self, script, env, before=None):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', script], cwd=PROJECT_DIR, env=env, capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(f'Worker boot failed:\n{result.stderr}')
+        boot, secrets = map(float, result.stdout.strip().splitlines()[-1].split())
+        return time.perf_counter() - start, boot, secrets
+
+    def handle(self, *args, **options):
+        base = {key: value for key, value in os.environ.items()
+                if key not in SECRET_KEYS and not key.startswith('PRICING_SECRETS')}
+        base['DJANGO_SETTINGS_MODULE'] = 'PricingProject.settings'
+
+        with tempfile.TemporaryDirectory() as tmp:
+            secrets_file = Path(tmp) / 'secrets.txt'
+            secrets_file.write_text(repr(SAMPLE_SECRETS))
+            cache_file = Path(tmp) / 'secrets_cache'
+            CachedSecrets(FileSecrets(secrets_file), cache_file, key='bench-startup').load()
+
+            cases = {
+                'env': (dict(base, PRICING_SECRETS_PROVIDER='env', **SAMPLE_SECRETS), None),
+                'file': (dict(base, PRICING_SECRETS_PROVIDER='file', PRICING_SECRETS_FILE=str(secrets_file)), None),
+                'cache': (dict(base, PRICING_SECRETS_PROVIDER='aws', PRICING_SECRETS_CACHE=str(cache_file),
+                               PRICING_SECRETS_KEY='bench-startup'), None),
+                # Nothing configured and no AWS credentials: the first secret used warns, and there are none
+                'none': ({key: value for key, value in base.items()
+                          if key not in ('aws_access_key_id', 'aws_secret_access_key')}, None),
+            }
+            if options['aws']:
+                aws_cache = Path(tmp) / 'aws_cache'
+                cases['aws'] = (dict(base, PRICING_SECRETS_PROVIDER='aws', PRICING_SECRETS_CACHE=str(aws_cache)),
+                                lambda: aws_cache.unlink(missing_ok=True))
+
+            script, phase = (SETTINGS, 'settings') if options['settings_only'] else (BOOT, 'settings+wsgi')
+            self.stdout.write(f'{"provider":<10}{"boot (median)":>16}{"boot (min)":>14}{phase:>16}{"first secret":>16}')
+            for name, (env, before) in cases.items():
+                runs = [self.boot(script, env, before) for _ in range(options['runs'])]
+                wall = [total for total, _, _ in runs]
+                inner = [boot for _, boot, _ in runs]
+                secrets = [secret for _, _, secret in runs]
+                self.stdout.write(f'{name:<10}{statistics.median(wall) * 1000:>13.0f} ms'
+                                  f'{min(wall) * 1000:>11.0f} ms{statistics.median(inner) * 1000:>13.0f} ms'
+                                  f'{statistics.median(secrets) * 1000:>13.0f} ms')
@@ -0,0 +1,74 @@
+import timeit
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+from Pricing.tables import FINANCIALS_TABLE
+
+
+def make_rows(n_years, seed=0):
+    """Synthetic Financials values() rows, newest first, as financials_report reads them."""
+    rng = np.random.default_rng(seed)
+    return [{
+        'year': 2030 - y,
+        'written_premium': Decimal(f'{rng.uniform(8e6, 1e7):.2f}'),
+        'inv_income': Decimal(f'{rng.uniform(0, 5e4):.2f}'),
+        'in_force': Decimal(int(rng.integers(10_000, 13_000))),
+        'annual_expenses': Decimal(f'{rng.uniform(2e6, 2.5e6):.2f}'),
+        'ay_losses': Decimal(f'{rng.uniform(5e6, 6e6):.2f}'),
+        'py_devl': Decimal(f'{rng.uniform(-5e4, 5e4):.2f}'),
+        'profit': Decimal(f'{rng.uniform(-2e5, 8e5):.2f}'),
+        'dividend_paid': Decimal(f'{rng.uniform(0, 1e5):.2f}'),
+        'capital': Decimal(f'{rng.uniform(3e6, 4e6):.2f}'),
+        'capital_ratio': Decimal(f'{rng.uniform(1.0, 2.2):.5f}'),
+        'capital_test': 'Pass' if y % 3 else 'Fail',
+    } for y in range(n_years)]
+
+
+def pandas_table(rows, force_term):
+    """The transpose / iterrows / concat / to_html pipeline financials_report used."""
+    df_latest = pd.DataFrame(rows)
+    df_latest.rename(columns={"year": "Year"}, inplace=True)
+    transposed_df = df_latest.set_index('Year').T
+    labels = {'written_premium': 'Written Premium', 'inv_income': 'Investment Income', 'in_force': force_term,
+              'annual_expenses': 'Expenses', 'ay_losses': 'Acc Yr Claims Incurred', 'py_devl': 'Prior Yr Development',
+              'profit': 'Profit', 'dividend_paid': 'Dividend Paid', 'capital': 'Ending Capital',
+              'capital_ratio': 'MCT Ratio', 'capital_test': 'MCT Test'}
+    for index, row in transposed_df.iterrows():
+        if index == 'in_force':
+            transposed_df.loc[index] = row.apply(lambda x: f"{int(x):,}")
+        elif index == 'capital_ratio':
+            transposed_df.loc[index] = row.apply(lambda x: f"{round(x * 100, 1)}%")
+        elif index != 'capital_test':
+            transposed_df.loc[index] = row.apply(lambda x: f"${round(x):,}")
+        transposed_df.rename(index={index: labels[index]}, inplace=True)
+
+    blank_row = pd.DataFrame([['' for _ in transposed_df.columns]], columns=transposed_df.columns)
+    for index in (2, 4, 8, 11, 13):
+        transposed_df = pd.concat([transposed_df.iloc[:index], blank_row, transposed_df.iloc[index:]])
+        transposed_df.index = transposed_df.index.where(transposed_df.index != 0, ' ')
+    return transposed_df.to_html(classes='my-financial-table', border=0, justify='initial', index=True)
+
+
+def spec_table(rows, force_term):
+    data = {key: [row[key] for row in rows] for key in rows[0]}
+    return FINANCIALS_TABLE.format(data['year'], data, force_term=force_term).html()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the declarative report-table renderer against the pandas transpose/to_html pipeline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        # the reports' four-year table, then the widest tables a long game could show
+        for n_years in (4, 10, 20):
+            rows = make_rows(n_years)
+            assert pandas_table(rows, 'In-Force') == spec_table(rows, 'In-Force')
+
+            pandas_secs = timeit.timeit(lambda: pandas_table(rows, 'In-Force'), number=repeat) / repeat
+            spec_secs = timeit.timeit(lambda: spec_table(rows, 'In-Force'), number=repeat) / repeat
+            self.stdout.write(f'{n_years:>3} columns: pandas {1e3 * pandas_secs:8.3f} ms  '
+                              f'spec {1e3 * spec_secs:8.3f} ms  speed-up {pandas_secs / spec_secs:6.1f}x')
@@ -0,0 +1,66 @@
+import copy
+import timeit
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+from Pricing.triangles import ChainLadder
+
+
+def make_rows(n_acc, n_devl, seed=0):
+    """Synthetic Triangles JSON rows (one list per development year, oldest accident year first)."""
+    rng = np.random.default_rng(seed)
+    base = rng.integers(200_000, 400_000, size=n_acc).astype(float)
+    growth = np.cumprod(np.append(1.0, 1 + rng.uniform(0.05, 0.6, size=n_devl - 1)))
+    cells = np.rint(base[:, None] * growth[None, :])
+    observed = np.arange(n_devl)[None, :] <= np.minimum(n_devl - 1, n_acc - 1 - np.arange(n_acc))[:, None]
+    return np.where(observed, cells, 0).T.astype(int).tolist()
+
+
+def pandas_chain_ladder(rows, acc_yrs, devl_mths):
+    """The cell-by-cell DataFrame path the report views used, generalized to any triangle size."""
+    df = pd.DataFrame(columns=acc_yrs, index=devl_mths)
+    for i, devl_mth in enumerate(devl_mths):
+        df.loc[devl_mth] = rows[i]
+    transposed_df = df.T
+
+    fact_devl_mths = copy.deepcopy(devl_mths)
+    fact_devl_mths[0] = None
+    fact_df = pd.DataFrame(columns=['Age-to-Age'], index=fact_devl_mths)
+    fact_df.iloc[0, 0] = 0
+    for k in range(1, len(devl_mths)):
+        numerator = sum(transposed_df.values[0:len(acc_yrs) - k][:, k])
+        denominator = sum(transposed_df.values[0:len(acc_yrs) - k][:, k - 1])
+        if denominator == 0:
+            denominator = 1
+        fact_df.iloc[k, 0] = numerator / denominator
+
+    for i in range(len(acc_yrs)):
+        for k in range(len(devl_mths)):
+            if k > len(acc_yrs) - 1 - i:
+                transposed_df.iloc[i, k] = transposed_df.iloc[i, k - 1] * fact_df.iloc[k, 0]
+    return fact_df, transposed_df
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the NumPy chain ladder against the per-cell pandas triangle path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        # square triangles plus the game's own layout of five accident years over three development years
+        for n_acc, n_devl in ((3, 3), (5, 3), (20, 20)):
+            rows = make_rows(n_acc, n_devl)
+            acc_yrs = [f'Acc Yr {2000 + i}' for i in range(n_acc)]
+            devl_mths = [(yr + 1) * 12 for yr in range(n_devl)]
+
+            fact_df, projected_df = pandas_chain_ladder(rows, acc_yrs, devl_mths)
+            ladder = ChainLadder(rows)
+            assert np.allclose(fact_df.iloc[1:, 0].astype(float).values, ladder.age_to_age)
+            assert np.allclose(projected_df.values.astype(float), ladder.projected)
+
+            pandas_secs = timeit.timeit(lambda: pandas_chain_ladder(rows, acc_yrs, devl_mths), number=repeat) / repeat
+            numpy_secs = timeit.timeit(lambda: ChainLadder(rows), number=repeat) / repeat
+            self.stdout.write(f'{n_acc}x{n_devl} triangle: pandas {1e3 * pandas_secs:8.3f} ms  '
+                              f'numpy {1e3 * numpy_secs:8.3f} ms  speed-up {pandas_secs / numpy_secs:6.1f}x')
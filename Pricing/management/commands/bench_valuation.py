@@ -0,0 +1,89 @@
+import timeit
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+from Pricing.valuation import ValuationKernel
+
+
+def make_rows(n_companies, n_years, seed=0):
+    """Synthetic Valuation values() rows with Decimal columns, as the report reads them."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for c in range(n_companies):
+        in_force = int(rng.integers(8_000, 14_000))
+        for y in range(n_years):
+            beg_in_force = in_force
+            in_force = int(in_force * rng.uniform(0.95, 1.08))
+            rows.append({
+                'player_name': f'company_{c:03}',
+                'year': 2000 + y,
+                'in_force': Decimal(in_force),
+                'beg_in_force': Decimal(beg_in_force),
+                'profit': Decimal(f'{rng.uniform(-2e5, 8e5):.2f}'),
+                'dividend_paid': Decimal(f'{rng.uniform(0, 3e5):.2f}'),
+                'excess_capital': Decimal(f'{rng.uniform(0, 5e5):.2f}'),
+                'pv_index': Decimal(f'{1.1 ** -y:.6f}'),
+                'irr_rate': Decimal('0.100000'),
+            })
+    return rows
+
+
+def reverse_pv_index(group):
+    group['new_pv_index'] = group['pv_index'].values[::-1]
+    return group
+
+
+def pandas_valuation(rows, selected_year):
+    """The groupby/apply path valuation_report used, with its per-row Decimal helpers."""
+    val_df = pd.DataFrame(rows)
+    irr_rate_scalar = val_df['irr_rate'].iloc[0]
+    val_df = val_df[val_df['year'] <= selected_year]
+    val_df = val_df.sort_values(by=['player_name', 'year'])
+    all_data_years = val_df['year'].unique()
+    latest_year = all_data_years.max()
+    earliest_year = max((latest_year - 20 + 1), all_data_years.min())
+    val_df = val_df.groupby('player_name').apply(reverse_pv_index).reset_index(drop=True)
+
+    val_df['dividend_pv'] = val_df['new_pv_index'] * val_df['dividend_paid']
+    val_df['profit'] = np.where(val_df['year'] >= earliest_year, val_df['profit'], 0)
+    val_df['excess_capital'] = np.where(val_df['year'] == selected_year, val_df['excess_capital'], 0)
+    val_df['in_force'] = np.where(val_df['year'] == selected_year, val_df['in_force'], 0)
+    val_df['tot_in_force'] = np.where(val_df['year'] >= earliest_year, val_df['beg_in_force'], 0)
+    val_df['beg_in_force'] = np.where(val_df['year'] == earliest_year, val_df['beg_in_force'], 0)
+    val_df['total_valuation'] = val_df['dividend_pv'] + val_df['excess_capital']
+    df = val_df.groupby('player_name').agg({'in_force': 'sum', 'beg_in_force': 'sum', 'tot_in_force': 'sum',
+                                            'profit': 'sum', 'dividend_pv': 'sum', 'excess_capital': 'sum',
+                                            'total_valuation': 'sum'}).reset_index()
+    df['capped_growth_rate'] = df.apply(lambda row: Decimal(min(0.07, max(-0.07, (float(row['in_force']) / float(
+        row['beg_in_force'])) ** (1 / (latest_year - earliest_year)) - 1))), axis=1)
+    df['avg_profit'] = df.apply(lambda row: row['profit'] / row['tot_in_force'], axis=1)
+    df['future_value'] = df.apply(lambda row: row['in_force'] * row['avg_profit'] / (irr_rate_scalar - row['capped_growth_rate']), axis=1)
+    df['total_valuation'] = df['total_valuation'] + df['future_value']
+    return df
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the array valuation kernel against the pandas groupby/apply valuation path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        # the game's own size, then longer windows and league-sized company counts
+        for n_companies, n_years in ((8, 10), (8, 20), (100, 20), (250, 20)):
+            rows = make_rows(n_companies, n_years)
+            selected_year = 2000 + n_years - 1
+
+            df = pandas_valuation(rows, selected_year)
+            kernel = ValuationKernel(rows, selected_year, rows[0]['irr_rate'])
+            assert list(df['player_name']) == list(kernel.companies)
+            for key in ('dividend_pv', 'capped_growth_rate', 'avg_profit', 'future_value', 'total_valuation'):
+                assert np.allclose(df[key].astype(float).values, getattr(kernel, key), rtol=1e-9), key
+
+            pandas_secs = timeit.timeit(lambda: pandas_valuation(rows, selected_year), number=repeat) / repeat
+            kernel_secs = timeit.timeit(lambda: ValuationKernel(rows, selected_year, rows[0]['irr_rate']),
+                                        number=repeat) / repeat
+            self.stdout.write(f'{n_companies:>4} companies x {n_years} years: pandas {1e3 * pandas_secs:8.3f} ms  '
+                              f'kernel {1e3 * kernel_secs:8.3f} ms  speed-up {pandas_secs / kernel_secs:6.1f}x')
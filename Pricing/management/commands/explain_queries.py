@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+from django.db.models import Max
+from Pricing.game_factory import GameFactory
+from Pricing.models import (MktgSales, Financials, Industry, Valuation, Triangles, ClaimTrends, Indications,
+                            Decisions, Decisionsns, ChatMessage, IndustryTotals, ValuationLedger)
+
+PLAYER_TABLES = [MktgSales, Financials, Industry, Valuation, Triangles, Indications, Decisions, Decisionsns]
+
+
+def synthetic_row(model, **values):
+    """An unsaved row with every required column the caller didn't give set to zero or empty."""
+    for field in model._meta.concrete_fields:
+        if field.primary_key or field.null or field.has_default() or field.attname in values or field.name in values:
+            continue
+        if isinstance(field, models.JSONField):
+            values[field.name] = {}
+        elif isinstance(field, (models.DecimalField, models.IntegerField)):
+            values[field.name] = 0
+    return model(**values)
+
+
+def view_queries(game, user, year):
+    """The report views' reads for one player's game year, as (view, queryset) pairs."""
+    return [
+        ('decision_input', Decisions.objects.filter(game_id=game, player_id=user, year=year)),
+        ('mktgsales_report', MktgSales.objects.filter(game_id=game, player_id=user).order_by('-year')),
+        ('financials_report', Financials.objects.filter(game_id=game, player_id=user).order_by('-year')),
+        ('mktgsales_report: OSFI failures', IndustryTotals.objects.filter(game=game)),
+        ('mktgsales_report: host failures', Industry.objects.filter(game_id=game, player_id=user, capital_test='Fail')),
+        ('mktgsales_report: host MCT', Financials.objects.filter(game_id=game, player_id=user)),
+        ('industry_reports: cube', Industry.objects.filter(game_id=game).order_by('id')),
+        ('industry_reports: new rows', Industry.objects.filter(game_id=game, id__gt=0).values('game')
+            .annotate(latest_id=Max('id'))),
+        ('industry_reports: totals', IndustryTotals.objects.filter(game=game, year=year)),
+        ('valuation_report', ValuationLedger.objects.filter(game=game, year=year)
+            .order_by('first_valuation_id', 'player_name')),
+        ('valuation_report: rank history', ValuationLedger.objects.filter(game=game, year__lte=year)
+            .order_by('year', 'first_valuation_id')),
+        ('claim_devl_report', Triangles.objects.filter(game_id=game, player_id=user, year=year)),
+        ('claim_trend_report', ClaimTrends.objects.filter(game_id=game, year=year)),
+        ('decision_confirm: indications', Indications.objects.filter(game_id=game, player_id=user, year=year)),
+        ('fetch_messages', ChatMessage.objects.filter(game_id=game, sequence_number__gt=0)
+            .order_by('-sequence_number')[:50]),
+    ]
+
+
+class Command(BaseCommand):
+    help = ('EXPLAIN the report views\' queries against a synthetic dataset of many games, to check index '
+            'coverage as the per-game tables grow. Rolled back afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=2000)
+        parser.add_argument('--companies', type=int, default=6, help='CPU companies per game')
+        parser.add_argument('--years', type=int, default=10)
+        parser.add_argument('--messages', type=int, default=20, help='chat messages per game')
+        parser.add_argument('--verbose-plans', action='store_true', help='print the plan of every query in full')
+
+    def handle(self, *args, **options):
+        n_games, n_years = options['games'], options['years']
+        game_prefs = SimpleNamespace(sel_type_01=options['companies'], sel_type_02=0, sel_type_03=0,
+                                     game_observable=False)
+        first_year = 2020
+
+        with transaction.atomic():
+            user = User.objects.create_user(username='explain_queries_player')
+            games = GameFactory(game_prefs).create_many([user] * n_games, 'balanced', 'active')
+            names = [str(user)] + [f'growth_{i + 1:02}' for i in range(options['companies'])]
+
+            for model in PLAYER_TABLES:
+                rows = []
+                for game in games:
+                    for name in names:
+                        for year in range(n_years):
+                            values = {'game': game, 'player_id': user if name == str(user) else None,
+                                      'player_name': name, 'year': first_year + year}
+                            if model in (Financials, Industry):
+                                values['capital_test'] = 'Fail' if year % 7 == 0 else 'Pass'
+                            rows.append(synthetic_row(model, **values))
+                model.objects.bulk_create(rows, batch_size=5000)
+            ClaimTrends.objects.bulk_create(
+                (ClaimTrends(game=game, year=first_year + year, claim_trends={})
+                 for game in games for year in range(n_years)), batch_size=5000)
+            ChatMessage.objects.bulk_create(
+                (ChatMessage(game_id=game, content='Review decisions.', kind='review')
+                 for game in games for _ in range(options['messages'])), batch_size=5000)
+
+            game = games[n_games // 2]
+            for ledger_game in games[::max(n_games // 100, 1)] + [game]:  # the ledger is built as games are viewed
+                ValuationLedger.sync(ledger_game)
+                IndustryTotals.sync(ledger_game)
+
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            self.stdout.write(f'{n_games} games x {len(names)} players x {n_years} years on {connection.vendor}')
+            for label, queryset in view_queries(game, user, first_year + n_years // 2):
+                plan = queryset.explain()
+                uses_index = any(word in plan.lower() for word in ('using index', 'using covering index',
+                                                                   'index scan', 'index only scan', 'bitmap index'))
+                self.stdout.write(f'{label:<32} {"index" if uses_index else "NO INDEX"}')
+                if options['verbose_plans'] or not uses_index:
+                    self.stdout.write('\n'.join(f'    {line}' for line in plan.splitlines()))
+            transaction.set_rollback(True)
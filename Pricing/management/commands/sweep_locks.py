@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from Pricing.locks import lock_service
+
+
+class Command(BaseCommand):
+    help = 'Delete every expired decision lock.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{lock_service.sweep()} expired locks deleted')
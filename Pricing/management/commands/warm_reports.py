@@ -0,0 +1,40 @@
+import json
+import time
+from django.core.management.base import BaseCommand
+from Pricing.models import IndivGames
+from Pricing.warmup import ReportWarmer, WarmupMetrics, WARMUP_WORKERS, warm_game
+
+
+class Command(BaseCommand):
+    help = ('Build the reports of every human player of the given games (or of every running game) into the cache. '
+            'With --watch, keep polling and warm each game again whenever new Financials or Indications rows arrive.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('game_ids', nargs='*')
+        parser.add_argument('--watch', action='store_true')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls with --watch')
+        parser.add_argument('--workers', type=int, default=WARMUP_WORKERS)
+
+    def games(self, game_ids):
+        if game_ids:
+            return game_ids
+        return list(IndivGames.objects.filter(status='running').values_list('game_id', flat=True))
+
+    def handle(self, *args, **options):
+        if not options['watch']:
+            metrics = WarmupMetrics()
+            for game_id in self.games(options['game_ids']):
+                start = time.perf_counter()
+                warm_game(game_id, metrics)
+                self.stdout.write(f'{game_id}: warmed in {time.perf_counter() - start:.3f}s')
+            self.stdout.write(json.dumps(metrics.snapshot()['latency'], indent=2))
+            return
+
+        warmer = ReportWarmer(workers=options['workers'])
+        while True:
+            queued = [game_id for game_id in self.games(options['game_ids']) if warmer.schedule(game_id)]
+            if queued:
+                self.stdout.write(f'queued {", ".join(queued)}')
+            self.stdout.write(json.dumps({key: value for key, value in warmer.metrics.snapshot().items()
+                                          if key != 'latency'}))
+            time.sleep(options['interval'])
@@ -0,0 +1,23 @@
+# Generated by Django 4.1 on 2026-10-18 12:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pricing', '0051_revert_decision_fields_to_integers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['game_id', 'sequence_number'], name='chatmsg_game_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(condition=models.Q(('content', 'Review decisions.'), ('from_user__isnull', True)), fields=['game_id'], name='chatmsg_game_review_idx'),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 4.1 on 2026-10-18 12:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Messages classified and written back per batch
+CHUNK_SIZE = 1000
+
+# Frozen copy of Pricing.models.classify_message as of this migration, so later changes to the
+# live classifier do not change what it did
+EVENT_KIND_MARKERS = [
+    ('reform', ['Government officials', 'Injury reform', 'product reform', 'after observing']),
+    ('regulatory', ['Regulatory']),
+    ('osfi', ['OSFI']),
+]
+
+
+def classify_message(content, from_server):
+    if not from_server:
+        return 'chat'
+    if content == 'Review decisions.':
+        return 'review'
+    for kind, markers in EVENT_KIND_MARKERS:
+        if any(marker in content for marker in markers):
+            return kind
+    return 'chat'
+
+
+def classify_existing_messages(apps, schema_editor):
+    ChatMessage = apps.get_model('Pricing', 'ChatMessage')
+    GameEventCounter = apps.get_model('Pricing', 'GameEventCounter')
+    counters = {}
+    chunk = []
+    messages = ChatMessage.objects.order_by('sequence_number').only('sequence_number', 'content', 'from_user', 'game_id')
+    for msg in messages.iterator(chunk_size=CHUNK_SIZE):
+        msg.kind = classify_message(msg.content, msg.from_user_id is None)
+        count, _ = counters.get((msg.game_id_id, msg.kind), (0, 0))
+        counters[(msg.game_id_id, msg.kind)] = (count + 1, msg.sequence_number)
+        chunk.append(msg)
+        if len(chunk) == CHUNK_SIZE:
+            ChatMessage.objects.bulk_update(chunk, ['kind'])
+            chunk = []
+    ChatMessage.objects.bulk_update(chunk, ['kind'])
+    GameEventCounter.objects.bulk_create([
+        GameEventCounter(game_id=game_id, kind=kind, count=count, latest_sequence=latest_sequence)
+        for (game_id, kind), (count, latest_sequence) in counters.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pricing', '0052_chatmessage_cursor_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameEventCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('review', 'Review decisions'), ('regulatory', 'Regulatory'), ('osfi', 'OSFI'), ('reform', 'Reform'), ('chat', 'Chat')], max_length=16)),
+                ('count', models.IntegerField(default=0)),
+                ('latest_sequence', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='chatmessage',
+            name='chatmsg_game_review_idx',
+        ),
+        migrations.AddField(
+            model_name='chatmessage',
+            name='kind',
+            field=models.CharField(blank=True, choices=[('review', 'Review decisions'), ('regulatory', 'Regulatory'), ('osfi', 'OSFI'), ('reform', 'Reform'), ('chat', 'Chat')], max_length=16, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['game_id', 'kind', 'sequence_number'], name='chatmsg_game_kind_seq_idx'),
+        ),
+        migrations.AddField(
+            model_name='gameeventcounter',
+            name='game',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='event_counters', to='Pricing.indivgames'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='gameeventcounter',
+            unique_together={('game', 'kind')},
+        ),
+        migrations.RunPython(classify_existing_messages, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.1 on 2026-10-18 12:11
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pricing', '0053_chatmessage_kind_gameeventcounter'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LobbyVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='lobby_version', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.IntegerField(default=1)),
+                ('signature', models.CharField(blank=True, default='', max_length=64)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('checked_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
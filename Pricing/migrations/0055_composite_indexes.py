@@ -0,0 +1,59 @@
+# Generated by Django 4.1 on 2026-10-18 12:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pricing', '0054_lobbyversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='claimtrends',
+            index=models.Index(fields=['game', 'year'], name='clmtrend_game_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='decisions',
+            index=models.Index(fields=['game', 'player_id', 'year'], name='dec_game_player_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='decisionsns',
+            index=models.Index(fields=['game', 'player_id', 'year'], name='decns_game_player_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='financials',
+            index=models.Index(fields=['game', 'player_id', 'year'], name='fin_game_player_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='financials',
+            index=models.Index(fields=['game', 'year', 'capital_test'], name='fin_game_year_test_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='indications',
+            index=models.Index(fields=['game', 'player_id', 'year'], name='indic_game_player_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='industry',
+            index=models.Index(fields=['game', 'year', 'player_name'], name='indus_game_year_player_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='industry',
+            index=models.Index(fields=['game', 'year', 'capital_test'], name='indus_game_year_test_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mktgsales',
+            index=models.Index(fields=['game', 'player_id', 'year'], name='mktg_game_player_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='triangles',
+            index=models.Index(fields=['game', 'player_id', 'year'], name='tri_game_player_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='valuation',
+            index=models.Index(fields=['game', 'year', 'player_name'], name='val_game_year_player_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.1 on 2026-10-18 12:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pricing', '0055_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValuationLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('player_name', models.CharField(blank=True, max_length=128, null=True)),
+                ('year', models.IntegerField()),
+                ('earliest_year', models.IntegerField()),
+                ('first_valuation_id', models.IntegerField()),
+                ('source_id', models.IntegerField()),
+                ('in_force', models.IntegerField()),
+                ('beg_in_force', models.FloatField()),
+                ('tot_in_force', models.FloatField()),
+                ('profit', models.FloatField()),
+                ('dividend_pv', models.FloatField()),
+                ('excess_capital', models.FloatField()),
+                ('capped_growth_rate', models.FloatField()),
+                ('avg_profit', models.FloatField()),
+                ('future_value', models.FloatField()),
+                ('total_valuation', models.FloatField()),
+                ('valuation_rank', models.IntegerField()),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuation_ledger', to='Pricing.indivgames')),
+            ],
+            options={
+                'unique_together': {('game', 'year', 'player_name')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.1 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+def clear_ledger(apps, schema_editor):
+    # the ledger is rebuilt from Valuation on the next valuation_report, this time with irr_rate
+    apps.get_model('Pricing', 'ValuationLedger').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pricing', '0056_valuationledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_ledger, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='valuationledger',
+            name='irr_rate',
+            field=models.FloatField(default=0.0),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.1 on 2026-10-18 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pricing', '0057_valuationledger_irr_rate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndustryTotals',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('source_id', models.IntegerField()),
+                ('companies', models.IntegerField()),
+                ('written_premium', models.DecimalField(decimal_places=2, max_digits=18)),
+                ('annual_expenses', models.DecimalField(decimal_places=2, max_digits=18)),
+                ('cy_losses', models.DecimalField(decimal_places=2, max_digits=18)),
+                ('profit', models.DecimalField(decimal_places=2, max_digits=18)),
+                ('capital', models.DecimalField(decimal_places=2, max_digits=18)),
+                ('capital_test_failures', models.IntegerField()),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='industry_totals', to='Pricing.indivgames')),
+            ],
+            options={
+                'unique_together': {('game', 'year')},
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.1 on 2026-10-18 15:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def clear_locks(apps, schema_editor):
+    # Claims last a minute; drop any left over rather than guess their expiry and holder
+    apps.get_model('Pricing', 'Lock').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Pricing', '0058_industrytotals'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_locks, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='lock',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='lock',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='lock',
+            name='holder',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='lock',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='lock',
+            name='lock_id',
+            field=models.CharField(max_length=255, unique=True),
+        ),
+    ]
@@ -1,7 +1,13 @@
-from django.db import models
+import hashlib
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Greatest
 from django.utils import timezone
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import Signal
+
+VALUATION_SENSITIVITY_CACHE_TIMEOUT = 60 * 60
 
 
 class GamePrefs(models.Model):
@@ -50,6 +56,11 @@ class MktgSales(models.Model):
     end_in_force = models.DecimalField(max_digits=16, decimal_places=0)
     in_force_ind = models.DecimalField(max_digits=16, decimal_places=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['game', 'player_id', 'year'], name='mktg_game_player_year_idx'),
+        ]
+
 
 class Financials(models.Model):
     game = models.ForeignKey(IndivGames, on_delete=models.CASCADE)
@@ -70,6 +81,13 @@ class Financials(models.Model):
     capital_ratio = models.DecimalField(max_digits=18, decimal_places=5)
     capital_test = models.CharField(max_length=4, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['game', 'player_id', 'year'], name='fin_game_player_year_idx'),
+            # OSFI failure counts: capital_test='Fail' per game year
+            models.Index(fields=['game', 'year', 'capital_test'], name='fin_game_year_test_idx'),
+        ]
+
 
 class Industry(models.Model):
     game = models.ForeignKey(IndivGames, on_delete=models.CASCADE)
@@ -84,6 +102,72 @@ class Industry(models.Model):
     capital_ratio = models.DecimalField(max_digits=18, decimal_places=5)
     capital_test = models.CharField(max_length=4, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['game', 'year', 'player_name'], name='indus_game_year_player_idx'),
+            models.Index(fields=['game', 'year', 'capital_test'], name='indus_game_year_test_idx'),
+        ]
+
+
+class IndustryTotals(models.Model):
+    """The Total Industry line of each game year, with the year's capital test failure count.
+
+    The game server writes Industry rows straight to the database, so no save hook sees
+    them; sync() folds in Industry ids beyond the highest source_id already summed and
+    re-totals only the years they touch.  Reports read a year's totals from here.
+    """
+    game = models.ForeignKey(IndivGames, on_delete=models.CASCADE, related_name='industry_totals')
+    year = models.IntegerField()
+    source_id = models.IntegerField()  # highest Industry id this row was built from
+    companies = models.IntegerField()
+    written_premium = models.DecimalField(max_digits=18, decimal_places=2)
+    annual_expenses = models.DecimalField(max_digits=18, decimal_places=2)
+    cy_losses = models.DecimalField(max_digits=18, decimal_places=2)
+    profit = models.DecimalField(max_digits=18, decimal_places=2)
+    capital = models.DecimalField(max_digits=18, decimal_places=2)
+    capital_test_failures = models.IntegerField()
+
+    TOTAL_FIELDS = ['written_premium', 'annual_expenses', 'cy_losses', 'profit', 'capital']
+
+    class Meta:
+        unique_together = ('game', 'year')
+
+    @staticmethod
+    def sync(game):
+        """Re-total the years touched by new Industry rows.
+
+        Returns the highest Industry id the totals now reflect, the version of the
+        industry reports built from them.
+        """
+        synced_id = IndustryTotals.objects.filter(game=game).aggregate(synced_id=models.Max('source_id'))['synced_id'] or 0
+        new_rows = Industry.objects.filter(game=game, id__gt=synced_id).aggregate(
+            first_year=models.Min('year'), source_id=models.Max('id'))
+        if new_rows['source_id'] is None:
+            return synced_id
+
+        totals = (Industry.objects.filter(game=game, year__gte=new_rows['first_year'], id__lte=new_rows['source_id'])
+                  .values('year')
+                  .annotate(companies=models.Count('id'),
+                            capital_test_failures=models.Count('id', filter=models.Q(capital_test='Fail')),
+                            **{field: models.Sum(field) for field in IndustryTotals.TOTAL_FIELDS}))
+        entries = [IndustryTotals(game=game, source_id=new_rows['source_id'], **row) for row in totals]
+        try:
+            with transaction.atomic():
+                IndustryTotals.objects.filter(game=game, year__gte=new_rows['first_year']).delete()
+                IndustryTotals.objects.bulk_create(entries)
+        except IntegrityError:
+            pass  # a concurrent request re-totalled the same years
+        return new_rows['source_id']
+
+    @staticmethod
+    def total_row(game, year):
+        return IndustryTotals.objects.filter(game=game, year=year).values(*IndustryTotals.TOTAL_FIELDS).first()
+
+    @staticmethod
+    def failures(game):
+        """Capital test failures across the industry, by year."""
+        return dict(IndustryTotals.objects.filter(game=game).values_list('year', 'capital_test_failures'))
+
 
 class Valuation(models.Model):
     game = models.ForeignKey(IndivGames, on_delete=models.CASCADE)
@@ -101,6 +185,121 @@ class Valuation(models.Model):
     inv_rate = models.DecimalField(max_digits=18, decimal_places=6)
     irr_rate = models.DecimalField(max_digits=18, decimal_places=6)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['game', 'year', 'player_name'], name='val_game_year_player_idx'),
+        ]
+
+
+class ValuationLedger(models.Model):
+    """Each company's valuation as at each game year, built from the Valuation rows up to that year.
+
+    Rows are written once per year as the game server's Valuation rows land: sync() finds
+    Valuation ids beyond the highest source_id already folded in and rebuilds only the years
+    from the earliest one they touch.  The valuation report and its rank chart then read
+    a year, or the rank history, straight from here.
+    """
+    game = models.ForeignKey(IndivGames, on_delete=models.CASCADE, related_name='valuation_ledger')
+    player_name = models.CharField(max_length=128, null=True, blank=True)
+    year = models.IntegerField()
+    earliest_year = models.IntegerField()
+    first_valuation_id = models.IntegerField()  # keeps the report's company order: first seen first
+    source_id = models.IntegerField()  # highest Valuation id this row was built from
+    irr_rate = models.FloatField()
+    in_force = models.IntegerField()
+    beg_in_force = models.FloatField()
+    tot_in_force = models.FloatField()
+    profit = models.FloatField()
+    dividend_pv = models.FloatField()
+    excess_capital = models.FloatField()
+    capped_growth_rate = models.FloatField()
+    avg_profit = models.FloatField()
+    future_value = models.FloatField()
+    total_valuation = models.FloatField()
+    valuation_rank = models.IntegerField()
+
+    class Meta:
+        unique_together = ('game', 'year', 'player_name')
+
+    @staticmethod
+    def sync(game):
+        """Fold any new Valuation rows into the ledger.
+
+        Returns the highest Valuation id the ledger now reflects, which doubles as the
+        version of every report built from it.
+        """
+        synced_id = ValuationLedger.objects.filter(game=game).aggregate(synced_id=models.Max('source_id'))['synced_id'] or 0
+        if not Valuation.objects.filter(game=game, id__gt=synced_id).exists():
+            return synced_id
+
+        rows = list(Valuation.objects.filter(game=game).order_by('id').values(
+            'id', 'player_name', 'year', 'in_force', 'beg_in_force', 'profit', 'dividend_paid', 'excess_capital',
+            'pv_index', 'irr_rate'))
+        source_id = rows[-1]['id']
+        first_year = min(row['year'] for row in rows if row['id'] > synced_id)
+        years = sorted({row['year'] for row in rows if row['year'] >= first_year})
+        first_seen = {}
+        for row in rows:
+            first_seen.setdefault(row['player_name'], row['id'])
+
+        from .valuation import ValuationKernel  # numpy; most requests never rebuild valuations
+
+        entries = []
+        for year in years:
+            kernel = ValuationKernel(rows, year, rows[0]['irr_rate'])
+            for company, values in zip(kernel.companies, kernel.records()):
+                entries.append(ValuationLedger(game=game, player_name=company, year=year,
+                                               earliest_year=kernel.earliest_year,
+                                               first_valuation_id=first_seen[company], source_id=source_id,
+                                               irr_rate=float(rows[0]['irr_rate']), **values))
+        try:
+            with transaction.atomic():
+                ValuationLedger.objects.filter(game=game, year__gte=first_year).delete()
+                ValuationLedger.objects.bulk_create(entries)
+        except IntegrityError:
+            pass  # a concurrent request rebuilt the same years
+        return source_id
+
+    @staticmethod
+    def years(game):
+        return list(ValuationLedger.objects.filter(game=game).order_by('-year').values_list('year', flat=True).distinct())
+
+    @staticmethod
+    def sensitivity(game, year):
+        """The year's ValuationSurface payload over the standard grid, cached until the year is rebuilt."""
+        rows = list(ValuationLedger.objects.filter(game=game, year=year).order_by('first_valuation_id', 'player_name')
+                    .values('player_name', 'year', 'earliest_year', 'source_id', 'irr_rate', 'in_force', 'beg_in_force',
+                            'avg_profit', 'dividend_pv', 'excess_capital'))
+        if not rows:
+            return None
+        cache_key = 'valuation-sensitivity:{}:{}:{}'.format(game.game_id, year, max(row['source_id'] for row in rows))
+        payload = cache.get(cache_key)
+        if payload is None:
+            from .valuation import ValuationSurface, GROWTH_CAP, SENSITIVITY_GROWTH_CAPS, SENSITIVITY_RATE_OFFSETS
+            irr_rate = rows[0]['irr_rate']
+            rates = [round(irr_rate + offset, 6) for offset in SENSITIVITY_RATE_OFFSETS]
+            payload = dict(ValuationSurface(rows, rates, SENSITIVITY_GROWTH_CAPS).payload(),
+                           year=year, base_rate=irr_rate, base_growth_cap=GROWTH_CAP)
+            cache.set(cache_key, payload, VALUATION_SENSITIVITY_CACHE_TIMEOUT)
+        return payload
+
+    @staticmethod
+    def rank_history(game, last_year):
+        """Years up to last_year and each company's valuation rank in them (None before it appears)."""
+        entries = ValuationLedger.objects.filter(game=game, year__lte=last_year).order_by('year', 'first_valuation_id') \
+            .values_list('year', 'player_name', 'valuation_rank')
+        years = []
+        ranks = {}
+        for year, player_name, rank in entries:
+            if not years or years[-1] != year:
+                years.append(year)
+            history = ranks.setdefault(player_name, [])
+            history.extend([None] * (len(years) - 1 - len(history)))
+            history.append(rank)
+        for history in ranks.values():
+            history.extend([None] * (len(years) - len(history)))
+        return {'years': years, 'ranks': ranks}
+
 
 class Triangles(models.Model):
     game = models.ForeignKey(IndivGames, on_delete=models.CASCADE)
@@ -109,12 +308,22 @@ class Triangles(models.Model):
     year = models.IntegerField()
     triangles = models.JSONField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['game', 'player_id', 'year'], name='tri_game_player_year_idx'),
+        ]
+
 
 class ClaimTrends(models.Model):
     game = models.ForeignKey(IndivGames, on_delete=models.CASCADE)
     year = models.IntegerField()
     claim_trends = models.JSONField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['game', 'year'], name='clmtrend_game_year_idx'),
+        ]
+
 
 class Indications(models.Model):
     game = models.ForeignKey(IndivGames, on_delete=models.CASCADE)
@@ -123,6 +332,11 @@ class Indications(models.Model):
     year = models.IntegerField()
     indication_data = models.JSONField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['game', 'player_id', 'year'], name='indic_game_player_year_idx'),
+        ]
+
 
 class Decisions(models.Model):
     game = models.ForeignKey(IndivGames, on_delete=models.CASCADE)
@@ -150,6 +364,11 @@ class Decisions(models.Model):
     decisions_time_stamp = models.JSONField()
     curr_avg_prem = models.DecimalField(max_digits=18, decimal_places=2)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['game', 'player_id', 'year'], name='dec_game_player_year_idx'),
+        ]
+
 
 class Decisionsns(models.Model):
     game = models.ForeignKey(IndivGames, on_delete=models.CASCADE)
@@ -161,48 +380,190 @@ class Decisionsns(models.Model):
     sel_exp_ratio_mktg = models.IntegerField()
     sel_avg_prem = models.DecimalField(max_digits=18, decimal_places=2)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['game', 'player_id', 'year'], name='decns_game_player_year_idx'),
+        ]
+
+
+# Game server notices are coloured on the dashboard by these phrases, checked in this order
+EVENT_KIND_MARKERS = [
+    ('reform', ['Government officials', 'Injury reform', 'product reform', 'after observing']),
+    ('regulatory', ['Regulatory']),
+    ('osfi', ['OSFI']),
+]
+
+
+def classify_message(content, from_server):
+    """Event kind of a message: 'review', 'reform', 'regulatory', 'osfi' or 'chat'."""
+    if not from_server:
+        return 'chat'
+    if content == 'Review decisions.':
+        return 'review'
+    for kind, markers in EVENT_KIND_MARKERS:
+        if any(marker in content for marker in markers):
+            return kind
+    return 'chat'
+
 
 class ChatMessage(models.Model):
+    KIND_CHOICES = [
+        ('review', 'Review decisions'),
+        ('regulatory', 'Regulatory'),
+        ('osfi', 'OSFI'),
+        ('reform', 'Reform'),
+        ('chat', 'Chat'),
+    ]
+
     sequence_number = models.AutoField(primary_key=True)
     timestamp = models.DateTimeField(auto_now_add=True)
     from_user = models.ForeignKey(User, null=True, blank=True, related_name='from_user', on_delete=models.SET_NULL)
     game_id = models.ForeignKey(IndivGames, db_column='game_id', related_name='chat_messages', on_delete=models.CASCADE)
     content = models.TextField()
+    # set by save(); rows the game server inserts directly stay null until classify_pending() claims them
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES, null=True, blank=True)
 
     class Meta:
         ordering = ['-sequence_number']  # Negative sign to order by descending
+        indexes = [
+            # cursor reads: newest rows for a game after a given sequence_number
+            models.Index(fields=['game_id', 'sequence_number'], name='chatmsg_game_seq_idx'),
+            # per-kind reads and the lookup of rows still to classify
+            models.Index(fields=['game_id', 'kind', 'sequence_number'], name='chatmsg_game_kind_seq_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        created = self._state.adding
+        if not self.kind:
+            self.kind = classify_message(self.content, self.from_user_id is None)
+        super().save(*args, **kwargs)
+        if created:
+            GameEventCounter.record(self.game_id_id, self.kind, self.sequence_number)
+            from .events import push_message
+            transaction.on_commit(lambda: push_message(self))
 
-
-class Lock(models.Model):
-    lock_id = models.CharField(max_length=255)
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    created_at = models.DateTimeField(auto_now_add=True)
+    @staticmethod
+    def classify_pending(game_id):
+        """Type and count the rows written without a kind; returns the messages this call claimed, oldest first.
+
+        Each row is claimed with a conditional UPDATE, so however many processes look at
+        once, exactly one of them counts (and pushes) it.  Finding nothing costs one read.
+        """
+        claimed = []
+        pending = ChatMessage.objects.filter(game_id=game_id, kind__isnull=True).select_related('from_user')
+        for msg in pending.order_by('sequence_number'):
+            msg.kind = classify_message(msg.content, msg.from_user_id is None)
+            unclaimed = ChatMessage.objects.filter(sequence_number=msg.sequence_number, kind__isnull=True)
+            with transaction.atomic():
+                if unclaimed.update(kind=msg.kind):
+                    GameEventCounter.record(msg.game_id_id, msg.kind, msg.sequence_number)
+                    claimed.append(msg)
+        return claimed
+
+
+# Sent with game_id and kind each time GameEventCounter counts a message, whether saved or claimed by classify_pending
+game_event_recorded = Signal()
+
+
+class GameEventCounter(models.Model):
+    """Running count and latest sequence_number of each ChatMessage kind in a game."""
+    game = models.ForeignKey(IndivGames, on_delete=models.CASCADE, related_name='event_counters')
+    kind = models.CharField(max_length=16, choices=ChatMessage.KIND_CHOICES)
+    count = models.IntegerField(default=0)
+    latest_sequence = models.IntegerField(default=0)
 
     class Meta:
-        unique_together = ('lock_id', 'user')
+        unique_together = ('game', 'kind')
+
+    @staticmethod
+    def record(game_id, kind, sequence_number):
+        counter, _ = GameEventCounter.objects.get_or_create(game_id=game_id, kind=kind)
+        GameEventCounter.objects.filter(pk=counter.pk).update(
+            count=models.F('count') + 1, latest_sequence=Greatest('latest_sequence', models.Value(sequence_number)))
+        game_event_recorded.send(sender=GameEventCounter, game_id=game_id, kind=kind)
 
     @staticmethod
-    def acquire_lock(lock_id, user, lock_timeout=60):
-        # Construct a unique lock identifier based on game_id and user
-        unique_lock_id = f"{lock_id}_user_{user.pk}"
+    def counts(game_id):
+        return dict(GameEventCounter.objects.filter(game_id=game_id).values_list('kind', 'count'))
+
+
+class LobbyVersion(models.Model):
+    """Per-user version of the game list, so an unchanged lobby poll is a single row read.
 
-        # Check for existing lock
-        current_time = timezone.now()
-        expiry_time = current_time - timezone.timedelta(seconds=lock_timeout)
+    Games created or joined through the site bump it directly.  Status changes made by the
+    game server are caught by re-checking a signature of the user's games at most every
+    RESYNC_SECONDS.
+    """
+    RESYNC_SECONDS = 30
 
-        existing_lock = Lock.objects.filter(lock_id=unique_lock_id, created_at__gt=expiry_time).first()
-        if existing_lock is not None:
-            # Lock exists and has not expired
-            return False
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='lobby_version')
+    version = models.IntegerField(default=1)
+    signature = models.CharField(max_length=64, blank=True, default='')
+    changed_at = models.DateTimeField(default=timezone.now)
+    checked_at = models.DateTimeField(default=timezone.now)
 
-        # Clean up expired locks
-        Lock.objects.filter(lock_id=unique_lock_id, created_at__lte=expiry_time).delete()
+    @staticmethod
+    def bump_for_game(game):
+        """Bump the lobby of the initiator and every human player of game."""
+        user_ids = set(Players.objects.filter(game=game, player_id__isnull=False).values_list('player_id', flat=True))
+        user_ids.add(game.initiator_id)
+        LobbyVersion.bump_users(user_ids)
+
+    @staticmethod
+    def bump_users(user_ids):
+        LobbyVersion.objects.filter(user_id__in=user_ids).update(
+            version=models.F('version') + 1, changed_at=timezone.now(), signature='')
+
+    @staticmethod
+    def signature_for(user):
+        games = IndivGames.objects.filter(
+            models.Q(initiator=user) | models.Q(game_id__in=Players.objects.filter(player_id=user).values('game'))
+        ).annotate(player_cnt=models.Count('players')).order_by('game_id').values_list('game_id', 'status', 'player_cnt')
+        return hashlib.sha256(repr(list(games)).encode()).hexdigest()
 
-        # Acquire new lock
-        Lock.objects.create(lock_id=unique_lock_id, user=user)
-        return True
+    @staticmethod
+    def current(user):
+        """The user's lobby version, re-checked against the games themselves when due."""
+        lobby, created = LobbyVersion.objects.get_or_create(user=user)
+        now = timezone.now()
+        if created or not lobby.signature or (now - lobby.checked_at).total_seconds() >= LobbyVersion.RESYNC_SECONDS:
+            signature = LobbyVersion.signature_for(user)
+            updates = {'signature': signature, 'checked_at': now}
+            if lobby.signature and signature != lobby.signature:
+                updates.update(version=models.F('version') + 1, changed_at=now)
+            LobbyVersion.objects.filter(pk=lobby.pk).update(**updates)
+            lobby.refresh_from_db()
+        return lobby
+
+    def suggested_poll_seconds(self):
+        """5s while the lobby is changing, backing off to 60s once it has been idle a while."""
+        idle = (timezone.now() - self.changed_at).total_seconds()
+        if idle < 60:
+            return 5
+        if idle < 600:
+            return 15
+        return 60
+
+
+class Lock(models.Model):
+    """A claim on lock_id by one holder (a session of user) until expires_at; see Pricing.locks."""
+    lock_id = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    holder = models.CharField(max_length=64, blank=True, default='')
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    @staticmethod
+    def user_lock_id(lock_id, user):
+        return f"{lock_id}_user_{user.pk}"
+
+    @staticmethod
+    def acquire_lock(lock_id, user, lock_timeout=60, holder=''):
+        """Claim lock_id for user; False while another holder has an unexpired claim on it."""
+        from .locks import lock_service
+        return lock_service.acquire(Lock.user_lock_id(lock_id, user), user, holder, ttl=lock_timeout)
 
     @staticmethod
-    def release_lock(lock_id, user):
-        unique_lock_id = f"{lock_id}_user_{user.pk}"
-        Lock.objects.filter(lock_id=unique_lock_id).delete()
+    def release_lock(lock_id, user, holder):
+        from .locks import lock_service
+        return lock_service.release(Lock.user_lock_id(lock_id, user), holder)
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import consumers
+
+websocket_urlpatterns = [
+    path('ws/games/<str:game_id>/events/', consumers.GameEventsConsumer.as_asgi()),
+    ]
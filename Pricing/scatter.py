@@ -0,0 +1,69 @@
+import logging
+import random
+from .models import ClaimTrends
+
+logger = logging.getLogger(__name__)
+
+# Share of mktgsales requests whose scatter points are written to the debug log
+SCATTER_LOG_SAMPLE_RATE = 0.02
+
+
+def log_sampled(msg, *args):
+    """logger.debug() for about SCATTER_LOG_SAMPLE_RATE of calls, and only when debug logging is on."""
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < SCATTER_LOG_SAMPLE_RATE:
+        logger.debug(msg, *args)
+
+
+def reform_type(claim_trends, year):
+    try:
+        bi_reform = claim_trends.get('bi_reform', {}).get(str(year), 0)
+        cl_reform = claim_trends.get('cl_reform', {}).get(str(year), 0)
+    except AttributeError:
+        return None
+    if bi_reform and cl_reform:
+        return 'Both'
+    if bi_reform:
+        return 'BI'
+    if cl_reform:
+        return 'CL'
+    return None
+
+
+class MarketingScatter:
+    """The marketing/sales report's scatter points: one per chart year of the player's ratios.
+
+    Each point pairs the year's retention and close ratios with the rate change the player
+    made coming into it, industry MCT failures and product reforms of the prior year, and
+    whether the player's own company failed its capital test that year.  The metrics are
+    the player's PlayerKPIs, the reforms one ClaimTrends query.
+    """
+
+    def __init__(self, kpis, chart_years, reforms):
+        self.years = sorted(set(chart_years))
+        prior_years = [year - 1 for year in self.years]
+        self.retention_ratio = kpis.at('ending_retention_ratio', self.years)
+        self.close_ratio = kpis.at('close_ratio', self.years)
+        # OSFI interventions and host failures are felt in the following year; interventions are only
+        # counted for years on the chart
+        self.osfi_interventions = [count if year in self.years else 0
+                                   for year, count in zip(prior_years, kpis.at('osfi_interventions', prior_years))]
+        self.host_failure = kpis.at('mct_failed', prior_years)
+        self.yoy_rate_change = kpis.at('rate_change', prior_years)
+        self.product_reforms = [reforms.get(year) for year in prior_years]
+
+    @classmethod
+    def for_player(cls, game, kpis, chart_years):
+        reforms = {year: reform_type(claim_trends, year) for year, claim_trends in
+                   ClaimTrends.objects.filter(game_id=game).values_list('year', 'claim_trends')}
+        return cls(kpis, chart_years, reforms)
+
+    def points(self):
+        return [{
+            'year': int(year),
+            'yoy_rate_change': round(self.yoy_rate_change[i], 1),
+            'retention_ratio': round(self.retention_ratio[i], 2),
+            'close_ratio': round(self.close_ratio[i], 2),
+            'osfi_interventions': int(self.osfi_interventions[i]),
+            'product_reforms': self.product_reforms[i],
+            'host_failure': self.host_failure[i],
+        } for i, year in enumerate(self.years)]
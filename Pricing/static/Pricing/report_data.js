@@ -0,0 +1,76 @@
+// Client side of the report data API: fetches one game year of a game-wide report as JSON and
+// draws its table a page of company columns at a time.
+(function (window) {
+    const pending = {};
+
+    // Each URL carries the report's data version, so the browser cache answers repeat fetches;
+    // this only saves the round trip within the page.
+    function load(url) {
+        if (!pending[url]) {
+            pending[url] = fetch(url, { credentials: 'same-origin', headers: { 'Accept': 'application/json' } })
+                .then(function (response) {
+                    if (!response.ok) {
+                        throw new Error('Report data request failed: ' + response.status);
+                    }
+                    return response.json();
+                })
+                .catch(function (err) {
+                    delete pending[url];
+                    throw err;
+                });
+        }
+        return pending[url];
+    }
+
+    // The viewer first, then the other companies in report order
+    function companyOrder(companies, viewer) {
+        return [viewer].concat(companies.filter(function (company) { return company !== viewer; }));
+    }
+
+    // Highest page offset: the viewer's column stays put while the other three scroll
+    function maxOffset(companies, viewer, perPage) {
+        return Math.max(companyOrder(companies, viewer).length - perPage, 0);
+    }
+
+    function pageColumns(companies, viewer, offset, perPage) {
+        const order = companyOrder(companies, viewer);
+        return [viewer].concat(order.slice(offset + 1, offset + perPage));
+    }
+
+    function cell(tag, text) {
+        const element = document.createElement(tag);
+        if (text === '') {
+            element.innerHTML = '&nbsp;';
+        } else {
+            element.textContent = text;
+        }
+        element.style.fontFamily = "'Roboto Mono', monospace";
+        return element;
+    }
+
+    // Render the table's columns (all of them if none are present) into container
+    function renderTable(container, table, columns) {
+        let idx = columns.map(function (column) { return table.columns.indexOf(column); })
+                         .filter(function (i) { return i >= 0; });
+        if (!idx.length) {
+            idx = table.columns.map(function (_, i) { return i; });
+        }
+
+        const element = document.createElement('table');
+        element.className = 'dataframe my-financial-table';
+        const head = element.createTHead().insertRow();
+        head.style.textAlign = 'initial';
+        head.appendChild(cell('th', table.corner));
+        idx.forEach(function (i) { head.appendChild(cell('th', table.columns[i])); });
+
+        const body = element.createTBody();
+        table.rows.forEach(function (row) {
+            const tr = body.insertRow();
+            tr.appendChild(cell('th', row ? row.label : ''));
+            idx.forEach(function (i) { tr.appendChild(cell('td', row ? String(row.cells[i]).trim() : '')); });
+        });
+        container.replaceChildren(element);
+    }
+
+    window.ReportData = { load: load, maxOffset: maxOffset, pageColumns: pageColumns, renderTable: renderTable };
+})(window);
@@ -0,0 +1,218 @@
+from html import escape as escape_html
+
+# A blank row between groups of a TableSpec
+SPACER = None
+
+
+class Row:
+    """One row of a TableSpec: the data key it reads, its label and the formatter applied to each cell.
+
+    Labels may name {force_term} (or any other keyword passed to TableSpec.format).
+    """
+
+    def __init__(self, key, label, fmt=str):
+        self.key = key
+        self.label = label
+        self.fmt = fmt
+
+
+class TableSpec:
+    """The rows of a report table, top to bottom, with SPACER where a blank row separates groups."""
+
+    def __init__(self, rows, corner=''):
+        self.rows = rows
+        self.corner = corner
+
+    def format(self, columns, data, **labels):
+        """Format data, which maps each row key to the row's values in column order, into a ReportTable."""
+        rows = []
+        for row in self.rows:
+            if row is SPACER:
+                rows.append(None)
+            else:
+                rows.append((row.label.format(**labels), [row.fmt(value) for value in data[row.key]]))
+        return ReportTable(columns, rows, self.corner)
+
+
+class ReportTable:
+    """Formatted report cells: a label and a list of cell strings per row, None for a blank row.
+
+    html() writes the same markup DataFrame.to_html(classes='my-financial-table', border=0,
+    justify='initial') always produced for these tables, so the templates' styling applies unchanged.
+    """
+
+    def __init__(self, columns, rows, corner=''):
+        self.columns = [str(column) for column in columns]
+        self.rows = rows
+        self.corner = corner
+
+    def select(self, columns):
+        """The table restricted to columns, in that order; all columns when none of them are present."""
+        idx = [self.columns.index(column) for column in columns if column in self.columns]
+        if not idx:
+            return self
+        return ReportTable([self.columns[i] for i in idx],
+                           [row if row is None else (row[0], [row[1][i] for i in idx]) for row in self.rows],
+                           self.corner)
+
+    def with_blank_columns(self, columns, before=False):
+        """The table with empty columns added after (or before) its own."""
+        blanks = [''] * len(columns)
+        if before:
+            return ReportTable([str(column) for column in columns] + self.columns,
+                               [row if row is None else (row[0], blanks + row[1]) for row in self.rows], self.corner)
+        return ReportTable(self.columns + [str(column) for column in columns],
+                           [row if row is None else (row[0], row[1] + blanks) for row in self.rows], self.corner)
+
+    def as_dict(self):
+        """The cells as JSON-ready data; blank rows are None."""
+        return {'corner': self.corner, 'columns': self.columns,
+                'rows': [row if row is None else {'label': row[0], 'cells': row[1]} for row in self.rows]}
+
+    def html(self, escape=True):
+        def text(value):
+            value = str(value).strip()
+            return escape_html(value, quote=False) if escape else value
+
+        lines = ['<table class="dataframe my-financial-table">', '  <thead>', '    <tr style="text-align: initial;">',
+                 f'      <th>{text(self.corner)}</th>']
+        lines += [f'      <th>{text(column)}</th>' for column in self.columns]
+        lines += ['    </tr>', '  </thead>', '  <tbody>']
+        for row in self.rows:
+            label, cells = row if row is not None else ('', [''] * len(self.columns))
+            lines += ['    <tr>', f'      <th>{text(label)}</th>']
+            lines += [f'      <td>{text(cell)}</td>' for cell in cells]
+            lines.append('    </tr>')
+        lines += ['  </tbody>', '</table>']
+        return '\n'.join(lines)
+
+
+def blank_zero(fmt):
+    """fmt, except that zero cells are left blank."""
+    return lambda x: '' if x == 0 else fmt(x)
+
+
+def dollars(x):
+    return f"${round(x):,}"
+
+
+def whole_dollars(x):
+    return f"${int(x):,}"
+
+
+def count(x):
+    return f"{int(x):,}"
+
+
+def ratio_percent(x):
+    return f"{round(x * 100, 1)}%"
+
+
+def percent(places):
+    return lambda x: f"{x:.{places}f}%"
+
+
+def millions(x):
+    return f"${.1 * round(x / 100000):,.1f}"
+
+
+MKTGSALES_TABLE = TableSpec([
+    Row('beg_in_force', 'Beginning-{force_term}', count),
+    SPACER,
+    Row('mktg_expense', 'Marketing Expense', whole_dollars),
+    Row('mktg_expense_ind', 'Industry Marketing Expense', whole_dollars),
+    Row('mktg_share', 'Marketing Spend as % of Industry', percent(2)),
+    SPACER,
+    Row('avg_prem', 'Average Premium', lambda x: f"${x:,.2f}"),
+    SPACER,
+    Row('quotes', 'Quotes', count),
+    Row('sales', 'Sales', count),
+    Row('close_ratio', 'Close Ratio', percent(1)),
+    SPACER,
+    Row('canx', 'Cancellations', count),
+    Row('retention_ratio', 'Retention Ratio', percent(1)),
+    SPACER,
+    Row('end_in_force', 'Ending-{force_term}', count),
+    Row('in_force_ind', 'Industry-{force_term}', count),
+    Row('market_share', 'Market Share', percent(1)),
+])
+
+FINANCIALS_TABLE = TableSpec([
+    Row('written_premium', 'Written Premium', dollars),
+    Row('inv_income', 'Investment Income', dollars),
+    SPACER,
+    Row('in_force', '{force_term}', count),
+    SPACER,
+    Row('annual_expenses', 'Expenses', dollars),
+    Row('ay_losses', 'Acc Yr Claims Incurred', dollars),
+    Row('py_devl', 'Prior Yr Development', dollars),
+    SPACER,
+    Row('profit', 'Profit', dollars),
+    Row('dividend_paid', 'Dividend Paid', dollars),
+    SPACER,
+    Row('capital', 'Ending Capital', dollars),
+    SPACER,
+    Row('capital_ratio', 'MCT Ratio', ratio_percent),
+    Row('capital_test', 'MCT Test'),
+], corner='Year')
+
+# The Total Industry column has no MCT ratio or test; those cells arrive already blank
+INDUSTRY_TABLE = TableSpec([
+    Row('written_premium', 'Written Premium', dollars),
+    SPACER,
+    Row('annual_expenses', 'Annual Expenses', dollars),
+    Row('expense_ratio', 'Expense Ratio', percent(1)),
+    SPACER,
+    Row('cy_losses', 'Calendar Year Losses', dollars),
+    Row('loss_ratio', 'Loss Ratio', percent(1)),
+    SPACER,
+    Row('profit', 'Profit', dollars),
+    Row('capital', 'Capital', dollars),
+    Row('capital_ratio', 'MCT Ratio', lambda x: x if x == '' else ratio_percent(x)),
+    SPACER,
+    Row('capital_test', 'MCT Test'),
+])
+
+VALUATION_TABLE = TableSpec([
+    Row('in_force', '{force_term}', lambda x: f"{x:,}"),
+    Row('capped_growth_rate', 'Capped Growth Rate', lambda x: f"{100 * x:.1f}%"),
+    Row('avg_profit', 'Avg Profit / Client', dollars),
+    SPACER,
+    Row('future_value', 'Future Proj Value (MM)', millions),
+    Row('dividend_pv', 'P.V. Dividends (MM)', millions),
+    Row('excess_capital', 'Excess Capital (MM)', millions),
+    SPACER,
+    Row('total_valuation', 'Total Valuation (MM)', millions),
+    SPACER,
+    Row('valuation_rank', 'Valuation Rank'),
+])
+
+CLAIM_TREND_TABLE = TableSpec([
+    Row('actual_paid', 'Actual Paid', blank_zero('${:,.0f}'.format)),
+    Row('devl_factor', 'Devl Factor', blank_zero('{:,.3f}'.format)),
+    Row('ultimate', 'Ultimate Incurred', blank_zero('${:,.0f}'.format)),
+    SPACER,
+    Row('in_force', '{force_term}', blank_zero('{:,.0f}'.format)),
+    SPACER,
+    Row('loss_cost', 'Loss Cost', blank_zero('${:,.2f}'.format)),
+    SPACER,
+    Row('claim_count', 'Claim Count', blank_zero('{:,.0f}'.format)),
+    SPACER,
+    Row('frequency', 'Frequency', blank_zero('{:,.1f}%'.format)),
+    Row('severity', 'Severity', blank_zero('${:,.2f}'.format)),
+    Row('product_reform', 'Product Reform'),
+])
+
+CLAIM_TREND_ESTIMATE_TABLE = TableSpec([
+    Row('proj_lcost', 'Est Loss Cost', blank_zero('${:,.2f}'.format)),
+    Row('lcost_trend', 'Est LC Trend', blank_zero(lambda x: '{:,.1f}%'.format(100 * x))),
+    Row('lcost_reform', 'Est LC Reform', blank_zero(lambda x: x if x == 'N/A' else '{:,.1f}%'.format(100 * x))),
+    SPACER,
+    Row('proj_freq', 'Est Frequency', blank_zero('{:,.1f}%'.format)),
+    Row('freq_trend', 'Est Freq Trend', blank_zero(lambda x: '{:,.1f}%'.format(100 * x))),
+    Row('freq_reform', 'Est Freq Reform', blank_zero(lambda x: x if x == 'N/A' else '{:,.1f}%'.format(100 * x))),
+    SPACER,
+    Row('proj_sev', 'Est Severity', blank_zero('${:,.2f}'.format)),
+    Row('sev_trend', 'Est Sev Trend', blank_zero(lambda x: '{:,.1f}%'.format(100 * x))),
+    Row('sev_reform', 'Est Sev Reform', blank_zero(lambda x: x if x == 'N/A' else '{:,.1f}%'.format(100 * x))),
+])
@@ -1,3 +1,371 @@
-from django.test import TestCase
+import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import numpy as np
+import pandas as pd
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+from PricingProject import secrets
+from . import reports
+from .cache import cached_versioned, revalidator
+from .claim_trends import ClaimTrendAnalysis, IncompleteFinancials
+from .events import game_group_name, push_pending
+from .industry import IndustryCube
+from .locks import LockService
+from .management.commands import bench_tables, bench_valuation
+from .management.commands.bench_triangles import make_rows, pandas_chain_ladder
+from .models import ChatMessage, IndivGames, Lock
+from .reports import build_industry_report
+from .tables import ReportTable
+from .trends import LogLinearFit, reform_dummy
+from .triangles import ChainLadder
+from .utils import perform_logistic_regression
+from .valuation import GROWTH_CAP, SENSITIVITY_GROWTH_CAPS, ValuationKernel, ValuationSurface
+from .warmup import report_warmer
 
-# Create your tests here.
+
+def claim_data(acc_yrs, n_devl=3):
+    """Paid triangles for every coverage: development-year rows over accident years, oldest first."""
+    n_acc = len(acc_yrs)
+    base = [200000 + 10000 * i for i in range(n_acc)]
+    rows = [[int(b * (1 + 0.4 * d)) if i < n_acc - d else 0 for i, b in enumerate(base)] for d in range(n_devl)]
+    return dict({'acc_yrs': acc_yrs}, **{key: rows for key in ('paid_bi', 'paid_cl', 'paid_to')})
+
+
+class ChainLadderTests(SimpleTestCase):
+    def test_develops_a_small_triangle_to_ultimate(self):
+        ladder = ChainLadder([[100, 200, 300], [150, 260, 0], [180, 0, 0]])
+        np.testing.assert_allclose(ladder.age_to_age, [410 / 300, 1.2])
+        np.testing.assert_allclose(ladder.ultimates, [180, 312, 492])
+        np.testing.assert_allclose(ladder.projected[2], [300, 410, 492])
+
+    def test_matches_the_pandas_triangle_path(self):
+        for n_acc, n_devl in ((3, 3), (5, 3), (20, 20)):
+            with self.subTest(n_acc=n_acc, n_devl=n_devl):
+                rows = make_rows(n_acc, n_devl)
+                fact_df, projected_df = pandas_chain_ladder(
+                    rows, [f'Acc Yr {2000 + i}' for i in range(n_acc)], [(yr + 1) * 12 for yr in range(n_devl)])
+                ladder = ChainLadder(rows)
+                np.testing.assert_allclose(ladder.age_to_age, fact_df.iloc[1:, 0].astype(float).values)
+                np.testing.assert_allclose(ladder.projected, projected_df.values.astype(float))
+
+
+class LogLinearFitTests(SimpleTestCase):
+    def setUp(self):
+        self.years = np.arange(2010, 2000, -1)
+        self.reform = np.array([[0] * 10, [1] * 4 + [0] * 6, [1] * 7 + [0] * 3])
+
+    def test_reform_dummy_covers_the_years_since_the_latest_reform(self):
+        self.assertEqual(list(reform_dummy([0, 0, 1, 0, 1])), [1, 1, 1, 0, 0])
+        self.assertIsNone(reform_dummy([0, 0, 0]))
+        self.assertIsNone(reform_dummy([1, 1, 1]))
+
+    def test_recovers_an_exact_trend_and_reform_effect(self):
+        values = np.exp(4 + 0.05 * (self.years - 2000) + 0.2 * self.reform[1])
+        fit = LogLinearFit(self.years, [values], self.reform[1])
+        np.testing.assert_allclose(fit.trend_coef, [0.05])
+        np.testing.assert_allclose(fit.reform_coef, [0.2])
+        np.testing.assert_allclose(fit.fitted(), [values])
+        np.testing.assert_allclose(fit.r_squared, [1.0])
+
+    def test_matches_least_squares_series_by_series(self):
+        rng = np.random.default_rng(0)
+        values = np.exp(5 + 0.03 * (self.years - 2000) + 0.1 * self.reform + rng.normal(0, 0.05, self.reform.shape))
+        fit = LogLinearFit(self.years, values, self.reform)
+        for k in range(len(values)):
+            with self.subTest(series=k):
+                columns = [np.ones(len(self.years)), self.years] + ([self.reform[k]] if self.reform[k].any() else [])
+                X = np.column_stack(columns)
+                coef, ssr, _, _ = np.linalg.lstsq(X, np.log(values[k]), rcond=None)
+                std_err = np.sqrt(ssr[0] / (len(self.years) - X.shape[1]) * np.diag(np.linalg.inv(X.T @ X)))
+                np.testing.assert_allclose([fit.intercept[k], fit.trend_coef[k]], coef[:2], rtol=1e-8)
+                np.testing.assert_allclose([fit.intercept_std_err[k], fit.trend_std_err[k]], std_err[:2], rtol=1e-6)
+                if self.reform[k].any():
+                    np.testing.assert_allclose(fit.reform_coef[k], coef[2], rtol=1e-8)
+                    np.testing.assert_allclose(fit.reform_std_err[k], std_err[2], rtol=1e-6)
+                else:
+                    self.assertEqual(fit.reform_coef[k], 0)
+
+    def test_report_estimates_project_the_next_year(self):
+        data = [(year, 100 * 1.05 ** (year - 2001)) for year in range(2005, 2000, -1)]
+        reform, est, preds = perform_logistic_regression(data, [0] * 5)
+        self.assertFalse(reform)
+        np.testing.assert_allclose(est, [0.05])
+        np.testing.assert_allclose(preds, [100 * 1.05 ** i for i in range(6)])
+
+
+class ClaimTrendAnalysisTests(SimpleTestCase):
+    def setUp(self):
+        self.acc_yrs = list(range(2000, 2008))
+        self.financials = {year: {'year': year, 'in_force': 10000 + year, 'clm_bi': 50, 'clm_cl': 400}
+                           for year in range(1999, 2010)}
+        self.claim_trends = {'bi_reform': {str(year): False for year in self.acc_yrs},
+                             'cl_reform': {str(year): year == 2004 for year in self.acc_yrs}}
+
+    def test_matches_financials_by_year_over_any_number_of_accident_years(self):
+        analysis = ClaimTrendAnalysis(2007, claim_data(self.acc_yrs), self.financials, self.claim_trends)
+        for trend in analysis.coverages.values():
+            self.assertEqual(trend['in_force'], [10000 + year for year in range(2007, 1999, -1)])
+
+    def test_missing_financial_year_raises(self):
+        del self.financials[2001]
+        with self.assertRaises(IncompleteFinancials):
+            ClaimTrendAnalysis(2007, claim_data(self.acc_yrs), self.financials, self.claim_trends)
+
+
+class CachedVersionedTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.builds = []
+
+    def build(self, value):
+        return lambda: self.builds.append(value) or value
+
+    def test_new_data_is_served_stale_while_it_is_rebuilt(self):
+        cached_versioned('report', 'v1', self.build('old'), published=2005)
+        with mock.patch.object(revalidator, 'submit') as submit:
+            self.assertEqual(cached_versioned('report', 'v2', self.build('new'), published=2005), 'old')
+        submit.assert_called_once()
+
+    def test_a_newly_published_year_is_built_in_the_request(self):
+        cached_versioned('report', 'v1', self.build('2005'), published=2005)
+        with mock.patch.object(revalidator, 'submit') as submit:
+            self.assertEqual(cached_versioned('report', 'v2', self.build('2006'), published=2006), '2006')
+        submit.assert_not_called()
+        self.assertEqual(self.builds, ['2005', '2006'])
+
+    def test_player_reports_only_cache_the_players_own_years(self):
+        build = mock.Mock(return_value={})
+        game, player = mock.Mock(game_id='g1'), mock.Mock(id=7)
+        with mock.patch.object(reports, 'player_data_version', return_value=(2001, 2005, (2005, 2005), 'v')):
+            for year in (None, 1900, 2003, 99999):
+                reports.cached_player_report('report', game, player, year, 'In-Force', build)
+        self.assertEqual([call.args[2] for call in build.call_args_list], [2005, 2003])
+        self.assertIsNone(cache.get('report:g1:7:1900:In-Force'))
+
+
+class SecretsTests(SimpleTestCase):
+    def test_lazy_secrets_load_once_on_first_use(self):
+        lazy_secrets = secrets.LazySecrets('env')
+        with mock.patch.object(secrets, 'load_secrets', return_value={'DJANGO_SECRET_KEY': 'abc'}) as load:
+            secret_key, db_name = lazy_secrets.lazy('DJANGO_SECRET_KEY'), lazy_secrets.lazy('POSTGRES_DB')
+            load.assert_not_called()
+            self.assertEqual(str(secret_key), 'abc')
+            self.assertEqual(str(db_name), '')
+        load.assert_called_once_with('env')
+
+    def test_aws_binary_secret_is_decoded(self):
+        client = mock.Mock()
+        client.get_secret_value.return_value = {'SecretBinary': base64.b64encode(b"{'DJANGO_SECRET_KEY': 'abc'}")}
+        with mock.patch('boto3.session.Session') as session:
+            session.return_value.client.return_value = client
+            self.assertEqual(secrets.AwsSecrets().load(), {'DJANGO_SECRET_KEY': 'abc'})
+
+    def test_aws_secret_without_a_value_is_unavailable(self):
+        client = mock.Mock()
+        client.get_secret_value.return_value = {}
+        with mock.patch('boto3.session.Session') as session:
+            session.return_value.client.return_value = client
+            with self.assertRaises(secrets.SecretsUnavailable):
+                secrets.AwsSecrets().load()
+
+
+class IndustryReportTests(SimpleTestCase):
+    def test_year_without_industry_rows_is_an_empty_report(self):
+        report = build_industry_report(IndustryCube([]), 2005, None)
+        self.assertEqual(report.companies, [])
+        self.assertIsNone(report.chart)
+        self.assertEqual(report.table.columns, [])
+        self.assertTrue(all(row is None or row[1] == [] for row in report.table.rows))
+
+
+class LockServiceTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice')
+        self.service = LockService()
+
+    def test_racing_claimants_leave_exactly_one_holder(self):
+        holders = [f'session-{i}' for i in range(8)]
+        start = threading.Barrier(len(holders))
+
+        def claim(holder):
+            start.wait()
+            try:
+                return holder, self.service.acquire('race', self.user, holder)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=len(holders)) as executor:
+            results = dict(executor.map(claim, holders))
+        winners = [holder for holder, acquired in results.items() if acquired]
+        self.assertEqual(len(winners), 1)
+        self.assertEqual(list(Lock.objects.filter(lock_id='race').values_list('holder', flat=True)), winners)
+
+    def test_only_the_holder_releases_its_claim(self):
+        self.assertTrue(self.service.acquire('decision', self.user, 'session-a'))
+        self.assertFalse(self.service.release('decision', None))
+        self.assertFalse(self.service.release('decision', ''))
+        self.assertFalse(self.service.release('decision', 'session-b'))
+        self.assertFalse(self.service.acquire('decision', self.user, 'session-b'))
+        self.assertTrue(self.service.release('decision', 'session-a'))
+        self.assertTrue(self.service.acquire('decision', self.user, 'session-b'))
+
+
+class ValuationKernelTests(SimpleTestCase):
+    def test_matches_the_pandas_valuation_path(self):
+        for n_years, selected_year in ((10, 2009), (20, 2019), (20, 2012)):
+            with self.subTest(n_years=n_years, selected_year=selected_year):
+                rows = bench_valuation.make_rows(8, n_years)
+                df = bench_valuation.pandas_valuation(rows, selected_year)
+                kernel = ValuationKernel(rows, selected_year, rows[0]['irr_rate'])
+                self.assertEqual(list(kernel.companies), list(df['player_name']))
+                for key in ('dividend_pv', 'capped_growth_rate', 'avg_profit', 'future_value', 'total_valuation'):
+                    np.testing.assert_allclose(getattr(kernel, key), df[key].astype(float).values, rtol=1e-9,
+                                               err_msg=key)
+
+    def test_ranks_by_total_valuation_with_ties_sharing_the_better_rank(self):
+        rows = bench_valuation.make_rows(6, 10)
+        rows += [dict(row, player_name='company_twin') for row in rows if row['player_name'] == 'company_002']
+        kernel = ValuationKernel(rows, 2009, rows[0]['irr_rate'])
+        expected = pd.Series(kernel.total_valuation).rank(method='min', ascending=False).astype(int)
+        self.assertEqual(list(kernel.valuation_rank), list(expected))
+        records = dict(zip(kernel.companies, kernel.records()))
+        self.assertEqual(records['company_twin']['valuation_rank'], records['company_002']['valuation_rank'])
+
+
+class ValuationSurfaceTests(SimpleTestCase):
+    def setUp(self):
+        rows = bench_valuation.make_rows(8, 10)
+        self.kernel = ValuationKernel(rows, 2009, rows[0]['irr_rate'])
+        self.ledger = [dict(record, player_name=company, year=2009, earliest_year=self.kernel.earliest_year)
+                       for company, record in zip(self.kernel.companies, self.kernel.records())]
+
+    def test_base_cell_reproduces_the_ledger_valuations_and_ranks(self):
+        surface = ValuationSurface(self.ledger, [0.08, 0.10, 0.12], SENSITIVITY_GROWTH_CAPS)
+        cell = (slice(None), 1, SENSITIVITY_GROWTH_CAPS.index(GROWTH_CAP))
+        np.testing.assert_allclose(surface.total_valuation[cell], self.kernel.total_valuation, rtol=1e-9)
+        self.assertEqual(list(surface.rank[cell]), list(self.kernel.valuation_rank))
+
+    def test_ties_share_the_better_rank_as_in_the_kernel(self):
+        rows = bench_valuation.make_rows(6, 10)
+        rows += [dict(row, player_name='company_twin') for row in rows if row['player_name'] == 'company_002']
+        kernel = ValuationKernel(rows, 2009, rows[0]['irr_rate'])
+        ledger = [dict(record, player_name=company, year=2009, earliest_year=kernel.earliest_year)
+                  for company, record in zip(kernel.companies, kernel.records())]
+        surface = ValuationSurface(ledger, [0.10], [GROWTH_CAP])
+        self.assertEqual(list(surface.rank[:, 0, 0]), list(kernel.valuation_rank))
+
+    def test_each_cell_matches_a_kernel_run_at_its_rate_and_cap(self):
+        rows = bench_valuation.make_rows(8, 10)
+        surface = ValuationSurface(self.ledger, [0.08, 0.12], [0.0, 0.05])
+        for i, rate in enumerate(surface.rates):
+            for j, cap in enumerate(surface.growth_caps):
+                kernel = ValuationKernel(rows, 2009, rate, growth_cap=cap)
+                np.testing.assert_allclose(surface.total_valuation[:, i, j], kernel.total_valuation, rtol=1e-9)
+
+    def test_cells_without_a_finite_terminal_value_are_left_blank(self):
+        payload = ValuationSurface(self.ledger, [0.05, 0.10], [0.07]).payload()
+        self.assertEqual(payload['total_valuation'][0], [[None], [round(self.kernel.total_valuation[0] * 1e-6, 3)]])
+        self.assertEqual([ranks[0][0] for ranks in payload['rank']], [0] * len(self.ledger))
+
+
+class ReportTableTests(SimpleTestCase):
+    def test_matches_the_pandas_to_html_pipeline(self):
+        for n_years in (1, 4, 10, 20):
+            with self.subTest(n_years=n_years):
+                rows = bench_tables.make_rows(n_years)
+                self.assertEqual(bench_tables.spec_table(rows, 'In-Force'), bench_tables.pandas_table(rows, 'In-Force'))
+
+    def test_select_and_blank_columns(self):
+        table = ReportTable([2021, 2020], [('Sales', ['1', '2']), None, ('Profit', ['3', '4'])])
+        selected = table.select(['2020', '2019'])
+        self.assertEqual(selected.columns, ['2020'])
+        self.assertEqual(selected.rows, [('Sales', ['2']), None, ('Profit', ['4'])])
+        self.assertIs(table.select(['1999']), table)
+        padded = table.with_blank_columns([2019])
+        self.assertEqual(padded.columns, ['2021', '2020', '2019'])
+        self.assertEqual(padded.rows[0], ('Sales', ['1', '2', '']))
+        self.assertEqual(table.with_blank_columns([2022], before=True).rows[2], ('Profit', ['', '3', '4']))
+
+    def test_html_escapes_cells_unless_asked_not_to(self):
+        table = ReportTable(['A&B'], [('<b>Label</b>', ['x < y'])])
+        self.assertIn('<th>A&amp;B</th>', table.html())
+        self.assertIn('<td>x &lt; y</td>', table.html())
+        self.assertIn('<th><b>Label</b></th>', table.html(escape=False))
+
+
+class MessagePushTests(TestCase):
+    def test_new_message_is_pushed_to_the_game_group_once_committed(self):
+        user = User.objects.create_user('alice')
+        game = IndivGames.objects.create(game_id='push-game', initiator=user)
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(game_group_name(game.game_id), channel)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            message = ChatMessage.objects.create(game_id=game, from_user=user, content='Hello team')
+        self.assertEqual(len(callbacks), 1)
+        for callback in callbacks:
+            callback()
+
+        event = async_to_sync(channel_layer.receive)(channel)
+        self.assertEqual(event['event'], 'chat')
+        self.assertEqual(event['message']['sequence_number'], message.sequence_number)
+        self.assertEqual(event['message']['from_sender'], 'alice')
+
+    def test_rows_written_outside_the_orm_are_claimed_and_pushed_once(self):
+        user = User.objects.create_user('alice')
+        game = IndivGames.objects.create(game_id='server-game', initiator=user)
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(game_group_name(game.game_id), channel)
+
+        # the game server inserts its notices directly, without ChatMessage.save()
+        ChatMessage.objects.bulk_create([ChatMessage(game_id=game, content='OSFI intervention: capital plan required')])
+        self.assertEqual(push_pending(game.game_id), 1)
+        self.assertEqual(push_pending(game.game_id), 0)
+
+        event = async_to_sync(channel_layer.receive)(channel)
+        self.assertEqual(event['message']['from_sender'], 'game_server')
+        self.assertEqual(event['message']['kind'], 'osfi')
+        self.assertEqual(ChatMessage.objects.get().kind, 'osfi')
+
+    def test_review_notice_from_the_game_server_schedules_the_report_warm_up(self):
+        user = User.objects.create_user('alice')
+        game = IndivGames.objects.create(game_id='warm-game', initiator=user)
+        ChatMessage.objects.bulk_create([ChatMessage(game_id=game, content='Review decisions.')])
+        with mock.patch.object(report_warmer, 'schedule') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                push_pending(game.game_id)
+        schedule.assert_called_once_with(game.game_id)
+
+
+class FetchMessagesTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('alice', password='pw')
+        self.game = IndivGames.objects.create(game_id='chat-game', initiator=user)
+        ChatMessage.objects.create(game_id=self.game, from_user=user, content='Hello team')
+        self.client.login(username='alice', password='pw')
+
+    def test_returns_messages_after_the_cursor(self):
+        response = self.client.get(reverse('fetch_messages'), {'game_id': self.game.game_id, 'latest_sequence': 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m['content'] for m in response.json()['messages']], ['Hello team'])
+
+    def test_counts_and_filters_review_notices_the_game_server_inserted(self):
+        ChatMessage.objects.bulk_create([ChatMessage(game_id=self.game, content='Review decisions.')])
+        response = self.client.get(reverse('fetch_messages'),
+                                   {'game_id': self.game.game_id, 'latest_sequence': 0, 'kind': 'review'})
+        self.assertEqual([m['content'] for m in response.json()['messages']], ['Review decisions.'])
+        self.assertEqual(response.json()['review_cnt'], 1)
+
+    def test_rejects_a_cursor_that_is_not_a_number(self):
+        response = self.client.get(reverse('fetch_messages'), {'game_id': self.game.game_id, 'latest_sequence': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.has_header('ETag'))
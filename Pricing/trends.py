@@ -0,0 +1,125 @@
+import numpy as np
+
+
+def reform_dummy(reform_fact):
+    """Turn per-year reform flags (latest year first) into the post-reform regression dummy.
+
+    Years from the latest back to the most recent reform are 1 and earlier years are 0.
+    Returns None when every year or no year carries a reform, in which case the year is
+    the only regressor.
+    """
+    flags = np.asarray(reform_fact) == 1
+    if flags.all() or not flags.any():
+        return None
+    dummy = np.zeros(len(flags))
+    dummy[:np.argmax(flags) + 1] = 1
+    return dummy
+
+
+class LogLinearFit:
+    """Batched least-squares fit of ln(value) = intercept + trend_coef * year + reform_coef * reform.
+
+    ``values`` is (n_series, n_years) and shares ``years``; ``reform`` holds a 0/1 dummy per
+    series and year (a row that is all zeros fits the year alone).  The two-regressor normal
+    equations are solved in closed form on centred data, so any number of series is fitted
+    with a handful of array operations.
+    """
+
+    def __init__(self, years, values, reform=None):
+        self.years = np.asarray(years, dtype=float)
+        ln_values = np.log(np.atleast_2d(np.asarray(values, dtype=float)))
+        n_series, n_years = ln_values.shape
+        if reform is None:
+            reform = np.zeros((n_series, n_years))
+        reform = np.broadcast_to(np.asarray(reform, dtype=float), ln_values.shape)
+
+        year_dev = self.years - self.years.mean()
+        reform_mean = reform.mean(axis=1)
+        reform_dev = reform - reform_mean[:, None]
+        ln_mean = ln_values.mean(axis=1)
+        ln_dev = ln_values - ln_mean[:, None]
+
+        s_yy = (year_dev ** 2).sum()
+        s_yr = reform_dev @ year_dev
+        s_rr = (reform_dev ** 2).sum(axis=1)
+        s_yv = ln_dev @ year_dev
+        s_rv = (reform_dev * ln_dev).sum(axis=1)
+        det = s_yy * s_rr - s_yr ** 2
+        self.has_reform = det > 1e-12 * s_yy * np.maximum(s_rr, 1e-300)
+
+        # inverse of the centred X'X; series without a usable dummy reduce to simple regression
+        safe_det = np.where(self.has_reform, det, 1.0)
+        inv_yy = np.where(self.has_reform, s_rr / safe_det, 1 / s_yy)
+        inv_yr = np.where(self.has_reform, -s_yr / safe_det, 0.0)
+        inv_rr = np.where(self.has_reform, s_yy / safe_det, 0.0)
+
+        self.trend_coef = inv_yy * s_yv + inv_yr * s_rv
+        self.reform_coef = inv_yr * s_yv + inv_rr * s_rv
+        self.intercept = ln_mean - self.trend_coef * self.years.mean() - self.reform_coef * reform_mean
+        self.reform = reform
+
+        residuals = ln_dev - self.trend_coef[:, None] * year_dev - self.reform_coef[:, None] * reform_dev
+        ssr = (residuals ** 2).sum(axis=1)
+        sst = (ln_dev ** 2).sum(axis=1)
+        dof = n_years - 2 - self.has_reform
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.r_squared = np.where(sst > 0, 1 - ssr / sst, np.nan)
+            sigma2 = np.where(dof > 0, ssr / dof, np.nan)
+        self.trend_std_err = np.sqrt(sigma2 * inv_yy)
+        self.reform_std_err = np.where(self.has_reform, np.sqrt(sigma2 * inv_rr), np.nan)
+        x_mean = (self.years.mean(), reform_mean)
+        self.intercept_std_err = np.sqrt(sigma2 / n_years + x_mean[0] ** 2 * inv_yy * sigma2
+                                         + 2 * x_mean[0] * x_mean[1] * inv_yr * sigma2
+                                         + x_mean[1] ** 2 * inv_rr * sigma2)
+
+    def predict(self, years, reform=0):
+        """Fitted values (n_series, len(years)) for the given years and reform dummy."""
+        years = np.atleast_1d(np.asarray(years, dtype=float))
+        reform = np.asarray(reform, dtype=float)
+        return np.exp(self.intercept[:, None] + self.trend_coef[:, None] * years
+                      + self.reform_coef[:, None] * reform)
+
+    def fitted(self):
+        return self.predict(self.years, self.reform)
+
+
+def fit_claim_trends(years, values, reform_facts):
+    """Fit many claim series in one batch and return the claim trend report estimates.
+
+    ``years`` is the accident years (latest first), ``values`` one row of loss costs,
+    frequencies or severities per series and ``reform_facts`` the matching per-year reform
+    flags.  Each result holds ``reform`` (whether a reform dummy was fitted), ``est`` (the
+    projected trend and, with a reform, the reform effect), ``preds`` (fitted values from
+    the oldest year plus the next-year projection), ``r_squared`` and ``std_err``.
+    """
+    years = np.asarray(years, dtype=float)
+    dummies = [reform_dummy(reform_fact) for reform_fact in reform_facts]
+    reform = np.array([np.zeros(len(years)) if dummy is None else dummy for dummy in dummies])
+    fit = LogLinearFit(years, values, reform)
+
+    proj_year = years.max() + 1
+    order = np.argsort(years, kind='stable')
+    fitted = fit.fitted()[:, order]
+    proj_reform = fit.predict(proj_year, 1)[:, 0]
+    proj_no_reform = fit.predict(proj_year, 0)[:, 0]
+    latest = fitted[:, -1]
+
+    results = []
+    for k, dummy in enumerate(dummies):
+        reform_fitted = dummy is not None
+        proj = proj_reform[k] if reform_fitted else proj_no_reform[k]
+        est = [proj / latest[k] - 1 if latest[k] != 0 else 0]
+        if reform_fitted:
+            est.append(proj / proj_no_reform[k] - 1 if proj_no_reform[k] != 0 else 0)
+        results.append({
+            'reform': reform_fitted,
+            'est': est,
+            'preds': list(fitted[k]) + [proj],
+            'r_squared': fit.r_squared[k],
+            'std_err': {
+                'intercept': fit.intercept_std_err[k],
+                'trend': fit.trend_std_err[k],
+                'reform': fit.reform_std_err[k],
+            },
+        })
+    return results
@@ -0,0 +1,49 @@
+import numpy as np
+
+
+class ChainLadder:
+    """Volume-weighted chain ladder for an accident-year x development-year triangle.
+
+    ``rows`` is a Triangles/Indications JSON array: one list per development year, each
+    holding the cumulative amount for every accident year (oldest first).  Accident
+    year i is observed up to development year ``min(n_devl - 1, n_acc - 1 - i)``; any
+    cells beyond that are ignored and projected from the age-to-age factors.
+    """
+
+    def __init__(self, rows):
+        self.triangle = np.asarray(rows, dtype=float).T
+        n_acc, n_devl = self.triangle.shape
+        acc_idx = np.arange(n_acc)
+
+        self.latest_devl = np.minimum(n_devl - 1, n_acc - 1 - acc_idx).clip(min=0)
+        self.observed = np.arange(n_devl)[None, :] <= self.latest_devl[:, None]
+        self.latest = self.triangle[acc_idx, self.latest_devl]
+
+        # age_to_age[k - 1] develops age k - 1 to age k over the accident years observed at age k
+        later_observed = self.observed[:, 1:]
+        numerator = np.where(later_observed, self.triangle[:, 1:], 0).sum(axis=0)
+        denominator = np.where(later_observed, self.triangle[:, :-1], 0).sum(axis=0)
+        self.age_to_age = numerator / np.where(denominator == 0, 1, denominator)
+
+        # to_ultimate[d] develops age d to ultimate; the last age is taken as ultimate
+        self.to_ultimate = np.append(np.cumprod(self.age_to_age[::-1])[::-1], 1.0)
+        self.ultimates = self.latest * self.to_ultimate[self.latest_devl]
+
+        step = np.where(self.observed, 1.0, np.append(1.0, self.age_to_age)[None, :])
+        self.projected = np.where(self.observed, self.triangle,
+                                  self.latest[:, None] * np.cumprod(step, axis=1))
+
+    @property
+    def shape(self):
+        return self.triangle.shape
+
+    def observed_only(self, rows):
+        """Return another triangle on the same layout (e.g. incurred) with unobserved cells zeroed."""
+        return np.where(self.observed, np.asarray(rows, dtype=float).T, 0)
+
+    def booked_error(self, rows):
+        """Ratio of each age to the final age, less one, for fully developed accident years."""
+        incurred = np.asarray(rows, dtype=float).T
+        developed = incurred[self.latest_devl == self.shape[1] - 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return developed[:, :-1] / developed[:, -1:] - 1
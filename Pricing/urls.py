@@ -14,10 +14,14 @@ urlpatterns = [
     path('claim_trend_report/<str:game_id>/', views.claim_trend_report, name='Pricing-claim_trend_report'),
     path('financials_report/<str:game_id>/', views.financials_report, name='Pricing-financials_report'),
     path('valuation_report/<str:game_id>/', views.valuation_report, name='Pricing-valuation_report'),
+    path('api/v<int:api_version>/games/<str:game_id>/reports/<str:report>/<int:year>/', views.report_data,
+         name='Pricing-report_data'),
+    path('valuation_sensitivity/<str:game_id>/', views.valuation_sensitivity, name='Pricing-valuation_sensitivity'),
     path('decision_input/<str:game_id>/', views.decision_input, name='Pricing-decision_input'),
     path('decision_confirm/<str:game_id>/', views.decision_confirm, name='Pricing-decision_confirm'),
     path('join_group_game/<str:game_id>/', views.join_group_game, name='Pricing-join_group_game'),
     path('observe/', views.observe, name='Pricing-observe'),
+    path('cache_status/', views.cache_status, name='Pricing-cache_status'),
     path('send_message/', views.send_message, name='send_message'),
     path('fetch_messages/', views.fetch_messages, name='fetch_messages'),
     path('fetch_game_list/', views.fetch_game_list, name='fetch_game_list'),
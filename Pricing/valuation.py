@@ -0,0 +1,142 @@
+import numpy as np
+
+VALUATION_WINDOW_YEARS = 20
+GROWTH_CAP = 0.07
+# sensitivity grid: discount rates around the game's irr_rate, and growth caps around GROWTH_CAP
+SENSITIVITY_RATE_OFFSETS = [-0.03, -0.02, -0.01, 0.0, 0.01, 0.02, 0.03, 0.04, 0.05]
+SENSITIVITY_GROWTH_CAPS = [0.0, 0.01, 0.03, 0.05, 0.07, 0.09, 0.11]
+# the valuation report's per-company columns, as returned by table()
+REPORT_COLUMNS = ['player_name', 'in_force', 'beg_in_force', 'tot_in_force', 'profit', 'future_value', 'dividend_pv',
+                  'excess_capital', 'total_valuation', 'capped_growth_rate', 'avg_profit']
+
+
+class ValuationKernel:
+    """Company valuations for the valuation report, computed for every company at once.
+
+    ``rows`` are Valuation values() dicts (player_name, year, in_force, beg_in_force, profit,
+    dividend_paid, excess_capital, pv_index); at least one must fall on or before
+    ``selected_year``, and later years are ignored.  A company's value is its
+    discounted dividends, plus its excess capital at the selected year, plus a terminal value
+    of its in-force book earning the window's average profit per client, grown at the
+    capped rate and discounted at ``irr_rate``.  Everything is float64; callers convert to
+    Decimal or strings for display only.
+    """
+
+    def __init__(self, rows, selected_year, irr_rate, window=VALUATION_WINDOW_YEARS, growth_cap=GROWTH_CAP):
+        rows = [row for row in rows if row['year'] <= selected_year]
+        self.companies, company = np.unique([row['player_name'] for row in rows], return_inverse=True)
+        year = np.array([row['year'] for row in rows], dtype=int)
+
+        def column(key):
+            # float() per value: numpy's own Decimal conversion is several times slower
+            return np.fromiter((float(row[key]) for row in rows), dtype=float, count=len(rows))
+
+        self.latest_year = int(year.max())
+        self.earliest_year = max(self.latest_year - window + 1, int(year.min()))
+
+        # pv_index is applied in reverse: a company's first year takes the factor of its last
+        order = np.lexsort((year, company))
+        n_companies = len(self.companies)
+        counts = np.bincount(company, minlength=n_companies)
+        ends = np.cumsum(counts)
+        starts = ends - counts
+        group = company[order]
+        reversed_pos = starts[group] + ends[group] - 1 - np.arange(len(order))
+        pv_index = column('pv_index')[order][reversed_pos]
+
+        year = year[order]
+        in_window = year >= self.earliest_year
+        at_selected = year == selected_year
+
+        def total(values, mask=None):
+            values = values[order] if mask is None else np.where(mask, values[order], 0)
+            return np.bincount(group, weights=values, minlength=n_companies)
+
+        beg_in_force = column('beg_in_force')
+        self.dividend_pv = np.bincount(group, weights=pv_index * column('dividend_paid')[order], minlength=n_companies)
+        self.in_force = total(column('in_force'), at_selected)
+        self.excess_capital = total(column('excess_capital'), at_selected)
+        self.profit = total(column('profit'), in_window)
+        self.tot_in_force = total(beg_in_force, in_window)
+        self.beg_in_force = total(beg_in_force, year == self.earliest_year)
+
+        span = self.latest_year - self.earliest_year
+        with np.errstate(divide='ignore', invalid='ignore'):
+            growth = (self.in_force / self.beg_in_force) ** (1 / span if span else np.nan) - 1
+            self.capped_growth_rate = np.where(np.isfinite(growth), np.clip(growth, -growth_cap, growth_cap), 0.0)
+            self.avg_profit = np.where(self.tot_in_force != 0, self.profit / self.tot_in_force, 0.0)
+            discount = float(irr_rate) - self.capped_growth_rate
+            self.future_value = np.where(discount != 0, self.in_force * self.avg_profit / discount, 0.0)
+        self.total_valuation = self.dividend_pv + self.excess_capital + self.future_value
+        # ties share the better rank, as pandas rank(method='min') does
+        self.valuation_rank = 1 + (self.total_valuation[None, :] > self.total_valuation[:, None]).sum(axis=1)
+
+    def records(self):
+        """One dict of ValuationLedger values per company, in the order of ``companies``."""
+        table = self.table()
+        keys = [key for key in table if key != 'player_name']
+        return [dict({key: table[key][i].item() for key in keys}, valuation_rank=int(self.valuation_rank[i]))
+                for i in range(len(self.companies))]
+
+    def table(self):
+        """Per-company columns in the valuation report's order, in force as whole clients."""
+        return {
+            'player_name': list(self.companies),
+            'in_force': np.rint(self.in_force).astype(np.int64),
+            'beg_in_force': self.beg_in_force,
+            'tot_in_force': self.tot_in_force,
+            'profit': self.profit,
+            'future_value': self.future_value,
+            'dividend_pv': self.dividend_pv,
+            'excess_capital': self.excess_capital,
+            'total_valuation': self.total_valuation,
+            'capped_growth_rate': self.capped_growth_rate,
+            'avg_profit': self.avg_profit,
+        }
+
+
+class ValuationSurface:
+    """Total valuation and rank of every company over a grid of discount rates and growth caps.
+
+    Built from one year's ValuationLedger values() rows: the dividend and excess capital
+    parts do not depend on the rate, so only the terminal value is recomputed, for all
+    companies, rates and caps in one broadcast.  Cells where the rate does not exceed the
+    cap have no finite terminal value and are left as NaN with rank 0.
+    """
+
+    def __init__(self, rows, rates, growth_caps):
+        self.companies = [row['player_name'] for row in rows]
+        self.rates = np.asarray(rates, dtype=float)
+        self.growth_caps = np.asarray(growth_caps, dtype=float)
+
+        def column(key):
+            return np.array([row[key] for row in rows], dtype=float)
+
+        in_force = column('in_force')
+        span = column('year') - column('earliest_year')
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            growth = (in_force / column('beg_in_force')) ** (1 / span) - 1
+        growth = np.where(np.isfinite(growth) & (span > 0), growth, 0.0)
+
+        # companies x rates x caps
+        capped = np.clip(growth[:, None], -self.growth_caps[None, :], self.growth_caps[None, :])[:, None, :]
+        self.defined = self.rates[:, None] > self.growth_caps[None, :]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            future_value = (in_force * column('avg_profit'))[:, None, None] / (self.rates[None, :, None] - capped)
+        base = column('dividend_pv') + column('excess_capital')
+        self.total_valuation = np.where(self.defined[None], base[:, None, None] + future_value, np.nan)
+
+        # ties share the better rank, as in ValuationKernel
+        better = (self.total_valuation[None, :] > self.total_valuation[:, None]).sum(axis=1)
+        self.rank = np.where(self.defined[None], 1 + better, 0)
+
+    def payload(self, scale=1e-6):
+        """JSON-ready grid: values in millions as [company][rate][cap], None where undefined."""
+        values = np.round(self.total_valuation * scale, 3)
+        return {
+            'companies': self.companies,
+            'rates': self.rates.tolist(),
+            'growth_caps': self.growth_caps.tolist(),
+            'total_valuation': np.where(np.isnan(values), None, values).tolist(),
+            'rank': self.rank.tolist(),
+        }
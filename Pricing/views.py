@@ -1,34 +1,32 @@
-import uuid
-import copy
 import pytz
-import numpy as np
-import pandas as pd
 import decimal
-from .utils import reverse_pv_index, calculate_growth_rate, calculate_avg_profit, calculate_future_value, perform_logistic_regression, perform_logistic_regression_indication
+from importlib import import_module
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.http import HttpResponse, JsonResponse, Http404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 from django.db import transaction
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Q, Count, Case, When, Value, CharField, Max, Sum, Exists, Min, F, OuterRef, Subquery
+from django.views.decorators.http import condition
+from django.views.decorators.cache import cache_control
+from django.db.models import Q, Count, Case, When, Value, CharField, Max, Exists, Min, F, OuterRef, Subquery
 from datetime import timedelta
 from PricingProject.settings import CONFIG_FRESH_PREFS
 from .forms import GamePrefsForm
-from .models import GamePrefs, IndivGames, Players, MktgSales, Financials, Industry, Valuation, Triangles, ClaimTrends, Indications, Decisions, ChatMessage, Lock
-pd.set_option('display.max_columns', None)  # None means show all columns
+from .cache import cache_stats, GAME_REPORT_CACHE_TIMEOUT
+from .events import latest_sequence_number, messages_after, push_pending
+from .game_context import game_view
+from .game_factory import GameFactory, PROFILE_TYPES
+from .tables import ReportTable, CLAIM_TREND_TABLE, CLAIM_TREND_ESTIMATE_TABLE, SPACER
+from .warmup import report_warmer
+from .models import GamePrefs, IndivGames, Players, Financials, Triangles, ClaimTrends, Indications, Decisions, ChatMessage, ValuationLedger, GameEventCounter, LobbyVersion, Lock
 
-
-def get_force_term(game):
-    """Helper function to return 'Customers' for Novice games, 'In-Force' otherwise"""
-    try:
-        game_prefs = GamePrefs.objects.get(user=game.initiator)
-        if game_prefs.game_difficulty == 'Novice':
-            return 'Customers'
-    except GamePrefs.DoesNotExist:
-        pass
-    return 'In-Force'
+# The pandas/numpy side of the app, imported on the first request that needs it: the home page,
+# lobby, chat and message endpoints never load it.
+analytics = SimpleLazyObject(lambda: import_module('Pricing.analytics'))
 
 
 # Create your views here.
@@ -101,68 +99,10 @@ def individual(request):
             )
 
         if request.POST.get('Start Game') == 'Start Game':
-            unique_game_id = str(uuid.uuid4())
-
-            game, created = IndivGames.objects.update_or_create(
-                game_id=unique_game_id,
-                initiator=request.user,
-                initiator_name=str(request.user),
-                status="active",
-                game_observable=game_prefs.game_observable,
-            )
-
             user_profile = form.cleaned_data['default_selection_type']
-            if user_profile == 'Balanced':
-                profile_type = 'balanced'
-            elif user_profile == 'Growth':
-                profile_type = 'growth'
-            elif user_profile == 'Profit':
-                profile_type = 'profitability'
-
-            next_player_id = 0
-            Players.objects.update_or_create(
-                game=game,
-                player_id=request.user,
-                player_name=str(request.user),
-                player_id_display=next_player_id,
-                player_type='user',
-                profile=profile_type,
-            )
-
-            next_player_id += 1
-            for i in range(int(game_prefs.sel_type_01)):
-                Players.objects.create(
-                    game=game,
-                    player_id=None,
-                    player_name=f'growth_{i + 1:02}',
-                    player_id_display=next_player_id,
-                    player_type='computer',
-                    profile='growth',
-                )
-                next_player_id += 1
-
-            for i in range(int(game_prefs.sel_type_02)):
-                Players.objects.create(
-                    game=game,
-                    player_id=None,
-                    player_name=f'profit_{int(game_prefs.sel_type_01) + i + 1:02}',
-                    player_id_display=next_player_id,
-                    player_type='computer',
-                    profile='profitability',
-                )
-                next_player_id += 1
-
-            for i in range(int(game_prefs.sel_type_03)):
-                Players.objects.create(
-                    game=game,
-                    player_id=None,
-                    player_name=f'balanced_{int(game_prefs.sel_type_01) + int(game_prefs.sel_type_02) + i + 1:02}',
-                    player_id_display=next_player_id,
-                    player_type='computer',
-                    profile='balanced',
-                )
-                next_player_id += 1
+            profile_type = PROFILE_TYPES.get(user_profile)
 
+            GameFactory(game_prefs).create(request.user, profile_type, "active")
             return redirect('Pricing-game_list')  # Redirect to a new page
     else:
         form = GamePrefsForm()
@@ -241,69 +181,10 @@ def group(request):
         if request.POST.get('Back to Game Select') == 'Back to Game Select':
             return redirect('Pricing-start')
         if request.POST.get('Initiate Group Game') == 'Initiate Group Game':
-            unique_game_id = str(uuid.uuid4())
-
-            game, created = IndivGames.objects.update_or_create(
-                game_id=unique_game_id,
-                initiator=request.user,
-                initiator_name=str(request.user),
-                status="waiting for players",
-                human_player_cnt=game_prefs.human_player_cnt,
-                game_observable=game_prefs.game_observable,
-            )
-
             user_profile = form.cleaned_data['default_selection_type']
-            if user_profile == 'Balanced':
-                profile_type = 'balanced'
-            elif user_profile == 'Growth':
-                profile_type = 'growth'
-            elif user_profile == 'Profit':
-                profile_type = 'profitability'
-
-            next_player_id = 0
-            Players.objects.update_or_create(
-                game=game,
-                player_id=request.user,
-                player_name=str(request.user),
-                player_id_display=next_player_id,
-                player_type='user',
-                profile=profile_type,
-            )
-
-            next_player_id += 1
-            for i in range(int(game_prefs.sel_type_01)):
-                Players.objects.create(
-                    game=game,
-                    player_id=None,
-                    player_name=f'growth_{1 + i:02}',
-                    player_id_display=next_player_id,
-                    player_type='computer',
-                    profile='growth',
-                )
-                next_player_id += 1
-
-            for i in range(int(game_prefs.sel_type_02)):
-                Players.objects.create(
-                    game=game,
-                    player_id=None,
-                    player_name=f'profit_{int(game_prefs.sel_type_01) + i + 1:02}',
-                    player_id_display=next_player_id,
-                    player_type='computer',
-                    profile='profitability',
-                )
-                next_player_id += 1
-
-            for i in range(int(game_prefs.sel_type_03)):
-                Players.objects.create(
-                    game=game,
-                    player_id=None,
-                    player_name=f'balanced_{int(game_prefs.sel_type_01) + int(game_prefs.sel_type_02) + i + 1:02}',
-                    player_id_display=next_player_id,
-                    player_type='computer',
-                    profile='balanced',
-                )
-                next_player_id += 1
+            profile_type = PROFILE_TYPES.get(user_profile)
 
+            GameFactory(game_prefs).create(request.user, profile_type, "waiting for players", human_player_cnt=game_prefs.human_player_cnt)
             return redirect('Pricing-game_list')  # Redirect to a new page
     else:
         form = GamePrefsForm()
@@ -397,6 +278,7 @@ def join_group_game(request, game_id):
             if current_players >= game.human_player_cnt:
                 game.status = 'active'
                 game.save()
+            LobbyVersion.bump_for_game(game)
 
             messages.success(request, "Successfully added to group game.")
             return redirect('Pricing-game_list')
@@ -437,16 +319,10 @@ def observe(request):
 
 
 @login_required()
-def game_dashboard(request, game_id):
+@game_view
+def game_dashboard(request, game_id, game_ctx):
     user = request.user
-    game = get_object_or_404(IndivGames, Q(game_id=game_id))
-    players_list = game.players.all()
-    human_players = []
-    for player in players_list:
-        if player.player_type == 'user':
-            human_players.append(player.player_name)
-    if game.game_observable is False and user.username not in human_players:
-        raise Http404("You are not permitted to view the game.")
+    game = game_ctx.game
     decisions_obj = Decisions.objects.filter(game_id=game, player_id=user)
 
     unique_years = decisions_obj.order_by('-year').values_list('year', flat=True).distinct()
@@ -455,39 +331,17 @@ def game_dashboard(request, game_id):
     target_datetime = None
     decisions_frozen = True
 
-    is_novice_game = False  # Default to not Novice
-    try:
-        game_prefs = GamePrefs.objects.get(user=game.initiator)
-        if game_prefs.game_difficulty == 'Novice':
-            is_novice_game = True
-    except GamePrefs.DoesNotExist:
-        pass # Keep is_novice_game as False if prefs not found
+    is_novice_game = game_ctx.is_novice_game
 
     if unique_years:  # Proceed if there are any financial years available
-        # Querying the database
-        decisions_data_list = list(decisions_obj.values('year', 'decisions_game_stage', 'decisions_time_stamp', 'decisions_locked'))
-
-        # Creating a DataFrame from the obtained data
-        df = pd.DataFrame(decisions_data_list)
-
-        if not df.empty:
-            # Filter out only the rows belonging to the latest four years
-            latest_df = df[df['year'] == latest_year]
-
-            if latest_df['decisions_game_stage'].values[0] == 'decisions':
-                if not latest_df['decisions_locked'].values[0]:
-                    decisions_frozen = False
-                    target_datetime = latest_df['decisions_time_stamp'].values[0]['future_time']
-                    current_datetime = latest_df['decisions_time_stamp'].values[0]['current_time']
-                else:
-                    pass
-            else:
-                pass
+        latest = decisions_obj.filter(year=latest_year) \
+            .values('decisions_game_stage', 'decisions_time_stamp', 'decisions_locked').first()
+        if latest['decisions_game_stage'] == 'decisions' and not latest['decisions_locked']:
+            decisions_frozen = False
+            target_datetime = latest['decisions_time_stamp']['future_time']
+            current_datetime = latest['decisions_time_stamp']['current_time']
 
     template_name = 'Pricing/dashboard.html'
-    green_list = ['Government officials', 'Injury reform', 'product reform', 'after observing']
-    orange_list = ['Regulatory']
-    purple_list = ['OSFI']
 
     context = {
         'title': ' - Dashboard',
@@ -495,9 +349,6 @@ def game_dashboard(request, game_id):
         'current_datetime': current_datetime,
         'target_datetime': target_datetime,
         'decisions_frozen': decisions_frozen,
-        'green_list': green_list,
-        'orange_list': orange_list,
-        'purple_list': purple_list,
         'is_novice_game': is_novice_game, # Add to context
     }
 
@@ -505,20 +356,11 @@ def game_dashboard(request, game_id):
 
 
 @login_required()
-def mktgsales_report(request, game_id):
+@game_view
+def mktgsales_report(request, game_id, game_ctx):
     user = request.user
-    game = get_object_or_404(IndivGames, Q(game_id=game_id))
-    players_list = game.players.all()
-    human_players = []
-    for player in players_list:
-        if player.player_type == 'user':
-            human_players.append(player.player_name)
-    if game.game_observable is False and user.username not in human_players:
-        raise Http404("You are not permitted to view the game.")
-
-    financial_data = MktgSales.objects.filter(game_id=game, player_id=user)
-    unique_years = financial_data.order_by('-year').values_list('year', flat=True).distinct()
-    latest_year = unique_years[0] if unique_years else None
+    game = game_ctx.game
+
     template_name = 'Pricing/mktgsales_report.html'
 
     # Check for 'Back to Game Select' POST request
@@ -528,15 +370,8 @@ def mktgsales_report(request, game_id):
     selected_year = request.GET.get('year')  # Get the selected year from the query parameters
     selected_year = int(selected_year) if selected_year else None
 
-    is_novice_game = False  # Default to not Novice
-    try:
-        game_prefs = GamePrefs.objects.get(user=game.initiator)
-        if game_prefs.game_difficulty == 'Novice':
-            is_novice_game = True
-    except GamePrefs.DoesNotExist:
-        pass # Keep is_novice_game as False if prefs not found
+    is_novice_game = game_ctx.is_novice_game
 
-    chart_data = None
     # Determine initial styles based on game difficulty
     if is_novice_game:
         initial_chart_style = "display: block;"
@@ -545,454 +380,11 @@ def mktgsales_report(request, game_id):
         initial_chart_style = "display: none;"
         initial_table_style = "display: block;"
 
-    if unique_years:  # Proceed if there are any financial years available
-        # Querying the database
-        financial_data_list = list(
-            financial_data.values('year', 'beg_in_force',
-                                  'mktg_expense', 'mktg_expense_ind', 'avg_prem',
-                                  'quotes', 'sales', 'canx', 'end_in_force', 'in_force_ind'))  # add more fields as necessary
-
-        # Creating a DataFrame from the obtained data
-        df = pd.DataFrame(financial_data_list)
-
-        if not df.empty:
-            if selected_year not in unique_years:
-                selected_year = latest_year
-                # Filter out only the rows belonging to the latest four years
-            all_data_years = df['year'].unique()  # Get all unique years
-            all_data_years = sorted(all_data_years, reverse=True)  # Sort and pick the latest four years
-            
-            # For the HTML table (latest 4 years up to selected_year)
-            selected_years_table = sorted([yr for yr in all_data_years if yr <= selected_year], reverse=True)[:4]
-            # For the chart (latest 20 years up to selected_year)
-            chart_selected_years = sorted([yr for yr in all_data_years if yr <= selected_year], reverse=True)[:20]
-
-            df = df.sort_values('year', ascending=False)
-
-            # Creating a copy of the filtered DataFrame for the TABLE
-            df_latest_table = df[df['year'].isin(selected_years_table)].copy()
-
-            # Transposing the DataFrame to get years as columns and metrics as rows (for TABLE)
-            transposed_df = df_latest_table.set_index('year').T  # Set 'year' as index before transposing
-            percentage_data = {}
-            close_ratio_data = {}
-            retention_ratio_data = {}
-            mkt_share_ratio_data = {}
-            # Now, we'll go through each row in the transposed DataFrame, rename it, and apply specific formatting
-            for index, row in transposed_df.iterrows():
-                if index == 'beg_in_force':
-                    # Rename and format the 'written_premium' row
-                    new_row_name = f'Beginning-{get_force_term(game)}'
-                    transposed_df.loc[index] = row.apply(
-                        lambda x: f"{int(x):,}")  # formatting as currency without decimals
-                elif index == 'mktg_expense':
-                    # Rename and format the 'in_force' row
-                    new_row_name = 'Marketing Expense'
-                    transposed_df.loc[index] = row.apply(lambda x: f"${int(x):,}")  # formatting as an integer
-                elif index == 'mktg_expense_ind':
-                    # Rename and format the 'in_force' row
-                    new_row_name = 'Industry Marketing Expense'
-                    transposed_df.loc[index] = row.apply(lambda x: f"${int(x):,}")  # formatting as an integer
-                elif index == 'avg_prem':
-                    # Rename and format the 'in_force' row
-                    new_row_name = 'Average Premium'
-                    transposed_df.loc[index] = row.apply(lambda x: f"${x:,.2f}")  # formatting as an integer
-                elif index == 'quotes':
-                    new_row_name = 'Quotes'
-                    transposed_df.loc[index] = row.apply(lambda x: f"{int(x):,}")  # formatting as currency without decimals
-                elif index == 'sales':
-                    new_row_name = 'Sales'
-                    transposed_df.loc[index] = row.apply(lambda x: f"{int(x):,}")  # formatting as currency without decimals
-                elif index == 'canx':
-                    new_row_name = 'Cancellations'
-                    transposed_df.loc[index] = row.apply(lambda x: f"{int(x):,}")  # formatting as currency without decimals
-                elif index == 'end_in_force':
-                    # Rename and format the 'in_force' row
-                    new_row_name = f'Ending-{get_force_term(game)}'
-                    transposed_df.loc[index] = row.apply(lambda x: f"{int(x):,}")  # formatting as an integer
-                elif index == 'in_force_ind':
-                    # Rename and format the 'in_force' row
-                    new_row_name = f'Industry-{get_force_term(game)}'
-                    transposed_df.loc[index] = row.apply(lambda x: f"{int(x):,}")  # formatting as an integer
-
-                # Apply renaming to make the index/rows human-readable
-                transposed_df.rename(index={index: new_row_name}, inplace=True)
-
-                # Continue with additional conditions for more rows as needed
-
-            for year in transposed_df.columns:
-                # Convert the marketing expenses from string to float for calculation
-                quotes = float(transposed_df.at['Quotes', year].replace(',', ''))
-                sales = float(transposed_df.at['Sales', year].replace(',', ''))
-                canx = float(transposed_df.at['Cancellations', year].replace(',', ''))
-                force_term = get_force_term(game)
-                in_force = float(transposed_df.at[f'Beginning-{force_term}', year].replace(',', ''))
-                in_force_end = float(transposed_df.at[f'Ending-{force_term}', year].replace(',', ''))
-                in_force_ind = float(transposed_df.at[f'Industry-{force_term}', year].replace(',', ''))
-                marketing_expense = float(transposed_df.at['Marketing Expense', year].replace('$', '').replace(',', ''))
-                industry_marketing_expense = float(
-                    transposed_df.at['Industry Marketing Expense', year].replace('$', '').replace(',', ''))
-
-                # Calculate the percentage (ensuring not to divide by zero)
-                if industry_marketing_expense > 0:
-                    percentage = (marketing_expense / industry_marketing_expense) * 100
-                else:
-                    percentage = 0  # or None, or however you wish to represent this edge case
-
-                if quotes > 0:
-                    close_ratio = (sales / quotes) * 100
-                else:
-                    close_ratio = 0  # or None, or however you wish to represent this edge case
-
-                if in_force > 0:
-                    retention_ratio = ((in_force - canx) / in_force) * 100
-                else:
-                    retention_ratio = 0
-                if in_force_end > 0:
-                    mkt_share = (in_force_end / in_force_ind) * 100
-                else:
-                    mkt_share = 0
-                # Store the calculated percentage in our dictionary
-                percentage_data[year] = f"{percentage:.2f}%"  # formatted to two decimal places
-                close_ratio_data[year] = f"{close_ratio:.1f}%"  # formatted to one decimal places
-                retention_ratio_data[year] = f"{retention_ratio:.1f}%"  # formatted to one decimal places
-                mkt_share_ratio_data[year] = f"{mkt_share:.1f}%"  # formatted to one decimal places
-            percentage_df = pd.DataFrame(percentage_data, index=['Marketing Spend as % of Industry'])
-            close_ratio_df = pd.DataFrame(close_ratio_data, index=['Close Ratio'])
-            retention_ratio_df = pd.DataFrame(retention_ratio_data, index=['Retention Ratio'])
-            mkt_share_ratio_df = pd.DataFrame(mkt_share_ratio_data, index=['Market Share'])
-
-            insert_position_mktg = transposed_df.index.get_loc('Industry Marketing Expense') + 1
-            df_top_mktg = transposed_df.iloc[:insert_position_mktg]
-            df_bottom_mktg = transposed_df.iloc[insert_position_mktg:]
-            transposed_df_mktg = pd.concat([df_top_mktg, percentage_df, df_bottom_mktg])
-
-            insert_position_close = transposed_df_mktg.index.get_loc('Sales') + 1
-            df_top_close = transposed_df_mktg.iloc[:insert_position_close]
-            df_bottom_close = transposed_df_mktg.iloc[insert_position_close:]
-            transposed_df_close = pd.concat([df_top_close, close_ratio_df, df_bottom_close])
-
-            insert_position_retention = transposed_df_close.index.get_loc('Cancellations') + 1
-            df_top_retention = transposed_df_close.iloc[:insert_position_retention]
-            df_bottom_retention = transposed_df_close.iloc[insert_position_retention:]
-            transposed_df_retention = pd.concat([df_top_retention, retention_ratio_df, df_bottom_retention])
-
-            force_term = get_force_term(game)
-            insert_position_mktshare = transposed_df_retention.index.get_loc(f'Industry-{force_term}') + 1
-            df_top_mktshare = transposed_df_retention.iloc[:insert_position_mktshare]
-            df_bottom_mktshare = transposed_df_close.iloc[insert_position_mktshare:]
-            transposed_df = pd.concat([df_top_mktshare, mkt_share_ratio_df, df_bottom_mktshare])
-
-            selected_columns = [col for col in transposed_df.columns if int(col) <= selected_year]
-            transposed_df = transposed_df[selected_columns]
-            # Convert the final, formatted DataFrame to HTML for rendering
-            if len(transposed_df.columns) < 4:
-                # If there are fewer than four years of data, we'll simulate the rest as empty columns
-                missing_years = 4 - len(transposed_df.columns)
-                for i in range(missing_years):
-                    transposed_df[f'{min(selected_columns) - i - 1} '] = ['' for _ in range(len(transposed_df.index))]
-
-            index = 1
-            blank_row = pd.DataFrame([['' for _ in transposed_df.columns]], columns=transposed_df.columns)
-            transposed_df = pd.concat([transposed_df.iloc[:index], blank_row, transposed_df.iloc[index:]])
-            transposed_df.index = transposed_df.index.where(transposed_df.index != 0, ' ')
-
-            index = 5
-            transposed_df = pd.concat([transposed_df.iloc[:index], blank_row, transposed_df.iloc[index:]])
-            transposed_df.index = transposed_df.index.where(transposed_df.index != 0, ' ')
-
-            index = 7
-            transposed_df = pd.concat([transposed_df.iloc[:index], blank_row, transposed_df.iloc[index:]])
-            transposed_df.index = transposed_df.index.where(transposed_df.index != 0, ' ')
-
-            index = 11
-            transposed_df = pd.concat([transposed_df.iloc[:index], blank_row, transposed_df.iloc[index:]])
-            transposed_df.index = transposed_df.index.where(transposed_df.index != 0, ' ')
-
-            index = 14
-            transposed_df = pd.concat([transposed_df.iloc[:index], blank_row, transposed_df.iloc[index:]])
-            transposed_df.index = transposed_df.index.where(transposed_df.index != 0, ' ')
-
-            financial_data_table = transposed_df.to_html(classes='my-financial-table', border=0, justify='initial',
-                                                         index=True)
-
-            # Prepare data for the CHART (up to 20 years)
-            # Use the original df and filter by chart_selected_years
-            chart_df_source = pd.DataFrame(financial_data_list) # Re-create or use a broader scope df if needed
-            chart_df = chart_df_source[chart_df_source['year'].isin(chart_selected_years)].copy()
-            chart_df = chart_df.sort_values('year', ascending=False) # CHANGED: Newest to oldest for chart
-            
-            if not chart_df.empty:
-                # Calculate Marketing Spend as % of Industry
-                # Ensure mktg_expense_ind is numeric and handle division by zero
-                mktg_spend_percent_industry = []
-                for idx, row in chart_df.iterrows():
-                    mktg_exp = pd.to_numeric(row['mktg_expense'], errors='coerce')
-                    mktg_exp_ind = pd.to_numeric(row['mktg_expense_ind'], errors='coerce')
-                    if pd.notna(mktg_exp) and pd.notna(mktg_exp_ind) and mktg_exp_ind != 0:
-                        mktg_spend_percent_industry.append(round((mktg_exp / mktg_exp_ind) * 100, 2))
-                    else:
-                        mktg_spend_percent_industry.append(0) # Default to 0 if data is missing or division by zero
-
-                # Calculate Cancellation Rate and Close Ratio
-                cancellation_rate_list = []
-                close_ratio_list = [] # Will become sales_ratio_list
-                for idx, row in chart_df.iterrows():
-                    customers_val = pd.to_numeric(row['end_in_force'], errors='coerce')
-                    cancellations_val = pd.to_numeric(row['canx'], errors='coerce')
-                    sales_val = pd.to_numeric(row['sales'], errors='coerce')
-                    quotes_val = pd.to_numeric(row['quotes'], errors='coerce')
-
-                    if pd.notna(customers_val) and pd.notna(cancellations_val) and customers_val != 0:
-                        cancellation_rate_list.append(round((cancellations_val / customers_val) * 100, 2))
-                    else:
-                        cancellation_rate_list.append(0)
-
-                    if pd.notna(sales_val) and pd.notna(quotes_val) and quotes_val != 0:
-                        close_ratio_list.append(round((sales_val / quotes_val) * 100, 2)) # Calculation remains the same
-                    else:
-                        close_ratio_list.append(0)
-
-                chart_data = {
-                    'years': chart_df['year'].tolist(),
-                    'customers': [int(c) for c in chart_df['end_in_force'].tolist()],
-                    'marketing_spend_percent_industry': mktg_spend_percent_industry,
-                    'average_premium': [float(ap) for ap in chart_df['avg_prem'].tolist()],
-                    'quotes': [int(q) for q in chart_df['quotes'].tolist()],
-                    'sales': [int(s) for s in chart_df['sales'].tolist()],
-                    'cancellations': [int(c) for c in chart_df['canx'].tolist()],
-                    'cancellation_rate': cancellation_rate_list,
-                    'sales_ratio': close_ratio_list # Changed key name
-                }
-                
-                # --- SCATTER PLOT DATA PREPARATION ---
-                # Create scatter plot data with profit_margin + marketing_expense decisions
-                scatter_data = []
-                
-                # Get OSFI intervention counts and product reform data
-                industry_data = Industry.objects.filter(game_id=game)
-                claim_trends_data = ClaimTrends.objects.filter(game_id=game)
-                
-                # Get user's decisions data
-                user_decisions = Decisions.objects.filter(
-                    game_id=game,
-                    player_id=user
-                ).order_by('year')
-                
-                # Get the Player object for the current user to assist in excluding their data from industry counts
-                current_player_obj = Players.objects.filter(game=game, player_id=user).first()
-
-                # Create a dictionary for OSFI intervention counts by year
-                osfi_intervention_counts = {}
-                for year_val in chart_df['year'].unique():
-                    # Count capital test failures in the industry for each year
-                    industry_failures_query = industry_data.filter(year=year_val, capital_test='Fail')
-                    if current_player_obj:
-                        # Exclude the current user's company from the industry count if it failed
-                        # The player_id field in Industry model likely refers to the User model instance
-                        industry_failures_query = industry_failures_query.exclude(player_id=user)
-                    
-                    failures = industry_failures_query.count()
-                    osfi_intervention_counts[year_val] = failures
-                    # print(f"DEBUG: Year {year_val} - Industry MCT failures (excluding host): {failures}")
-                
-                print(f"DEBUG: OSFI intervention counts by year (pre-lag): {osfi_intervention_counts}")
-                
-                # --- Apply one-year lag so the impact is felt in the FOLLOWING year ---
-                osfi_intervention_counts = {yr + 1: cnt for yr, cnt in osfi_intervention_counts.items()}
-                print(f"DEBUG: Shifted OSFI intervention counts (impact year): {osfi_intervention_counts}")
-                
-                # Host-company (player) MCT failure flag – lagged by one year as well
-                host_failure_prev = {}
-                host_financials = Financials.objects.filter(game_id=game, player_id=user)
-                for fin in host_financials:
-                    host_failure_prev[fin.year + 1] = (fin.capital_test == 'Fail')
-
-                # Get product reform data
-                product_reforms = {}
-                for ct in claim_trends_data:
-                    try:
-                        trends = ct.claim_trends
-                        bi_reform = trends.get('bi_reform', {}).get(str(ct.year), 0)
-                        cl_reform = trends.get('cl_reform', {}).get(str(ct.year), 0)
-                        
-                        # Determine reform type
-                        if bi_reform and cl_reform:
-                            reform_type = 'Both'
-                        elif bi_reform:
-                            reform_type = 'BI'  
-                        elif cl_reform:
-                            reform_type = 'CL'
-                        else:
-                            reform_type = None
-                        
-                        product_reforms[ct.year] = reform_type
-                    except:
-                        product_reforms[ct.year] = None
-                
-                # Calculate combined expense (profit_margin + marketing_expense) and align with current year's ratios
-                years_sorted = sorted(chart_df['year'].unique())
-                
-                for curr_year in years_sorted:
-                    # Get decision data for PRIOR year (lag 1)
-                    # decision = user_decisions.filter(year=curr_year - 1).first()
-                    # if not decision:
-                        # Fallback to same-year decision if prior not available (first year)
-                        # decision = user_decisions.filter(year=curr_year).first()
-                    
-                    # Fetch current and previous year decisions for YoY premium change
-                    decision_for_curr_year_effective_rate = user_decisions.filter(year=curr_year - 1).first()
-                    decision_for_prev_year_effective_rate = user_decisions.filter(year=curr_year - 2).first()
-
-                    # For a point representing curr_year (and its ratios),
-                    # the x-axis (yoy_rate_change) will be the rate change implemented for curr_year + 1.
-                    # decision_for_rate_change_next_period = user_decisions.filter(year=curr_year + 1).first() // COMMENTING OUT
-                    # decision_for_rate_change_curr_period_for_calc = user_decisions.filter(year=curr_year).first() // COMMENTING OUT
-
-                    yoy_rate_change = 0.0  # Default to 0% change
-
-                    # if decision_for_rate_change_next_period and decision_for_rate_change_next_period.sel_avg_prem is not None and \
-                    #    decision_for_rate_change_curr_period_for_calc and decision_for_rate_change_curr_period_for_calc.sel_avg_prem is not None and \
-                    #    decision_for_rate_change_curr_period_for_calc.sel_avg_prem > 0:
-                    if decision_for_curr_year_effective_rate and decision_for_curr_year_effective_rate.sel_avg_prem is not None and \
-                       decision_for_prev_year_effective_rate and decision_for_prev_year_effective_rate.sel_avg_prem is not None and \
-                       decision_for_prev_year_effective_rate.sel_avg_prem > 0:
-                        try:
-                            # prem_next_for_rate_calc = decimal.Decimal(decision_for_rate_change_next_period.sel_avg_prem)
-                            # prem_curr_for_rate_calc = decimal.Decimal(decision_for_rate_change_curr_period_for_calc.sel_avg_prem)
-                            # prem_curr_val = decimal.Decimal(decision_curr.sel_avg_prem) # USING decision_curr
-                            # prem_prev_val = decimal.Decimal(decision_prev.sel_avg_prem) # USING decision_prev
-                            prem_effective_curr_val = decimal.Decimal(decision_for_curr_year_effective_rate.sel_avg_prem)
-                            prem_effective_prev_val = decimal.Decimal(decision_for_prev_year_effective_rate.sel_avg_prem)
-                            yoy_rate_change = float((prem_effective_curr_val / prem_effective_prev_val - 1) * 100)
-                        except (decimal.InvalidOperation, TypeError):
-                            yoy_rate_change = 0.0 # Fallback if conversion fails
-                    
-                    # if decision: // This was for combined_expense
-                        # Calculate profit_margin + marketing_expense (both stored as integers representing tenths)
-                        # profit_margin = decision.sel_profit_margin / 10.0  # Convert to percentage
-                        # marketing_expense = decision.sel_exp_ratio_mktg / 10.0  # Convert to percentage
-                        # combined_expense = profit_margin + marketing_expense
-                        
-                    # Get current year's retention and close ratios
-                    curr_data = chart_df[chart_df['year'] == curr_year].iloc[0]
-                    
-                    curr_customers = float(curr_data['end_in_force'])
-                    curr_canx = float(curr_data['canx'])
-                    curr_quotes = float(curr_data['quotes'])
-                    curr_sales = float(curr_data['sales'])
-                    
-                    # Calculate retention ratio for current year
-                    if curr_customers > 0:
-                        retention_ratio = ((curr_customers - curr_canx) / curr_customers) * 100
-                    else:
-                        retention_ratio = 0
-                    
-                    # Calculate close ratio for current year
-                    if curr_quotes > 0:
-                        close_ratio = (curr_sales / curr_quotes) * 100
-                    else:
-                        close_ratio = 0
-                    
-                    # Get OSFI interventions from current year
-                    osfi_count = osfi_intervention_counts.get(curr_year, 0)
-                    
-                    # Did our own company fail capital test in prior year?
-                    host_failed = host_failure_prev.get(curr_year, False)
-                     
-                    # Get product reforms from PRIOR year (to show impact on curr_year's point)
-                    reform_status_for_this_point = product_reforms.get(curr_year - 1, None)
-                     
-                    scatter_data.append({
-                         'year': int(curr_year),  # Convert numpy.int64 to Python int
-                         # 'combined_expense': round(combined_expense, 1),
-                         'yoy_rate_change': round(yoy_rate_change, 1),
-                         'retention_ratio': round(retention_ratio, 2),
-                         'close_ratio': round(close_ratio, 2),
-                         'osfi_interventions': int(osfi_count),  # Convert to int in case it's numpy type
-                         'product_reforms': reform_status_for_this_point,  # Pass lagged reform type as string
-                         'host_failure': host_failed
-                     })
-                    
-                    # print(f"DEBUG: Year {curr_year} - OSFI interventions: {osfi_count}, Combined expense: {combined_expense:.1f}%")
-                    print(f"DEBUG: Year {curr_year} - OSFI interventions: {osfi_count}, YoY Rate Change: {yoy_rate_change:.1f}%")
-
-            # Calculate logistic regression curves if we have scatter data
-            close_ratio_curve = []
-            retention_ratio_curve = []
-            
-            if len(scatter_data) > 3:  # Need at least 4 points for meaningful regression
-                try:
-                    # Extract X (combined expense) and Y values for both ratios
-                    # X = np.array([point['combined_expense'] for point in scatter_data]) # Commented out as combined_expense is removed
-                    # For the polynomial curves, if they are still needed, X should be updated to yoy_rate_change.
-                    # For now, this will prevent an error. The impact on these specific curves needs review.
-                    y_close = np.array([point['close_ratio'] for point in scatter_data])
-                    y_retention = np.array([point['retention_ratio'] for point in scatter_data])
-                    
-                    # Fit polynomial regression (degree 2)
-                    # This requires X. If X is not defined, polyfit will fail.
-                    # If these curves are still desired, X must be redefined based on 'yoy_rate_change'.
-                    # Example: X_poly = np.array([point['yoy_rate_change'] for point in scatter_data])
-                    # Then use X_poly in np.polyfit.
-                    # For now, to prevent errors and keep the existing structure, we can skip polyfit if X is based on combined_expense.
-                    # However, the user summary mentioned linear trends calculated in JS, these python curves might be separate.
-                    
-                    # Temporary check: if combined_expense was the intended X, these curves can't be calculated as is.
-                    # We will skip populating them to avoid errors.
-                    # if 'combined_expense' in scatter_data[0]: # This check is now problematic as combined_expense is removed
-                    #    X = np.array([point['combined_expense'] for point in scatter_data])
-                    #    close_poly = np.polyfit(X, y_close, 2)
-                    #    retention_poly = np.polyfit(X, y_retention, 2)
-                    #    x_range = np.linspace(X.min(), X.max(), 50)
-                    #    close_curve_values = np.polyval(close_poly, x_range)
-                    #    retention_curve_values = np.polyval(retention_poly, x_range)
-                    #    for i in range(len(x_range)):
-                    #        close_ratio_curve.append({
-                    #            'x': float(round(x_range[i], 2)),
-                    #            'y': float(round(close_curve_values[i], 2))
-                    #        })
-                    #        retention_ratio_curve.append({
-                    #            'x': float(round(x_range[i], 2)),
-                    #            'y': float(round(retention_curve_values[i], 2))
-                    #        })
-                    pass # Temporarily skipping python polynomial curve calculation to avoid error with X.
-                         # These curves are separate from the linear trends in JS.
-                except Exception as e:
-                    print(f"Regression for Python polynomial curves failed: {e}")
-                    pass
-            
-            print(f"DEBUG: Close ratio curve points (Python poly): {len(close_ratio_curve)}")
-
-            chart_data['scatter_data'] = scatter_data
-            chart_data['close_ratio_curve'] = close_ratio_curve
-            chart_data['retention_ratio_curve'] = retention_ratio_curve
-            
-            print(f"DEBUG: Final scatter_data sent to template:")
-            for point in scatter_data:
-                print(f"  Year {point['year']}: osfi_interventions={point['osfi_interventions']}")
-        else:
-            chart_data = None # Explicitly set to None if no chart data
-
-        # print(f"DEBUG chart_data: {chart_data}")
-        print(f"DEBUG: Final chart_data keys: {list(chart_data.keys()) if chart_data else 'None'}")
-        if chart_data and 'scatter_data' in chart_data:
-            print(f"DEBUG: scatter_data in chart_data has {len(chart_data['scatter_data'])} points")
-        else:
-            financial_data_table = '<p>No detailed financial data to display for the selected years.</p>'
-    else:
-        financial_data_table = '<p>No financial data available.</p>'
-
     context = {
         'title': ' - Marketing / Sales Report',
         'game': game,
-        'financial_data_table': financial_data_table,
-        'has_financial_data': financial_data.exists(),
-        'unique_years': unique_years,
-        'latest_year': latest_year,
-        'selected_year': int(selected_year) if selected_year else None,  # Convert selected_year to int if it's not None
+        **analytics.reports.mktgsales_report(game, user, selected_year, game_ctx.force_term),
         'is_novice_game': is_novice_game,
-        'chart_data': chart_data,
         'initial_chart_style': initial_chart_style,
         'initial_table_style': initial_table_style,
     }
@@ -1000,28 +392,12 @@ def mktgsales_report(request, game_id):
 
 
 @login_required()
-def financials_report(request, game_id):
+@game_view
+def financials_report(request, game_id, game_ctx):
     user = request.user
-    game = get_object_or_404(IndivGames, Q(game_id=game_id))
-
-    players_list = game.players.all()
-    human_players = []
-    for player in players_list:
-        if player.player_type == 'user':
-            human_players.append(player.player_name)
-    if game.game_observable is False and user.username not in human_players:
-        raise Http404("You are not permitted to view the game.")
+    game = game_ctx.game
 
-    financial_data_table = '<p>No financial data available.</p>'  # Ensure always defined
-
-    # Determine if this is a novice game
-    is_novice_game = False
-    try:
-        game_prefs = GamePrefs.objects.get(user=game.initiator)
-        if game_prefs.game_difficulty == 'Novice':
-            is_novice_game = True
-    except GamePrefs.DoesNotExist:
-        pass
+    is_novice_game = game_ctx.is_novice_game
 
     # Determine initial styles based on game difficulty
     if is_novice_game:
@@ -1031,9 +407,6 @@ def financials_report(request, game_id):
         initial_chart_style = "display: none;"
         initial_table_style = "display: block;"
 
-    financial_data = Financials.objects.filter(game_id=game, player_id=user)
-    unique_years = financial_data.order_by('-year').values_list('year', flat=True).distinct()
-    latest_year = unique_years[0] if unique_years else None
     template_name = 'Pricing/financials_report.html'
 
     # Check for 'Back to Game Select' POST request
@@ -1043,158 +416,10 @@ def financials_report(request, game_id):
     selected_year = request.GET.get('year')  # Get the selected year from the query parameters
     selected_year = int(selected_year) if selected_year else None
 
-
-    if unique_years:  # Proceed if there are any financial years available
-        # Querying the database
-        financial_data_list = list(
-            financial_data.values('year', 'written_premium', 'inv_income', 'in_force',  'annual_expenses',
-                                  'ay_losses', 'py_devl', 'profit', 'dividend_paid',
-                                  'capital', 'capital_ratio', 'capital_test'))  # add more fields as necessary
-
-        # Creating a DataFrame from the obtained data
-        df = pd.DataFrame(financial_data_list)
-
-        # --- CHART DATA PREPARATION ---
-        chart_data = None
-        if not df.empty:
-            # Prepare chart data for the last 20 years (most recent on the left)
-            chart_years = sorted(df['year'].unique(), reverse=True)[:20]
-            chart_years = list(chart_years)
-            chart_years.sort(reverse=True)  # Most recent first (left side)
-            chart_df = df[df['year'].isin(chart_years)].copy()
-            chart_df = chart_df.sort_values('year', ascending=False)  # Most recent first
-            # Fill missing values with 0 for charting
-            chart_df['written_premium'] = pd.to_numeric(chart_df['written_premium'], errors='coerce').fillna(0)
-            chart_df['capital'] = pd.to_numeric(chart_df['capital'], errors='coerce').fillna(0)
-            chart_df['profit'] = pd.to_numeric(chart_df['profit'], errors='coerce').fillna(0)
-            chart_df['dividend_paid'] = pd.to_numeric(chart_df['dividend_paid'], errors='coerce').fillna(0)
-            
-            # Calculate year-over-year change in written premium
-            chart_df = chart_df.sort_values('year')  # Ensure proper ordering for diff calculation
-            chart_df['premium_change'] = chart_df['written_premium'].diff().fillna(0)
-            
-            # Sort back to reverse order (most recent first) for display
-            chart_df = chart_df.sort_values('year', ascending=False)
-            
-            chart_data = {
-                'years': chart_df['year'].tolist(),
-                'written_premium': chart_df['written_premium'].tolist(),
-                'premium_change': chart_df['premium_change'].tolist(),
-                'capital': chart_df['capital'].tolist(),
-                'profitability': chart_df['profit'].tolist(),
-                'dividends': chart_df['dividend_paid'].tolist(),
-                'mct_test': chart_df['capital_test'].tolist()
-            }
-        # ... existing code ...
-        if not df.empty:
-            if selected_year not in unique_years:
-                selected_year = latest_year
-                # Filter out only the rows belonging to the latest four years
-            all_data_years = df['year'].unique()  # Get all unique years
-            all_data_years = sorted(all_data_years, reverse=True)  # Sort and pick the latest four years
-            selected_years = sorted([yr for yr in all_data_years if yr <= selected_year], reverse=True)[:4]
-            df = df.sort_values('year', ascending=False)
-
-            # Creating a copy of the filtered DataFrame
-            df_latest = df[df['year'].isin(selected_years)].copy()
-
-            # Renaming columns without 'inplace=True'
-            df_latest.rename(columns={"year": "Year"}, inplace=True)
-
-            transposed_df = df_latest.set_index('Year').T  # Set 'year' as index before transposing
-            # Now, we'll go through each row in the transposed DataFrame, rename it, and apply specific formatting
-            for index, row in transposed_df.iterrows():
-                if index == 'written_premium':
-                    # Rename and format the 'written_premium' row
-                    new_row_name = 'Written Premium'
-                    transposed_df.loc[index] = row.apply(
-                        lambda x: f"${round(x):,}")  # formatting as currency without decimals
-                elif index == 'in_force':
-                    # Rename and format the 'in_force' row
-                    new_row_name = get_force_term(game)
-                    transposed_df.loc[index] = row.apply(lambda x: f"{int(x):,}")  # formatting as an integer
-                elif index == 'inv_income':
-                    # Rename and format the 'in_force' row
-                    new_row_name = 'Investment Income'
-                    transposed_df.loc[index] = row.apply(lambda x: f"${round(x):,}")  # formatting as an integer
-                elif index == 'annual_expenses':
-                    # Rename and format the 'in_force' row
-                    new_row_name = 'Expenses'
-                    transposed_df.loc[index] = row.apply(lambda x: f"${round(x):,}")  # formatting as an integer
-                elif index == 'ay_losses':
-                    # Rename and format the 'in_force' row
-                    new_row_name = 'Acc Yr Claims Incurred'
-                    transposed_df.loc[index] = row.apply(lambda x: f"${round(x):,}")  # formatting as an integer
-                elif index == 'py_devl':
-                    # Rename and format the 'in_force' row
-                    new_row_name = 'Prior Yr Development'
-                    transposed_df.loc[index] = row.apply(lambda x: f"${round(x):,}")  # formatting as an integer
-                elif index == 'profit':
-                    # Rename and format the 'in_force' row
-                    new_row_name = 'Profit'
-                    transposed_df.loc[index] = row.apply(lambda x: f"${round(x):,}")  # formatting as an integer
-                elif index == 'dividend_paid':
-                    # Rename and format the 'in_force' row
-                    new_row_name = 'Dividend Paid'
-                    transposed_df.loc[index] = row.apply(lambda x: f"${round(x):,}")  # formatting as an integer
-                elif index == 'capital':
-                    # Rename and format the 'in_force' row
-                    new_row_name = 'Ending Capital'
-                    transposed_df.loc[index] = row.apply(lambda x: f"${round(x):,}")  # formatting as an integer
-                elif index == 'capital_ratio':
-                    # Rename and format the 'in_force' row
-                    new_row_name = 'MCT Ratio'
-                    transposed_df.loc[index] = row.apply(lambda x: f"{round(x * 100, 1)}%")  # formatting as an integer
-                elif index == 'capital_test':
-                    # Rename and format the 'in_force' row
-                    new_row_name = 'MCT Test'
-
-                # Apply renaming to make the index/rows human-readable
-                transposed_df.rename(index={index: new_row_name}, inplace=True)
-
-            selected_columns = [col for col in transposed_df.columns if int(col) <= selected_year]
-            transposed_df = transposed_df[selected_columns]
-            # Convert the final, formatted DataFrame to HTML for rendering
-            if len(transposed_df.columns) < 4:
-                # If there are fewer than four years of data, we'll simulate the rest as empty columns
-                missing_years = 4 - len(transposed_df.columns)
-                for i in range(missing_years):
-                    transposed_df[f'{min(selected_columns) - i - 1} '] = ['' for _ in range(len(transposed_df.index))]
-
-            index = 2
-            blank_row = pd.DataFrame([['' for _ in transposed_df.columns]], columns=transposed_df.columns)
-            transposed_df = pd.concat([transposed_df.iloc[:index], blank_row, transposed_df.iloc[index:]])
-            transposed_df.index = transposed_df.index.where(transposed_df.index != 0, ' ')
-            index = 4
-            transposed_df = pd.concat([transposed_df.iloc[:index], blank_row, transposed_df.iloc[index:]])
-            transposed_df.index = transposed_df.index.where(transposed_df.index != 0, ' ')
-            index = 8
-            transposed_df = pd.concat([transposed_df.iloc[:index], blank_row, transposed_df.iloc[index:]])
-            transposed_df.index = transposed_df.index.where(transposed_df.index != 0, ' ')
-            index = 11
-            transposed_df = pd.concat([transposed_df.iloc[:index], blank_row, transposed_df.iloc[index:]])
-            transposed_df.index = transposed_df.index.where(transposed_df.index != 0, ' ')
-            index = 13
-            transposed_df = pd.concat([transposed_df.iloc[:index], blank_row, transposed_df.iloc[index:]])
-            transposed_df.index = transposed_df.index.where(transposed_df.index != 0, ' ')
-
-            financial_data_table = transposed_df.to_html(classes='my-financial-table', border=0, justify='initial',
-                                                         index=True)
-        else:
-            financial_data_table = '<p>No detailed financial data to display for the selected years.</p>'
-    else:
-        financial_data_table = '<p>No financial data available.</p>'
-        chart_data = None
-
     context = {
         'title': ' - Financial Report',
         'game': game,
-        'financial_data_table': financial_data_table,
-        'has_financial_data': financial_data.exists(),
-        'unique_years': unique_years,
-        'latest_year': latest_year,
-        'selected_year': int(selected_year) if selected_year else None,  # Convert selected_year to int if it's not None
-        'chart_data': chart_data,
+        **analytics.reports.financials_report(game, user, selected_year, game_ctx.force_term),
         'is_novice_game': is_novice_game,
         'initial_chart_style': initial_chart_style,
         'initial_table_style': initial_table_style,
@@ -1203,351 +428,44 @@ def financials_report(request, game_id):
 
 
 @login_required()
-def industry_reports(request, game_id):
-    user = request.user
-    game = get_object_or_404(IndivGames, Q(game_id=game_id))
-    players_list = game.players.all()
-    human_players = []
-    for player in players_list:
-        if player.player_type == 'user':
-            human_players.append(player.player_name)
-    if game.game_observable is False and user.username not in human_players:
-        raise Http404("You are not permitted to view the game.")
-
+@game_view
+def industry_reports(request, game_id, game_ctx):
+    game = game_ctx.game
 
     # Check for 'Back to Game Select' POST request
     if request.POST.get('Back to Dashboard') == 'Back to Dashboard':
         return redirect('Pricing-game_dashboard', game_id=game_id)
 
-    # Handle GET request for year selection (from dropdown)
-    if request.method == 'GET':
-        selected_year = request.GET.get('year')
-    else:
-        selected_year = request.POST.get('year')
-    
-    selected_year = int(selected_year) if selected_year else None
-    curr_pos = request.session.get('curr_pos', 0)
+    # The page is a shell: the table and chart of the selected year are fetched from report_data
+    selected_year = request.GET.get('year')
+    selected_year = int(selected_year) if selected_year and selected_year.isdigit() else None
 
     template_name = 'Pricing/industry_reports.html'
 
-    all_data = Industry.objects.filter(game_id=game)
-    unique_years = all_data.order_by('-year').values_list('year', flat=True).distinct()
+    version, unique_years = report_index(game_ctx, 'industry')
     latest_year = unique_years[0] if unique_years else None
-
-    ordered_data = all_data.order_by('id', 'player_name')
-
-    # Keep track of the players you've already seen
-    seen_players = set()
-    distinct_players = []
-
-    # Iterate over the ordered queryset
-    for entry in ordered_data:
-        player_name = entry.player_name
-        if player_name not in seen_players:
-            distinct_players.append(player_name)
-            seen_players.add(player_name)
-
-    default_player_id = None
-    player_id_list = []
-    player_list = []
-    if request.user.username in distinct_players:
-        distinct_players.remove(request.user.username)
-    distinct_players.insert(0, request.user.username)
-    for count_id, unique_player in enumerate(distinct_players):
-        player_name = f"{unique_player}"
-        if unique_player == request.user.username:
-            default_player_id = count_id
-        player_list.append(player_name)
-        player_id_list.append(count_id)
-
-    max_pos = max(len(player_id_list) - 4, 0)
-
-    # Save the updated curr_pos in the session
-    if request.session.get('selected_year', 0) != selected_year:
-        curr_pos = 0
-
-    # Update curr_pos based on Next and Last buttons
-    if request.POST.get('Next') == 'Next':
-        curr_pos = min(curr_pos + 1, max_pos)
-    if request.POST.get('Last') == 'Last':
-        curr_pos = max(curr_pos - 1, 0)
-
-    request.session['curr_pos'] = curr_pos
-
-    # Find the position of default_player_id
-    default_pos = player_id_list.index(default_player_id)
-
-    # Calculate the starting position for displayed_players
-    # It should always start with default_player_id and show next 3 players in the list
-    start_pos = max(default_pos + curr_pos, 0)
-    end_pos = min(start_pos + 4, len(player_id_list))
-
-    # Build the displayed players list starting with default_player_id
-    displayed_players = [default_player_id] + player_id_list[start_pos + 1:end_pos]
-
-    # If the list is shorter than 4, pad it with the next available players
-    while len(displayed_players) < 4 and end_pos < len(player_id_list):
-        displayed_players.append(player_id_list[end_pos])
-        end_pos += 1
-
-    # Prepare the data for displayed companies (assuming player_list is a dictionary or list)
-    companies = [player_list[player_id] for player_id in displayed_players]
-
-    industry_id = len(player_list)
-    industry_company_name = "Total Industry"
-    player_list.append(f"{industry_company_name}" )
-    player_id_list.append(len(player_id_list))
-    distinct_players.append(industry_company_name)
-
-    player_options = list(zip(player_id_list, player_list))
-
-    # Prepare chart data
-    chart_data = None
-    is_novice_game = getattr(game, 'difficulty', 'novice').lower() == 'novice'
-
-    if unique_years:  # Proceed if there are any financial years available
-        if selected_year not in unique_years:
-            selected_year = unique_years[0]
-        request.session['selected_year'] = selected_year
-        
-        # Get all company data for the selected year (excluding "Total Industry")
-        company_chart_data = Industry.objects.filter(
-            game_id=game, 
-            year=selected_year
-        ).exclude(player_name="Total Industry").values(
-            'player_name', 'written_premium', 'profit', 'capital', 
-            'annual_expenses', 'cy_losses', 'capital_test'
-        )
-        
-        if company_chart_data:
-            chart_companies = []
-            chart_written_premium = []
-            chart_profitability = []
-            chart_capital = []
-            chart_loss_ratio = []
-            chart_expense_ratio = []
-            chart_mct_failures = []
-            
-            for company in company_chart_data:
-                chart_companies.append(company['player_name'])
-                chart_written_premium.append(float(company['written_premium']))
-                chart_profitability.append(float(company['profit']))
-                chart_capital.append(float(company['capital']))
-                
-                # Calculate loss ratio
-                wp = float(company['written_premium'])
-                loss_ratio = (float(company['cy_losses']) / wp * 100) if wp > 0 else 0
-                chart_loss_ratio.append(loss_ratio)
-                
-                # Calculate expense ratio
-                expense_ratio = (float(company['annual_expenses']) / wp * 100) if wp > 0 else 0
-                chart_expense_ratio.append(expense_ratio)
-                
-                # Check MCT failure
-                is_mct_fail = company['capital_test'] in ['Fail', 'fail', 'False', False]
-                chart_mct_failures.append(is_mct_fail)
-            
-            chart_data = {
-                'companies': chart_companies,
-                'written_premium': chart_written_premium,
-                'profitability': chart_profitability,
-                'capital': chart_capital,
-                'loss_ratio': chart_loss_ratio,
-                'expense_ratio': chart_expense_ratio,
-                'mct_failures': chart_mct_failures,
-                'selected_year': selected_year,
-                'current_user': user.username
-            }
-
-        # Create a DataFrame for the total view, excluding 'capital_test' and 'capital_ratio'
-        industry_data = Industry.objects.filter(game_id=game, year=selected_year).values('year').annotate(
-            written_premium=Sum('written_premium'),
-            annual_expenses=Sum('annual_expenses'),
-            cy_losses=Sum('cy_losses'),
-            profit=Sum('profit'),
-            capital=Sum('capital')
-        )
-        industry_data_list = list(
-            industry_data.values('written_premium', 'annual_expenses',
-                            'cy_losses', 'profit',
-                            'capital'))  # add more fields as necessary
-
-        company_data = Industry.objects.filter(game_id=game, year=selected_year)
-        company_data_list = list(
-            company_data.values('player_name', 'written_premium', 'annual_expenses',
-                                'cy_losses', 'profit',
-                                'capital', 'capital_ratio', 'capital_test'))  # add more fields as necessary
-
-        # Creating a DataFrame from the obtained data
-        industry_df = pd.DataFrame(industry_data_list)
-        industry_df['player_name'] = industry_company_name
-        company_df = pd.DataFrame(company_data_list)
-
-        for column in company_df.columns:
-            if column not in industry_df.columns:
-                industry_df[column] = pd.NA
-
-        combined_df = pd.concat([company_df, industry_df], ignore_index=True)
-
-        # Reset the index of the combined dataframe
-        combined_df.reset_index(drop=True, inplace=True)
-
-        if not combined_df.empty:
-            if selected_year not in unique_years:
-                selected_year = latest_year
-                # Filter out only the rows belonging to the latest four years
-            all_data_players = combined_df['player_name'].unique()  # Get all unique players
-            all_data_players = sorted(all_data_players, reverse=False)  # Sort and pick the latest four years
-            selected_players = sorted([player for player in all_data_players], reverse=False)[:4]
-
-            # Now, we'll go through each row in the transposed DataFrame, rename it, and apply specific formatting
-            combined_df.rename(columns={"player_name": "Company"}, inplace=True)
-
-            transposed_df = combined_df.set_index('Company').T
-
-            expense_ratio_data = {}
-            loss_ratio_data = {}
-            for index, row in transposed_df.iterrows():
-                if index == 'written_premium':
-                    # Rename and format the 'written_premium' row
-                    new_row_name = 'Written Premium'
-                    transposed_df.loc[index] = row.apply(
-                        lambda x: f"${round(x):,}")  # formatting as currency without decimals
-                elif index == 'annual_expenses':
-                    # Rename and format the 'in_force' row
-                    new_row_name = 'Annual Expenses'
-                    transposed_df.loc[index] = row.apply(lambda x: f"${round(x):,}")  # formatting as an integer
-                elif index == 'cy_losses':
-                    # Rename and format the 'in_force' row
-                    new_row_name = 'Calendar Year Losses'
-                    transposed_df.loc[index] = row.apply(lambda x: f"${round(x):,}")  # formatting as an integer
-                elif index == 'profit':
-                    # Rename and format the 'in_force' row
-                    new_row_name = 'Profit'
-                    transposed_df.loc[index] = row.apply(lambda x: f"${round(x):,}")  # formatting as an integer
-                elif index == 'capital':
-                    # Rename and format the 'in_force' row
-                    new_row_name = 'Capital'
-                    transposed_df.loc[index] = row.apply(lambda x: f"${round(x):,}")  # formatting as an integer
-                elif index == 'capital_ratio':
-                    # Rename and format the 'in_force' row
-                    new_row_name = 'MCT Ratio'
-                    transposed_df.loc[index] = row.apply(lambda x: f"{round(x * 100, 1)}%")  # formatting as an integer
-                    transposed_df.loc[index][industry_company_name] = ' '
-                elif index == 'capital_test':
-                    # Rename and format the 'in_force' row
-                    new_row_name = 'MCT Test'
-                    transposed_df.loc[index][industry_company_name] = ' '
-                # Apply renaming to make the index/rows human-readable
-                transposed_df.rename(index={index: new_row_name}, inplace=True)
-            # Get displayed player names that actually exist in the DataFrame
-            displayed_players_names = [player_list[i] for i in displayed_players]
-            # Filter to only use column names that exist in the DataFrame
-            available_columns = [name for name in displayed_players_names if name in transposed_df.columns]
-            
-            # Creating a new DataFrame with only the displayed players that exist
-            if available_columns:
-                transposed_df = transposed_df[available_columns]
-            # If no columns match, continue with all columns
-
-            for player in transposed_df.columns:
-                # Convert the marketing expenses from string to float for calculation
-                wprem = float(transposed_df.at['Written Premium', player].replace('$', '').replace(',', ''))
-                annual_expenses = float(transposed_df.at['Annual Expenses', player].replace('$', '').replace(',', ''))
-                cy_losses = float(transposed_df.at['Calendar Year Losses', player].replace('$', '').replace(',', ''))
-                # canx = float(transposed_df.at['Cancellations', year].replace(',', ''))
-                #in_force = float(transposed_df.at['Beginning-In-Force', year].replace(',', ''))
-                # in_force_ind = float(transposed_df.at['Industry-In-Force', year].replace(',', ''))
-
-                # Calculate the percentage (ensuring not to divide by zero)
-                if wprem > 0:
-                    expense_ratio = (annual_expenses / wprem) * 100
-                else:
-                    expense_ratio = 0  # or None, or however you wish to represent this edge case
-
-                expense_ratio_data[player] = f"{expense_ratio:.1f}%"  # formatted to one decimal places
-
-                if wprem > 0:
-                    loss_ratio = (cy_losses / wprem) * 100
-                else:
-                    loss_ratio = 0  # or None, or however you wish to represent this edge case
-
-                loss_ratio_data[player] = f"{loss_ratio:.1f}%"  # formatted to one decimal places
-
-            expense_ratio_df = pd.DataFrame(expense_ratio_data, index=['Expense Ratio'])
-            loss_ratio_df = pd.DataFrame(loss_ratio_data, index=['Loss Ratio'])
-
-            insert_position_exp_ratio = transposed_df.index.get_loc('Annual Expenses') + 1
-            df_top_exp_ratio = transposed_df.iloc[:insert_position_exp_ratio]
-            df_bottom_exp_ratio = transposed_df.iloc[insert_position_exp_ratio:]
-            transposed_df_exp = pd.concat([df_top_exp_ratio, expense_ratio_df, df_bottom_exp_ratio])
-
-            insert_position_loss_ratio = transposed_df_exp.index.get_loc('Calendar Year Losses') + 1
-            df_top_loss_ratio = transposed_df_exp.iloc[:insert_position_loss_ratio]
-            df_bottom_loss_ratio = transposed_df_exp.iloc[insert_position_loss_ratio:]
-            transposed_df = pd.concat([df_top_loss_ratio, loss_ratio_df, df_bottom_loss_ratio])
-
-            # Convert the final, formatted DataFrame to HTML for rendering
-
-            index = 1
-            blank_row = pd.DataFrame([['' for _ in transposed_df.columns]], columns=transposed_df.columns)
-            transposed_df = pd.concat([transposed_df.iloc[:index], blank_row, transposed_df.iloc[index:]])
-            transposed_df.index = transposed_df.index.where(transposed_df.index != 0, ' ')
-            index = 4
-            transposed_df = pd.concat([transposed_df.iloc[:index], blank_row, transposed_df.iloc[index:]])
-            transposed_df.index = transposed_df.index.where(transposed_df.index != 0, ' ')
-            index = 7
-            transposed_df = pd.concat([transposed_df.iloc[:index], blank_row, transposed_df.iloc[index:]])
-            transposed_df.index = transposed_df.index.where(transposed_df.index != 0, ' ')
-            index = 11
-            transposed_df = pd.concat([transposed_df.iloc[:index], blank_row, transposed_df.iloc[index:]])
-            transposed_df.index = transposed_df.index.where(transposed_df.index != 0, ' ')
-
-            financial_data_table = transposed_df.to_html(classes='my-financial-table', border=0, justify='initial',
-                                                         index=True)
-
-        else:
-            financial_data_table = '<p>No detailed financial data to display for the selected years.</p>'
-    else:
-        financial_data_table = '<p>No financial data available.</p>'
+    if selected_year not in unique_years:
+        selected_year = latest_year
 
     context = {
         'title': ' - Industry Reports',
         'game': game,
-        'financial_data_table': financial_data_table,
-        'has_financial_data': company_data.exists(),
+        'has_financial_data': bool(unique_years),
         'unique_years': unique_years,
         'latest_year': latest_year,
         'selected_year': selected_year,
-        'player_options': player_options,
-        'chart_data': chart_data,
-        'is_novice_game': is_novice_game,
+        'report_urls': report_urls(game_id, 'industry', version, unique_years),
+        'is_novice_game': game_ctx.is_novice_game,
     }
     return render(request, template_name, context)
 
 
 @login_required()
-def valuation_report(request, game_id):
-    user = request.user
-    game = get_object_or_404(IndivGames, Q(game_id=game_id))
-    players_list = game.players.all()
-    human_players = []
-    for player in players_list:
-        if player.player_type == 'user':
-            human_players.append(player.player_name)
-    if game.game_observable is False and user.username not in human_players:
-        raise Http404("You are not permitted to view the game.")
-
-    financial_data_table = '<p>No valuation data available.</p>'  # Ensure always defined
-
-    # Determine if this is a novice game
-    is_novice_game = False
-    try:
-        game_prefs = GamePrefs.objects.get(user=game.initiator)
-        if game_prefs.game_difficulty == 'Novice':
-            is_novice_game = True
-    except GamePrefs.DoesNotExist:
-        pass
+@game_view
+def valuation_report(request, game_id, game_ctx):
+    game = game_ctx.game
+
+    is_novice_game = game_ctx.is_novice_game
 
     # Determine initial styles based on game difficulty
     if is_novice_game:
@@ -1560,244 +478,17 @@ def valuation_report(request, game_id):
     if request.POST.get('Back to Dashboard') == 'Back to Dashboard':
         return redirect('Pricing-game_dashboard', game_id=game_id)
 
-    selected_year = request.POST.get('year')  # Get the selected year from the query parameters
-    selected_year = int(selected_year) if selected_year else None
+    # The page is a shell: the table and charts of the selected year are fetched from report_data
+    selected_year = request.GET.get('year')
+    selected_year = int(selected_year) if selected_year and selected_year.isdigit() else None
 
-    curr_pos = request.session.get('curr_pos', 0)
     template_name = 'Pricing/valuation_report.html'
 
-    valuation_data = Valuation.objects.filter(game_id=game)
-    ordered_data = valuation_data.order_by('id', 'player_name')
-
-    # Keep track of the players you've already seen
-    seen_players = set()
-    distinct_players = []
-
-    # Iterate over the ordered queryset
-    for entry in ordered_data:
-        player_name = entry.player_name
-        if player_name not in seen_players:
-            distinct_players.append(player_name)
-            seen_players.add(player_name)
-
-    default_player_id = None
-    player_id_list = []
-    player_list = []
-    if request.user.username in distinct_players:
-        distinct_players.remove(request.user.username)
-    distinct_players.insert(0, request.user.username)
-    for count_id, unique_player in enumerate(distinct_players):
-        # player_name = f"{1 + count_id:02d} - {unique_player}"
-        player_name = f"{unique_player}"
-        if unique_player == request.user.username:
-            default_player_id = count_id
-        player_list.append(player_name)
-        player_id_list.append(count_id)
-
-    max_pos = max(len(player_id_list) - 4, 0)
-
-    if request.session.get('selected_year', 0) != selected_year:
-        curr_pos = 0
-
-    # Update curr_pos based on Next and Last buttons
-    if request.POST.get('Next') == 'Next':
-        curr_pos = min(curr_pos + 1, max_pos)
-    if request.POST.get('Last') == 'Last':
-        curr_pos = max(curr_pos - 1, 0)
-
-    # Save the updated curr_pos in the session
-    request.session['curr_pos'] = curr_pos
-
-    # Find the position of default_player_id
-    default_pos = player_id_list.index(default_player_id)
-
-    # Calculate the starting position for displayed_players
-    # It should always start with default_player_id and show next 3 players in the list
-    start_pos = max(default_pos + curr_pos, 0)
-    end_pos = min(start_pos + 4, len(player_id_list))
-
-    # Build the displayed players list starting with default_player_id
-    displayed_players = [default_player_id] + player_id_list[start_pos + 1:end_pos]
-
-    # If the list is shorter than 4, pad it with the next available players
-    while len(displayed_players) < 4 and end_pos < len(player_id_list):
-        displayed_players.append(player_id_list[end_pos])
-        end_pos += 1
-
-    # Prepare the data for displayed companies (assuming player_list is a dictionary or list)
-    companies = [player_list[player_id] for player_id in displayed_players]
-
-    unique_years = valuation_data.order_by('-year').values_list('year', flat=True).distinct()
-    
-    # Initialize variables
-    chart_data = None
-    valuation_period = None
-    latest_year = None
-    
-    if unique_years:  # Proceed if there are any financial years available
-        valuation_data_list = list(valuation_data.values('id', 'player_name', 'year', 'in_force', 'beg_in_force',
-                                                         'profit',
-                                                         'dividend_paid', 'excess_capital',
-                                                         'pv_index', 'inv_rate', 'irr_rate'))
-        val_df = pd.DataFrame(valuation_data_list)
-        irr_rate_scalar = val_df['irr_rate'].iloc[0]
-    # Creating a DataFrame from the obtained data
-        if not val_df.empty:
-            if selected_year not in unique_years:
-                selected_year = unique_years[0]
-            request.session['selected_year'] = selected_year
-            
-            # Continue with table data preparation (original logic)
-            val_df = val_df[val_df['year'] <= selected_year]
-            val_df = val_df.sort_values(by=['player_name', 'year'])
-            all_data_years = val_df['year'].unique()  # Get all unique years
-            latest_year = all_data_years.max()
-            earliest_year = max((latest_year - 20 + 1), all_data_years.min())
-            valuation_period = f'Utilizing estimates from period: {earliest_year} - {latest_year} '
-
-            # print(f'companies: {companies} max_pos: {max_pos} curr_pos: {curr_pos}  default_pos: {default_pos}  start_pos: {start_pos}  displayed: {displayed_players}')
-            val_df = val_df.groupby('player_name').apply(reverse_pv_index).reset_index(drop=True)
-
-            val_df['dividend_pv'] = val_df['new_pv_index'] * val_df['dividend_paid']
-            val_df['profit'] = np.where(val_df['year'] >=earliest_year, val_df['profit'], 0)
-            val_df['excess_capital'] = np.where(val_df['year'] == selected_year, val_df['excess_capital'], 0)
-            val_df['in_force'] = np.where(val_df['year'] == selected_year, val_df['in_force'], 0)
-            val_df['tot_in_force'] = np.where(val_df['year'] >= earliest_year, val_df['beg_in_force'], 0)
-            val_df['beg_in_force'] = np.where(val_df['year'] == earliest_year, val_df['beg_in_force'], 0)
-            val_df['future_value'] = 0
-            val_df['total_valuation'] = val_df['dividend_pv'] + val_df['excess_capital']
-            # df = val_df.groupby('player_name')['dividend_pv'].sum().reset_index()
-            df = val_df.groupby('player_name').agg({'in_force': 'sum',
-                                                    'beg_in_force': 'sum',
-                                                    'tot_in_force': 'sum',
-                                                    'profit': 'sum',
-                                                    'future_value': 'sum',
-                                                    'dividend_pv': 'sum', 'excess_capital': 'sum',
-                                                    'future_value': 'sum',
-                                                    'total_valuation': 'sum'}).reset_index()
-            df['capped_growth_rate'] = df.apply(lambda row: calculate_growth_rate(row, latest_year, earliest_year ), axis=1)
-            df['avg_profit'] = df.apply(lambda row: calculate_avg_profit(row,),  axis=1)
-            df['future_value'] = df.apply(lambda row: calculate_future_value(row, irr_rate_scalar), axis=1)
-            df['total_valuation'] = df['total_valuation'] + df['future_value']
-            
-            # --- CHART DATA PREPARATION (after table data is processed) ---
-            # Prepare competitive comparison chart data for all companies
-            if not df.empty and latest_year:
-                # Sort companies by total valuation (highest first) for competitive display
-                chart_df_all_companies = df.sort_values('total_valuation', ascending=False).copy()
-                
-                # Convert all decimal values to float for chart compatibility
-                chart_df_all_companies['total_valuation'] = pd.to_numeric(chart_df_all_companies['total_valuation'], errors='coerce').fillna(0).astype(float)
-                chart_df_all_companies['dividend_pv'] = pd.to_numeric(chart_df_all_companies['dividend_pv'], errors='coerce').fillna(0).astype(float)
-                chart_df_all_companies['future_value'] = pd.to_numeric(chart_df_all_companies['future_value'], errors='coerce').fillna(0).astype(float)
-                chart_df_all_companies['excess_capital'] = pd.to_numeric(chart_df_all_companies['excess_capital'], errors='coerce').fillna(0).astype(float)
-                chart_df_all_companies['in_force'] = pd.to_numeric(chart_df_all_companies['in_force'], errors='coerce').fillna(0).astype(float)
-                
-                # Prepare chart data for competitive comparison
-                chart_data = {
-                    'companies': chart_df_all_companies['player_name'].tolist(),
-                    'total_valuation': (chart_df_all_companies['total_valuation'] / 100000 * 0.1).tolist(),
-                    'dividend_pv': (chart_df_all_companies['dividend_pv'] / 100000 * 0.1).tolist(),
-                    'future_value': (chart_df_all_companies['future_value'] / 100000 * 0.1).tolist(),
-                    'excess_capital': (chart_df_all_companies['excess_capital'] / 100000 * 0.1).tolist(),
-                    'in_force': chart_df_all_companies['in_force'].tolist(),
-                    'valuation_ranks': [], # Will be populated after Valuation Rank column is created
-                    'force_term': get_force_term(game),
-                    'valuation_year': selected_year,
-                    'current_user': user.username
-                }
-            
-            # Continue with table rendering (original logic)
-            # Rename the 'player_name' column to 'Company'
-            df = df.rename(columns={'player_name': 'Company'})
-            df['Valuation Rank'] = df['total_valuation'].rank(ascending=False, method='min').astype(int)
-
-            # Update chart_data with valuation ranks now that they're available
-            if 'chart_data' in locals() and chart_data is not None:
-                # Sort companies by total valuation (highest first) for competitive display
-                chart_df_sorted = df.sort_values('total_valuation', ascending=False).copy()
-                chart_data['valuation_ranks'] = chart_df_sorted['Valuation Rank'].tolist()
-
-            filtered_df = df[df['Company'].isin(companies)]
-            filtered_df = filtered_df.drop(['tot_in_force', 'beg_in_force', 'profit'], axis=1)  # Drop unwanted columns
-            filtered_df = filtered_df.set_index('Company').loc[companies].reset_index()
-
-            transposed_df = filtered_df.T
-            transposed_df = transposed_df.rename(columns=transposed_df.iloc[0]).drop(transposed_df.index[0])
-
-            for index, row in transposed_df.iterrows():
-                if index == 'in_force':
-                    # Rename and format the 'written_premium' row
-                    new_row_name = get_force_term(game)
-                    transposed_df.loc[index] = row.apply(
-                        lambda x: f"{x:,}")  # formatting as currency without decimals
-                elif index == 'capped_growth_rate':
-                    # Rename and format the 'written_premium' row
-                    new_row_name = 'Capped Growth Rate'
-                    transposed_df.loc[index] = row.apply(
-                        lambda x: f"{100 * x:.1f}%")  # formatting as currency without decimals
-                elif index == 'avg_profit':
-                    # Rename and format the 'written_premium' row
-                    new_row_name = 'Avg Profit / Client'
-                    transposed_df.loc[index] = row.apply(
-                        lambda x: f"${round(x):,}")  # formatting as currency without decimals
-                elif index == 'future_value':
-                    # Rename and format the 'written_premium' row
-                    new_row_name = 'Future Proj Value (MM)'
-                    transposed_df.loc[index] = row.apply(
-                        lambda x: f"${.1 * round(x/100000):,.1f}")  # formatting as currency without decimals
-                elif index == 'dividend_pv':
-                    # Rename and format the 'written_premium' row
-                    new_row_name = 'P.V. Dividends (MM)'
-                    transposed_df.loc[index] = row.apply(
-                        lambda x: f"${.1 * round(x/100000):,.1f}")  # formatting as currency without decimals
-                elif index == 'excess_capital':
-                    new_row_name = f'Excess Capital (MM)'
-                    transposed_df.loc[index] = row.apply(
-                        lambda x: f"${.1 * round(x/100000):,.1f}")  # formatting as currency without decimals
-                elif index == 'total_valuation':
-                    new_row_name = 'Total Valuation (MM)'
-                    transposed_df.loc[index] = row.apply(
-                        lambda x: f"${.1 * round(x/100000):,.1f}")  # formatting as currency without decimals
-                elif index == 'Valuation Rank':
-                    new_row_name = 'Valuation Rank'
-
-                transposed_df.rename(index={index: new_row_name}, inplace=True)
-            force_term = get_force_term(game)
-            row_order = {
-                force_term: 0,
-                'Capped Growth Rate': 1,
-                'Avg Profit / Client': 2,
-                'Future Proj Value (MM)': 3,
-                'P.V. Dividends (MM)': 4,
-                'Excess Capital (MM)': 5,
-                'Total Valuation (MM)': 6,
-                'Valuation Rank': 7,
-            }
-            transposed_df['RowOrder'] = transposed_df.index.map(row_order)
-            transposed_df.sort_values(by='RowOrder', inplace=True)
-            transposed_df.drop(columns=['RowOrder'], inplace=True)
-
-            index = 3
-            blank_row = pd.DataFrame([['' for _ in transposed_df.columns]], columns=transposed_df.columns)
-            transposed_df = pd.concat([transposed_df.iloc[:index], blank_row, transposed_df.iloc[index:]])
-            transposed_df.index = transposed_df.index.where(transposed_df.index != 0, ' ')
-
-            index = 7
-            transposed_df = pd.concat([transposed_df.iloc[:index], blank_row, transposed_df.iloc[index:]])
-            transposed_df.index = transposed_df.index.where(transposed_df.index != 0, ' ')
-
-            index = 9
-            transposed_df = pd.concat([transposed_df.iloc[:index], blank_row, transposed_df.iloc[index:]])
-            transposed_df.index = transposed_df.index.where(transposed_df.index != 0, ' ')
-
-            financial_data_table = transposed_df.to_html(classes='my-financial-table', border=0, justify='initial',
-                                                         index=True)
-        else:
-            financial_data_table = '<p>No detailed financial data to display for the selected years.</p>'
-    else:
-        financial_data_table = '<p>No financial data available.</p>'
-        latest_year = None
+    version, unique_years = report_index(game_ctx, 'valuation')
+    latest_year = unique_years[0] if unique_years else None
+    if selected_year not in unique_years:
+        selected_year = latest_year
+    urls = report_urls(game_id, 'valuation', version, unique_years)
 
     if len(unique_years) > 2:
         unique_years = unique_years[0:len(unique_years)-2]
@@ -1805,13 +496,11 @@ def valuation_report(request, game_id):
     context = {
         'title': ' - Valuation Report',
         'game': game,
-        'financial_data_table': financial_data_table,
-        'has_financial_data': valuation_data.exists(),
+        'has_financial_data': bool(unique_years),
         'unique_years': unique_years,
         'latest_year': latest_year,
         'selected_year': selected_year,
-        'valuation_period': valuation_period,
-        'chart_data': chart_data,
+        'report_urls': urls,
         'is_novice_game': is_novice_game,
         'initial_chart_style': initial_chart_style,
         'initial_table_style': initial_table_style,
@@ -1820,16 +509,79 @@ def valuation_report(request, game_id):
 
 
 @login_required()
-def claim_devl_report(request, game_id):
+@game_view
+def valuation_sensitivity(request, game_id, game_ctx):
+    """Total valuation and rank of every company over discount rates and growth caps, as JSON."""
+    game = game_ctx.game
+    ValuationLedger.sync(game)
+    unique_years = ValuationLedger.years(game)
+    if not unique_years:
+        raise Http404("No valuation data")
+    selected_year = request.GET.get('year')
+    selected_year = int(selected_year) if selected_year and selected_year.isdigit() else None
+    if selected_year not in unique_years:
+        selected_year = unique_years[0]
+    return JsonResponse(ValuationLedger.sensitivity(game, selected_year))
+
+
+# Layout version of the report_data payload; its URLs carry it so a change of shape is a new URL
+REPORT_API_VERSION = 1
+
+
+def report_index(game_ctx, report):
+    """The data version and years (newest first) of one of the game-wide reports, looked up once per request."""
+    _, index = analytics.reports.GAME_REPORTS[report]
+    return game_ctx.year_memo(None, ('report-index', report), lambda: index(game_ctx.game))
+
+
+def report_urls(game_id, report, version, years):
+    """report_data URLs of each year, keyed by year; the data version makes them safe to cache."""
+    return {year: reverse('Pricing-report_data', args=[REPORT_API_VERSION, game_id, report, year]) + f'?v={version}'
+            for year in years}
+
+
+def report_data_etag(request, game_id, game_ctx, api_version, report, year):
+    if report not in analytics.reports.GAME_REPORTS:
+        return None
+    version, _ = report_index(game_ctx, report)
+    return f'"{api_version}-{report}-{game_id}-{version}-{year}-{game_ctx.force_term}-{request.user.username}"'
+
+
+@login_required()
+@game_view
+@cache_control(private=True, max_age=GAME_REPORT_CACHE_TIMEOUT)
+@condition(etag_func=report_data_etag)
+def report_data(request, game_id, game_ctx, api_version, report, year):
+    """One year of a game-wide report as JSON: every company's formatted table cells and the chart data.
+
+    The report pages are shells that fetch this for the selected year.  Their URLs carry the report's
+    data version, so the browser cache answers a year already seen until the game's data changes;
+    after that the ETag still turns an unchanged report into a 304.
+    """
+    if api_version != REPORT_API_VERSION or report not in analytics.reports.GAME_REPORTS:
+        raise Http404("Unknown report")
+    version, years = report_index(game_ctx, report)
+    if year not in years:
+        raise Http404("No report data for the year")
+    lookup, _ = analytics.reports.GAME_REPORTS[report]
+    _, game_report = lookup(game_ctx.game, year, game_ctx.force_term)
+    return JsonResponse(dict(game_report.as_dict(request.user), api_version=REPORT_API_VERSION, report=report,
+                             version=version))
+
+
+@login_required()
+def cache_status(request):
+    """This worker's report cache and warm-up counters, for staff."""
+    if not request.user.is_staff:
+        raise Http404("Not found")
+    return JsonResponse({'cache': cache_stats(), 'warmup': report_warmer.metrics.snapshot()})
+
+
+@login_required()
+@game_view
+def claim_devl_report(request, game_id, game_ctx):
     user = request.user
-    game = get_object_or_404(IndivGames, Q(game_id=game_id))
-    players_list = game.players.all()
-    human_players = []
-    for player in players_list:
-        if player.player_type == 'user':
-            human_players.append(player.player_name)
-    if game.game_observable is False and user.username not in human_players:
-        raise Http404("You are not permitted to view the game.")
+    game = game_ctx.game
 
     if request.POST.get('Back to Dashboard') == 'Back to Dashboard':
         return redirect('Pricing-game_dashboard', game_id=game_id)
@@ -1855,7 +607,7 @@ def claim_devl_report(request, game_id):
     unique_years = triangle_data.order_by('-year').values_list('year', flat=True).distinct()
     if unique_years:  # Proceed if there are any financial years available
         triangle_data_list = list(triangle_data.values('id', 'player_name', 'year', 'triangles'))
-        triangle_df = pd.DataFrame(triangle_data_list)
+        triangle_df = analytics.pd.DataFrame(triangle_data_list)
 
     # Creating a DataFrame from the obtained data
         if not triangle_df.empty:
@@ -1872,74 +624,31 @@ def claim_devl_report(request, game_id):
             covg = ['paid_bi', 'paid_cl', 'paid_to'][selected_coverage]
             incd_covg = ['incd_bi', 'incd_cl', 'incd_to'][selected_coverage]
 
-            df = pd.DataFrame(columns=acc_yrs, index=devl_mths)
-            incd_df = copy.deepcopy(df)
-
-            for i, devl_mth in enumerate(devl_mths):
-                df.loc[devl_mth] = claim_data[covg][i]
-                incd_df.loc[devl_mth] = claim_data[incd_covg][i]
-
-            transposed_df = df.T
-            transposed_incd_df = incd_df.T
-            transposed_incd_df.iloc[3, 2] = 0
-            transposed_incd_df.iloc[4, 1] = 0
-            transposed_incd_df.iloc[4, 2] = 0
-
-            transposed_booked_error_df = copy.deepcopy(incd_df.T).iloc[0:3, :]
-            transposed_booked_error_df.iloc[0:3, 0] = transposed_booked_error_df.iloc[0:3, 0] / transposed_booked_error_df.iloc[0:3, 2] - 1
-            transposed_booked_error_df.iloc[0:3, 1] = transposed_booked_error_df.iloc[0:3, 1] / transposed_booked_error_df.iloc[0:3, 2] - 1
-            transposed_booked_error_df.iloc[0:3, 2] = -99999999
-            transposed_booked_error_df.columns = [str(int(col)) if col < 36 else '' for col in transposed_booked_error_df.columns]
-            transposed_booked_error_df_fmt = transposed_booked_error_df.map(lambda x: '' if x == -99999999 else '{:,.1f}%'.format(100*x))
-
-            fact_labels = ['Age-to-Age']
-            fact_devl_mths = copy.deepcopy(devl_mths)
-            fact_devl_mths[0] = None
-            fact_df = pd.DataFrame(columns=fact_labels, index=fact_devl_mths)
-
-            for i, fact_devl_mth in enumerate(fact_devl_mths):
-                if fact_devl_mth == fact_devl_mths[0]:
-                    fact_df.iloc[0, 0] = 0
-                if fact_devl_mth == fact_devl_mths[1]:
-                    numerator = sum(transposed_df.values[0:len(acc_yrs[:-1])][:, 1])
-                    denominator = sum(transposed_df.values[0:len(acc_yrs[:-1])][:, 0])
-                    if denominator == 0:
-                        denominator = 1
-                    fact_df.iloc[1, 0] = numerator / denominator
-                if fact_devl_mth == fact_devl_mths[2]:
-                    numerator = sum(transposed_df.values[0:len(acc_yrs[:-2])][:, 2])
-                    denominator = sum(transposed_df.values[0:len(acc_yrs[:-2])][:, 1])
-                    if denominator == 0:
-                        denominator = 1
-                    fact_df.iloc[2, 0] = numerator / denominator
-
-            fact_transposed_df = fact_df.T
-            fact_transposed_df.columns = [str(int(col)) if pd.notna(col) else '' for col in fact_transposed_df.columns]
-            fact_transposed_df_fmt = fact_transposed_df.map(lambda x: '' if x == 0 else '{:,.3f}'.format(x))
-            fact_transposed_df_fmt.iloc[0, 1] = '<span class="red-text">' + fact_transposed_df_fmt.iloc[0, 1] + '</span>'
-            fact_transposed_df_fmt.iloc[0, 2] = '<span class="red-text">' + fact_transposed_df_fmt.iloc[0, 2] + '</span>'
-            # project to ultimate
-            transposed_df.iloc[3, 2] = transposed_df.iloc[3, 1] * fact_df.iloc[2, 0]
-            transposed_df.iloc[4, 1] = transposed_df.iloc[4, 0] * fact_df.iloc[1, 0]
-            transposed_df.iloc[4, 2] = transposed_df.iloc[4, 1] * fact_df.iloc[2, 0]
-            transposed_df_fmt = transposed_df.map(lambda x: '' if x == 0 else '{:,.0f}'.format(x))
-            transposed_incd_df_fmt = transposed_incd_df.map(lambda x: '' if x == 0 else '{:,.0f}'.format(x))
-
-            transposed_df_fmt.iloc[3, 2] = '<span class="red-text">' + transposed_df_fmt.iloc[3, 2] + '</span>'
-            transposed_df_fmt.iloc[4, 1] = '<span class="red-text">' + transposed_df_fmt.iloc[4, 1] + '</span>'
-            transposed_df_fmt.iloc[4, 2] = '<span class="red-text">' + transposed_df_fmt.iloc[4, 2] + '</span>'
-
-            paid_data_table = transposed_df_fmt.to_html(classes='my-financial-table', border=0, justify='initial',
-                                                 index=True, escape=False)
-
-            incd_data_table = transposed_incd_df_fmt.to_html(classes='my-financial-table', border=0, justify='initial',
-                                                        index=True, escape=False)
-
-            factor_data_table = fact_transposed_df_fmt.to_html(classes='my-financial-table', border=0, justify='initial',
-                                                    index=True, escape=False)
-
-            booked_error_data_table = transposed_booked_error_df_fmt.to_html(classes='my-financial-table', border=0, justify='initial',
-                                                    index=True, escape=False)
+            ladder = analytics.ChainLadder(claim_data[covg])
+            projected_cells = ~ladder.observed
+
+            def amount(x):
+                return '' if x == 0 else '{:,.0f}'.format(x)
+
+            # projected cells are shown in red
+            paid_table = ReportTable(devl_mths, [
+                (acc_yr, [f'<span class="red-text">{amount(x)}</span>' if projected else amount(x)
+                          for x, projected in zip(row, projected_row)])
+                for acc_yr, row, projected_row in zip(acc_yrs, ladder.projected, projected_cells)])
+            incd_table = ReportTable(devl_mths, [
+                (acc_yr, [amount(x) for x in row])
+                for acc_yr, row in zip(acc_yrs, ladder.observed_only(claim_data[incd_covg]))])
+            factor_table = ReportTable([''] + devl_mths[1:], [
+                ('Age-to-Age', [''] + ['<span class="red-text">' + '{:,.3f}'.format(x) + '</span>'
+                                       for x in ladder.age_to_age])])
+            booked_error_table = ReportTable(devl_mths[:-1] + [''], [
+                (acc_yr, ['{:,.1f}%'.format(100*x) for x in row] + [''])
+                for acc_yr, row in zip(acc_yrs, ladder.booked_error(claim_data[incd_covg]))])
+
+            paid_data_table = paid_table.html(escape=False)
+            incd_data_table = incd_table.html(escape=False)
+            factor_data_table = factor_table.html(escape=False)
+            booked_error_data_table = booked_error_table.html(escape=False)
         else:
             paid_data_table = '<p>No detailed financial data to display for the selected years.</p>'
             incd_data_table = None
@@ -1971,16 +680,10 @@ def claim_devl_report(request, game_id):
 
 
 @login_required()
-def claim_trend_report(request, game_id):
+@game_view
+def claim_trend_report(request, game_id, game_ctx):
     user = request.user
-    game = get_object_or_404(IndivGames, Q(game_id=game_id))
-    players_list = game.players.all()
-    human_players = []
-    for player in players_list:
-        if player.player_type == 'user':
-            human_players.append(player.player_name)
-    if game.game_observable is False and user.username not in human_players:
-        raise Http404("You are not permitted to view the game.")
+    game = game_ctx.game
 
     if request.POST.get('Back to Dashboard') == 'Back to Dashboard':
         return redirect('Pricing-game_dashboard', game_id=game_id)
@@ -2003,233 +706,51 @@ def claim_trend_report(request, game_id):
     template_name = 'Pricing/claim_trend_report.html'
 
     triangle_data = Triangles.objects.filter(game_id=game, player_id=user)
-    financial_data = Financials.objects.filter(game_id=game, player_id=user)
-    claimtrend_data = ClaimTrends.objects.filter(game_id=game)
 
-    unique_years = triangle_data.order_by('-year').values_list('year', flat=True).distinct()
+    unique_years = list(triangle_data.order_by('-year').values_list('year', flat=True).distinct())
+    analysis = None
+    latest_year = unique_years[0] if unique_years else None
     if unique_years:  # Proceed if there are any financial years available
-        financial_data_list = list(financial_data.values('year', 'in_force', 'clm_bi', 'clm_cl'))
-        financial_df = pd.DataFrame(financial_data_list)
-        triangle_data_list = list(triangle_data.values('id', 'player_name', 'year', 'triangles'))
-        triangle_df = pd.DataFrame(triangle_data_list)
-
-
-    # Creating a DataFrame from the obtained data
-        if not triangle_df.empty:
-            all_data_years = triangle_df['year'].unique()  # Get all unique years
-            latest_year = all_data_years.max()
-            if selected_year not in unique_years:
-                selected_year = unique_years[0]
-            triangle_df = triangle_df[triangle_df['year'] == selected_year].reset_index(drop=True)
-            financial_df = financial_df[financial_df['year'] > (selected_year - 5)]
-            financial_df = financial_df.sort_values('year', ascending=True)
-            claimtrend_obj = claimtrend_data.filter(year=selected_year).first()
-            if claimtrend_obj:
-                claimtrend_dict = claimtrend_obj.claim_trends
-
-            claim_data = triangle_df['triangles'][0]['triangles']
-            clm_yrs = [acc_yr for acc_yr in claim_data['acc_yrs']]
-            acc_yrs = [f'Acc Yr {acc_yr}' for acc_yr in claim_data['acc_yrs']]
-            devl_mths = [(yr + 1)*12 for yr in claim_data['devl_yrs']]
-            covg = ['paid_bi', 'paid_cl', 'paid_to'][selected_coverage]
-
-            reform_fact = []
-            for yr in reversed(clm_yrs):
-                if selected_coverage == 2:
-                    reform_fact.append(claimtrend_dict['bi_reform'][f'{yr}'] or claimtrend_dict['cl_reform'][f'{yr}'])
-                elif selected_coverage == 1:
-                    reform_fact.append(claimtrend_dict['cl_reform'][f'{yr}'])
-                elif selected_coverage == 0:
-                    reform_fact.append(claimtrend_dict['bi_reform'][f'{yr}'])
-
-            df = pd.DataFrame(columns=acc_yrs, index=devl_mths)
-            for i, devl_mth in enumerate(devl_mths):
-                df.loc[devl_mth] = claim_data[covg][i]
-
-            transposed_df = df.T
-
-            fact_labels = ['Age-to-Age']
-            fact_devl_mths = copy.deepcopy(devl_mths)
-            fact_devl_mths[0] = None
-            fact_df = pd.DataFrame(columns=fact_labels, index=fact_devl_mths)
-
-            for i, fact_devl_mth in enumerate(fact_devl_mths):
-                if fact_devl_mth == fact_devl_mths[0]:
-                    fact_df.iloc[0, 0] = 0
-                if fact_devl_mth == fact_devl_mths[1]:
-                    numerator = sum(transposed_df.values[0:len(acc_yrs[:-1])][:, 1])
-                    denominator = sum(transposed_df.values[0:len(acc_yrs[:-1])][:, 0])
-                    if denominator == 0:
-                        denominator = 1
-                    fact_df.iloc[1, 0] = numerator / denominator
-                if fact_devl_mth == fact_devl_mths[2]:
-                    numerator = sum(transposed_df.values[0:len(acc_yrs[:-2])][:, 2])
-                    denominator = sum(transposed_df.values[0:len(acc_yrs[:-2])][:, 1])
-                    if denominator == 0:
-                        denominator = 1
-                    fact_df.iloc[2, 0] = numerator / denominator
-                    fact_df.iloc[1, 0] = fact_df.iloc[1, 0] * fact_df.iloc[2, 0]
-
-            cols = ['Actual Paid', 'Devl Factor', 'Ultimate Incurred', get_force_term(game), 'Loss Cost', 'Claim Count', 'Frequency', 'Severity', 'Product Reform']
-            proj_cols = ['Est Loss Cost', 'Est LC Trend', 'Est LC Reform', 'Est Frequency', 'Est Freq Trend',
-                         'Est Freq Reform', 'Est Severity', 'Est Sev Trend', 'Est Sev Reform']
-            display_yrs = [f'Acc Yr {acc_yr}' for acc_yr in claim_data['acc_yrs']]
-            display_yrs.reverse()
-            proj_display_yrs = copy.deepcopy(display_yrs)
-            proj_display_yrs.insert(0, f'Est Acc Yr {max(claim_data["acc_yrs"]) + 1}')
-            display_df = pd.DataFrame(columns=display_yrs, index=cols)
-            display_df_fmt = pd.DataFrame(columns=display_yrs, index=cols)
-
-            proj_display_df = pd.DataFrame(columns=proj_display_yrs, index=proj_cols)
-            proj_display_df_fmt = pd.DataFrame(columns=proj_display_yrs, index=proj_cols)
-            i = 0
-            est_values = dict()
-            for categ, row in display_df.iterrows():
-                if categ == 'Actual Paid':
-                    for j in range(len(acc_yrs)):
-                        display_df.iloc[i, j] = df.iloc[min(j, len(devl_mths) - 1), len(acc_yrs) - j - 1]
-                    display_df_fmt.iloc[i] = display_df.iloc[i].map(lambda x: '' if x == 0 else '${:,.0f}'.format(x))
-                elif categ == 'Devl Factor':
-                    for k in range(len(acc_yrs)):
-                        if k < 2:
-                            display_df.iloc[i, k] = fact_df.iloc[k + 1].values[0]
-                        else:
-                            display_df.iloc[i, k] = 1
-                    display_df_fmt.iloc[i] = display_df.iloc[i].map(lambda x: '' if x == 0 else '{:,.3f}'.format(x))
-                elif categ == 'Ultimate Incurred':
-                    for l in range(len(acc_yrs)):
-                        display_df.iloc[i, l] = display_df.iloc[i - 2, l] * display_df.iloc[i - 1, l]
-                    display_df_fmt.iloc[i] = display_df.iloc[i].map(lambda x: '' if x == 0 else '${:,.0f}'.format(x))
-                elif categ == get_force_term(game):
-                    for m in range(len(acc_yrs)):
-                        display_df.iloc[i, m] = financial_df.iloc[len(financial_df) - m - 1 - (max(unique_years) - selected_year), 1]
-                    display_df_fmt.iloc[i] = display_df.iloc[i].map(lambda x: '' if x == 0 else '{:,.0f}'.format(x))
-                elif categ == 'Loss Cost':
-                    for n in range(len(acc_yrs)):
-                        denom = display_df.iloc[i - 1, n]
-                        if denom != 0:
-                            display_df.iloc[i, n] = decimal.Decimal(display_df.iloc[i - 2, n]) / denom
-                        else:
-                            display_df.iloc[i, n] = 0
-                    lcost = [(clm_yrs[len(clm_yrs) - q - 1], float(lc)) for q, lc in enumerate(display_df.iloc[i].values)]
-                    est_values['reform'], est_values['proj_lcost_est'], est_values['proj_lcost'] = perform_logistic_regression(lcost, reform_fact)
-                    display_df_fmt.iloc[i] = display_df.iloc[i].map(lambda x: '' if x == 0 else '${:,.2f}'.format(x))
-                elif categ == 'Claim Count':
-                    for o in range(len(acc_yrs)):
-                        if selected_coverage in [1, 2]: # collision or total
-                            display_df.iloc[i, o] = financial_df.iloc[len(financial_df) - o - 1 - (max(unique_years) - selected_year), 3]
-                        else:
-                            display_df.iloc[i, o] = financial_df.iloc[len(financial_df) - o - 1 - (max(unique_years) - selected_year), 2]
-                    display_df_fmt.iloc[i] = display_df.iloc[i].map(lambda x: '' if x == 0 else '{:,.0f}'.format(x))
-                elif categ == 'Frequency':
-                    for p in range(len(acc_yrs)):
-                        denom = display_df.iloc[i - 3, p]
-                        if denom != 0:
-                            display_df.iloc[i, p] = 100 * decimal.Decimal(display_df.iloc[i - 1, p]) / denom
-                        else:
-                            display_df.iloc[i, p] = 0
-                    freq = [(clm_yrs[len(clm_yrs) - q - 1], float(freq)) for q, freq in enumerate(display_df.iloc[i].values)]
-                    _, est_values['proj_freq_est'], est_values['proj_freq'] = perform_logistic_regression(freq, reform_fact)
-                    display_df_fmt.iloc[i] = display_df.iloc[i].map(lambda x: '' if x == 0 else '{:,.1f}%'.format(x))
-                elif categ == 'Severity':
-                    for q in range(len(acc_yrs)):
-                        denom = display_df.iloc[i - 2, q]
-                        if denom != 0:
-                            display_df.iloc[i, q] = decimal.Decimal(display_df.iloc[i - 5, q]) / denom
-                        else:
-                            display_df.iloc[i, q] = 0
-                    sev = [(clm_yrs[len(clm_yrs) - q - 1], float(sev)) for q, sev in enumerate(display_df.iloc[i].values)]
-                    _, est_values['proj_sev_est'], est_values['proj_sev'] = perform_logistic_regression(sev, reform_fact)
-                    display_df_fmt.iloc[i] = display_df.iloc[i].map(lambda x: '' if x == 0 else '${:,.2f}'.format(x))
-                elif categ == 'Product Reform':
-                    for r in range(len(acc_yrs)):
-                        if reform_fact[r] == 1: # note that reform fact not reversed (this is done in prediction util)
-                            display_df.iloc[i, r] = '<span class="red-text">' + 'Yes' + '</span>'
-                        else:
-                            display_df.iloc[i, r] = '<span class="blue-text">' + 'No' + '</span>'
-                    display_df_fmt.iloc[i] = display_df.iloc[i]
-                i += 1
-
-            z = 0
-            for categ, row in proj_display_df.iterrows():
-                if categ == 'Est Loss Cost':
-                    for j in range(len(acc_yrs) + 1):
-                        proj_display_df.iloc[z, j] = est_values['proj_lcost'][len(acc_yrs) - j]
-                    proj_display_df_fmt.iloc[z] = proj_display_df.iloc[z].map(lambda x: '' if x == 0 else '${:,.2f}'.format(x))
-                elif categ == 'Est LC Trend':
-                    proj_display_df.iloc[z] = 0
-                    proj_display_df.iloc[z, 0] = est_values['proj_lcost_est'][0]
-                    proj_display_df_fmt.iloc[z] = proj_display_df.iloc[z].map(lambda x: '' if x == 0 else '{:,.1f}%'.format(100*x))
-                elif categ == 'Est LC Reform':
-                    proj_display_df.iloc[z] = 0
-                    if est_values['reform']:
-                        proj_display_df.iloc[z, 0] = est_values['proj_lcost_est'][1]
-                        proj_display_df_fmt.iloc[z] = proj_display_df.iloc[z].map(lambda x: '' if x == 0 else '{:,.1f}%'.format(100 * x))
-                    else:
-                        proj_display_df.iloc[z, 0] = 'N/A'
-                        proj_display_df_fmt.iloc[z] = proj_display_df.iloc[z].map(lambda x: '' if x == 0 else x)
-                elif categ == 'Est Frequency':
-                    for j in range(len(acc_yrs) + 1):
-                        proj_display_df.iloc[z, j] = est_values['proj_freq'][len(acc_yrs) - j]
-                    proj_display_df_fmt.iloc[z] = proj_display_df.iloc[z].map(lambda x: '' if x == 0 else '{:,.1f}%'.format(x))
-                elif categ == 'Est Freq Trend':
-                    proj_display_df.iloc[z] = 0
-                    proj_display_df.iloc[z, 0] = est_values['proj_freq_est'][0]
-                    proj_display_df_fmt.iloc[z] = proj_display_df.iloc[z].map(lambda x: '' if x == 0 else '{:,.1f}%'.format(100 * x))
-                elif categ == 'Est Freq Reform':
-                    proj_display_df.iloc[z] = 0
-                    if est_values['reform']:
-                        proj_display_df.iloc[z, 0] = est_values['proj_freq_est'][1]
-                        proj_display_df_fmt.iloc[z] = proj_display_df.iloc[z].map(lambda x: '' if x == 0 else '{:,.1f}%'.format(100 * x))
-                    else:
-                        proj_display_df.iloc[z, 0] = 'N/A'
-                        proj_display_df_fmt.iloc[z] = proj_display_df.iloc[z].map(lambda x: '' if x == 0 else x)
-                elif categ == 'Est Severity':
-                    for j in range(len(acc_yrs) + 1):
-                        proj_display_df.iloc[z, j] = est_values['proj_sev'][len(acc_yrs) - j]
-                    proj_display_df_fmt.iloc[z] = proj_display_df.iloc[z].map(lambda x: '' if x == 0 else '${:,.2f}'.format(x))
-                elif categ == 'Est Sev Trend':
-                    proj_display_df.iloc[z] = 0
-                    proj_display_df.iloc[z, 0] = est_values['proj_sev_est'][0]
-                    proj_display_df_fmt.iloc[z] = proj_display_df.iloc[z].map(lambda x: '' if x == 0 else '{:,.1f}%'.format(100 * x))
-                elif categ == 'Est Sev Reform':
-                    proj_display_df.iloc[z] = 0
-                    if est_values['reform']:
-                        proj_display_df.iloc[z, 0] = est_values['proj_sev_est'][1]
-                        proj_display_df_fmt.iloc[z] = proj_display_df.iloc[z].map(lambda x: '' if x == 0 else '{:,.1f}%'.format(100 * x))
-                    else:
-                        proj_display_df.iloc[z, 0] = 'N/A'
-                        proj_display_df_fmt.iloc[z] = proj_display_df.iloc[z].map(lambda x: '' if x == 0 else x)
-                z += 1
-
-            display_df_fmt.insert(0, ' ', '')
-
-            index_list = [3, 5, 7, 9]  # insert blank rows
-            proj_index_list = [3, 7]
-            blank_row = pd.DataFrame([['' for _ in display_df_fmt.columns]], columns=display_df_fmt.columns)
-            for index in index_list:
-                display_df_fmt = pd.concat([display_df_fmt.iloc[:index], blank_row, display_df_fmt.iloc[index:]])
-                display_df_fmt.index = display_df_fmt.index.where(display_df_fmt.index != 0, ' ')
-
-            proj_blank_row = pd.DataFrame([['' for _ in proj_display_df_fmt.columns]], columns=proj_display_df_fmt.columns)
-            for index in proj_index_list:
-                proj_display_df_fmt = pd.concat([proj_display_df_fmt.iloc[:index], proj_blank_row, proj_display_df_fmt.iloc[index:]])
-                proj_display_df_fmt.index = proj_display_df_fmt.index.where(proj_display_df_fmt.index != 0, ' ')
-
-            trend_data_table = display_df_fmt.to_html(classes='my-financial-table',
-                                                      border=0, justify='initial',
-                                                      index=True, escape=False)
-
-            trend_est_table = proj_display_df_fmt.to_html(classes='my-financial-table',
-                                                      border=0, justify='initial',
-                                                      index=True, escape=False)
-        else:
-            trend_data_table = '<p>No detailed financial data to display for the selected years.</p>'
-            trend_est_table = None
+        if selected_year not in unique_years:
+            selected_year = unique_years[0]
+        try:
+            analysis = analytics.ClaimTrendAnalysis.for_player_year(game, user, selected_year, latest_year)
+        except analytics.IncompleteFinancials:
+            pass  # the year's triangle is in but not all of its financials yet
+    if analysis is not None:
+        trend = analysis.coverages[selected_coverage]
+        clm_yrs = analysis.clm_yrs
+        acc_yrs = [f'Acc Yr {acc_yr}' for acc_yr in clm_yrs]
+        reform_fact = trend['reform_fact']
+
+        display_yrs = [f'Acc Yr {acc_yr}' for acc_yr in clm_yrs]
+        display_yrs.reverse()
+        proj_display_yrs = [f'Est Acc Yr {max(clm_yrs) + 1}'] + display_yrs
+
+        data = {key: list(trend[key]) for key in ('actual_paid', 'devl_factor', 'ultimate', 'in_force', 'loss_cost',
+                                                  'claim_count', 'frequency', 'severity')}
+        # note that reform fact not reversed (this is done in prediction util)
+        data['product_reform'] = ['<span class="red-text">' + 'Yes' + '</span>' if reform_fact[r] == 1 else
+                                  '<span class="blue-text">' + 'No' + '</span>' for r in range(len(acc_yrs))]
+        trend_data_table = (CLAIM_TREND_TABLE.format(display_yrs, data, force_term=game_ctx.force_term)
+                            .with_blank_columns([' '], before=True).html(escape=False))
+
+        # Estimates: the projected year first, then the fitted values back through the claim years
+        est_data = {}
+        blanks = [0] * len(acc_yrs)
+        reform = trend['lcost_fit'][0]
+        for name, fit in (('lcost', 'lcost_fit'), ('freq', 'freq_fit'), ('sev', 'sev_fit')):
+            _, est, proj = trend[fit]
+            est_data[f'proj_{name}'] = [proj[len(acc_yrs) - j] for j in range(len(acc_yrs) + 1)]
+            est_data[f'{name}_trend'] = [est[0]] + blanks
+            est_data[f'{name}_reform'] = [est[1] if reform else 'N/A'] + blanks
+        trend_est_table = CLAIM_TREND_ESTIMATE_TABLE.format(proj_display_yrs, est_data).html(escape=False)
+    elif unique_years:
+        trend_data_table = f'<p>The financials for {selected_year} are still being published; try again shortly.</p>'
+        trend_est_table = None
     else:
         trend_data_table = '<p>No financial data available.</p>'
         trend_est_table = None
-        latest_year = None
 
     context = {
         'title': ' - Claim Trend Report',
@@ -2242,144 +763,31 @@ def claim_trend_report(request, game_id):
         'selected_year': selected_year,
         'coverage_options': coverage_options,
         'selected_coverage': selected_coverage,
-        'chart_data': prepare_claim_trend_chart_data(triangle_df, financial_df, claimtrend_dict, clm_yrs, unique_years, selected_year) if not triangle_df.empty else None,
+        'chart_data': prepare_claim_trend_chart_data(analysis) if analysis else None,
         }
     return render(request, template_name, context)
 
 
-def prepare_claim_trend_chart_data(triangle_df, financial_df, claimtrend_dict, clm_yrs, unique_years, selected_year):
+def prepare_claim_trend_chart_data(analysis):
     """Prepare chart data for all three coverages"""
-    
+    clm_yrs = analysis.clm_yrs
     chart_data = {
         'years': clm_yrs,
         'coverages': {}
     }
-    
-    # Process each coverage type
-    coverages = ['Bodily Injury', 'Collision', 'Total']
-    coverage_keys = ['paid_bi', 'paid_cl', 'paid_to']
-    
-    for coverage_idx, (coverage_name, coverage_key) in enumerate(zip(coverages, coverage_keys)):
-        
-        # Get claim data for this coverage
-        claim_data = triangle_df['triangles'][0]['triangles']
-        acc_yrs = [f'Acc Yr {acc_yr}' for acc_yr in claim_data['acc_yrs']]
-        devl_mths = [(yr + 1)*12 for yr in claim_data['devl_yrs']]
-        
-        # Build reform factor for this coverage
-        reform_fact = []
-        for yr in reversed(clm_yrs):
-            if coverage_idx == 2:  # Total
-                reform_fact.append(claimtrend_dict['bi_reform'][f'{yr}'] or claimtrend_dict['cl_reform'][f'{yr}'])
-            elif coverage_idx == 1:  # Collision
-                reform_fact.append(claimtrend_dict['cl_reform'][f'{yr}'])
-            elif coverage_idx == 0:  # Bodily Injury
-                reform_fact.append(claimtrend_dict['bi_reform'][f'{yr}'])
-        
-        # Create dataframe for this coverage
-        df = pd.DataFrame(columns=acc_yrs, index=devl_mths)
-        for i, devl_mth in enumerate(devl_mths):
-            df.loc[devl_mth] = claim_data[coverage_key][i]
-        
-        transposed_df = df.T
-        
-        # Calculate development factors
-        fact_labels = ['Age-to-Age']
-        fact_devl_mths = copy.deepcopy(devl_mths)
-        fact_devl_mths[0] = None
-        fact_df = pd.DataFrame(columns=fact_labels, index=fact_devl_mths)
-        
-        for i, fact_devl_mth in enumerate(fact_devl_mths):
-            if fact_devl_mth == fact_devl_mths[0]:
-                fact_df.iloc[0, 0] = 0
-            if fact_devl_mth == fact_devl_mths[1]:
-                numerator = sum(transposed_df.values[0:len(acc_yrs[:-1])][:, 1])
-                denominator = sum(transposed_df.values[0:len(acc_yrs[:-1])][:, 0])
-                if denominator == 0:
-                    denominator = 1
-                fact_df.iloc[1, 0] = numerator / denominator
-            if fact_devl_mth == fact_devl_mths[2]:
-                numerator = sum(transposed_df.values[0:len(acc_yrs[:-2])][:, 2])
-                denominator = sum(transposed_df.values[0:len(acc_yrs[:-2])][:, 1])
-                if denominator == 0:
-                    denominator = 1
-                fact_df.iloc[2, 0] = numerator / denominator
-                fact_df.iloc[1, 0] = fact_df.iloc[1, 0] * fact_df.iloc[2, 0]
-        
-        # Create display dataframe
-        cols = ['Actual Paid', 'Devl Factor', 'Ultimate Incurred', 'In-Force', 'Loss Cost', 'Claim Count', 'Frequency', 'Severity', 'Product Reform']
-        display_yrs = [f'Acc Yr {acc_yr}' for acc_yr in claim_data['acc_yrs']]
-        display_yrs.reverse()
-        display_df = pd.DataFrame(columns=display_yrs, index=cols)
-        
-        # Calculate all the metrics
-        for i, categ in enumerate(cols):
-            if categ == 'Actual Paid':
-                for j in range(len(acc_yrs)):
-                    display_df.iloc[i, j] = df.iloc[min(j, len(devl_mths) - 1), len(acc_yrs) - j - 1]
-            elif categ == 'Devl Factor':
-                for k in range(len(acc_yrs)):
-                    if k < 2:
-                        display_df.iloc[i, k] = fact_df.iloc[k + 1].values[0]
-                    else:
-                        display_df.iloc[i, k] = 1
-            elif categ == 'Ultimate Incurred':
-                for l in range(len(acc_yrs)):
-                    display_df.iloc[i, l] = display_df.iloc[i - 2, l] * display_df.iloc[i - 1, l]
-            elif categ == 'In-Force':
-                for m in range(len(acc_yrs)):
-                    display_df.iloc[i, m] = financial_df.iloc[len(financial_df) - m - 1 - (max(unique_years) - selected_year), 1]
-            elif categ == 'Loss Cost':
-                for n in range(len(acc_yrs)):
-                    denom = display_df.iloc[i - 1, n]
-                    if denom != 0:
-                        display_df.iloc[i, n] = decimal.Decimal(display_df.iloc[i - 2, n]) / denom
-                    else:
-                        display_df.iloc[i, n] = 0
-                # Calculate projections using logistic regression
-                lcost = [(clm_yrs[len(clm_yrs) - q - 1], float(lc)) for q, lc in enumerate(display_df.iloc[i].values)]
-                reform, proj_lcost_est, proj_lcost = perform_logistic_regression(lcost, reform_fact)
-            elif categ == 'Claim Count':
-                for o in range(len(acc_yrs)):
-                    if coverage_idx in [1, 2]: # collision or total
-                        display_df.iloc[i, o] = financial_df.iloc[len(financial_df) - o - 1 - (max(unique_years) - selected_year), 3]
-                    else:
-                        display_df.iloc[i, o] = financial_df.iloc[len(financial_df) - o - 1 - (max(unique_years) - selected_year), 2]
-            elif categ == 'Frequency':
-                for p in range(len(acc_yrs)):
-                    denom = display_df.iloc[i - 3, p]
-                    if denom != 0:
-                        display_df.iloc[i, p] = 100 * decimal.Decimal(display_df.iloc[i - 1, p]) / denom
-                    else:
-                        display_df.iloc[i, p] = 0
-                # Calculate projections
-                freq = [(clm_yrs[len(clm_yrs) - q - 1], float(freq)) for q, freq in enumerate(display_df.iloc[i].values)]
-                _, proj_freq_est, proj_freq = perform_logistic_regression(freq, reform_fact)
-            elif categ == 'Severity':
-                for q in range(len(acc_yrs)):
-                    denom = display_df.iloc[i - 2, q]
-                    if denom != 0:
-                        display_df.iloc[i, q] = decimal.Decimal(display_df.iloc[i - 5, q]) / denom
-                    else:
-                        display_df.iloc[i, q] = 0
-                # Calculate projections
-                sev = [(clm_yrs[len(clm_yrs) - q - 1], float(sev)) for q, sev in enumerate(display_df.iloc[i].values)]
-                _, proj_sev_est, proj_sev = perform_logistic_regression(sev, reform_fact)
-            elif categ == 'Product Reform':
-                for r in range(len(acc_yrs)):
-                    display_df.iloc[i, r] = reform_fact[r]  # Store as boolean/int for chart
-        
-        # Store chart data for this coverage
-        chart_data['coverages'][coverage_name] = {
-            'actual_loss_cost': [float(x) for x in display_df.loc['Loss Cost'].values],
-            'projected_loss_cost': [float(x) for x in proj_lcost],
-            'actual_frequency': [float(x) for x in display_df.loc['Frequency'].values],
-            'projected_frequency': [float(x) for x in proj_freq],
-            'actual_severity': [float(x) for x in display_df.loc['Severity'].values],
-            'projected_severity': [float(x) for x in proj_sev],
+
+    for coverage_idx, trend in analysis.coverages.items():
+        reform_fact = trend['reform_fact']
+        chart_data['coverages'][analytics.CLAIM_TREND_COVERAGES[coverage_idx]] = {
+            'actual_loss_cost': [float(x) for x in trend['loss_cost']],
+            'projected_loss_cost': [float(x) for x in trend['lcost_fit'][2]],
+            'actual_frequency': [float(x) for x in trend['frequency']],
+            'projected_frequency': [float(x) for x in trend['freq_fit'][2]],
+            'actual_severity': [float(x) for x in trend['severity']],
+            'projected_severity': [float(x) for x in trend['sev_fit'][2]],
             'reform_years': [list(reversed(clm_yrs))[i] for i, reform in enumerate(reform_fact) if reform],
             'reform_fact': reform_fact,
-            'reform_details': get_reform_details_for_years(claimtrend_dict, clm_yrs, reform_fact, coverage_idx)
+            'reform_details': get_reform_details_for_years(analysis.claim_trends, clm_yrs, reform_fact, coverage_idx)
         }
     
     return chart_data
@@ -2423,16 +831,10 @@ def get_reform_details_for_years(claimtrend_dict, clm_yrs, reform_fact, coverage
 
 
 @login_required()
-def decision_input(request, game_id):
+@game_view
+def decision_input(request, game_id, game_ctx):
     user = request.user
-    game = get_object_or_404(IndivGames, Q(game_id=game_id))
-    players_list = game.players.all()
-    human_players = []
-    for player in players_list:
-        if player.player_type == 'user':
-            human_players.append(player.player_name)
-    if game.game_observable is False and user.username not in human_players:
-        raise Http404("You are not permitted to view the game.")
+    game = game_ctx.game
 
     if request.POST.get('Back to Dashboard') == 'Back to Dashboard':
         return redirect('Pricing-game_dashboard', game_id=game_id)
@@ -2451,17 +853,9 @@ def decision_input(request, game_id):
     rate_chg = None
     froze_lock = False
     decisions_locked = False
-    is_novice_game = False
+    is_novice_game = game_ctx.is_novice_game
     osfi_intervention = False  # New flag to track actual OSFI intervention
 
-    # Determine game difficulty
-    try:
-        game_prefs = GamePrefs.objects.get(user=game.initiator)
-        if game_prefs.game_difficulty == 'Novice':
-            is_novice_game = True
-    except GamePrefs.DoesNotExist:
-        pass
-
     selected_year = request.POST.get('year')
     selected_year = int(selected_year) if selected_year else None
 
@@ -2487,14 +881,14 @@ def decision_input(request, game_id):
         if selected_year not in unique_years:
             selected_year = unique_years[0]
 
-        financial_data = Financials.objects.filter(game_id=game, player_id=user)
-        financial_data_list = list(financial_data.values('year', 'in_force', 'written_premium'))
-        financial_df = pd.DataFrame(financial_data_list)
-        financial_df = financial_df[financial_df['year'] > (selected_year - 5)]
-        financial_df = financial_df.sort_values('year', ascending=True)
+        indication_data_dict = list(indication_obj.filter(year=selected_year).values('indication_data'))[0]['indication_data']
+        # the player's Financials by year over the indication's accident years, back from the selected year
+        n_yrs = len(indication_data_dict['acc_yrs'])
+        financials = {row['year']: row for row in Financials.objects.filter(
+            game_id=game, player_id=user, year__gt=selected_year - n_yrs, year__lte=selected_year
+        ).values('year', 'in_force', 'written_premium')}
 
-        if not financial_df.empty:
-            indication_data_dict = list(indication_obj.filter(year=selected_year).values('indication_data'))[0]['indication_data']
+        if len(financials) == n_yrs:
             devl_data = indication_data_dict['devl_data']
             wts = indication_data_dict['indic_wts']
             fixed_exp = decimal.Decimal(indication_data_dict['fixed_exp'])
@@ -2507,7 +901,6 @@ def decision_input(request, game_id):
 
             clm_yrs = indication_data_dict['acc_yrs']
             acc_yrs = [f'Acc Yr {acc_yr}' for acc_yr in clm_yrs]
-            devl_mths = indication_data_dict['devl_mths']
 
             # CRITICAL: Ensure we get the current user's decision object
             decision_obj = Decisions.objects.filter(game_id=game, player_id=user, year=selected_year).first()
@@ -2646,63 +1039,31 @@ def decision_input(request, game_id):
             else:
                 reform_fact = [False] * len(clm_yrs)
 
-            df = pd.DataFrame(columns=acc_yrs, index=devl_mths)
-            for i, devl_mth in enumerate(devl_mths):
-                df.loc[devl_mth] = devl_data[i]
-
-            transposed_df = df.T
-
-            fact_labels = ['Age-to-Age']
-            fact_devl_mths = copy.deepcopy(devl_mths)
-            fact_devl_mths[0] = None
-            fact_df = pd.DataFrame(columns=fact_labels, index=fact_devl_mths)
-
-            for i, fact_devl_mth in enumerate(fact_devl_mths):
-                if fact_devl_mth == fact_devl_mths[0]:
-                    fact_df.iloc[0, 0] = 0
-                if fact_devl_mth == fact_devl_mths[1]:
-                    numerator = sum(transposed_df.values[0:len(acc_yrs[:-1])][:, 1])
-                    denominator = sum(transposed_df.values[0:len(acc_yrs[:-1])][:, 0])
-                    if denominator == 0:
-                        denominator = 1
-                    fact_df.iloc[1, 0] = numerator / denominator
-                if fact_devl_mth == fact_devl_mths[2]:
-                    numerator = sum(transposed_df.values[0:len(acc_yrs[:-2])][:, 2])
-                    denominator = sum(transposed_df.values[0:len(acc_yrs[:-2])][:, 1])
-                    if denominator == 0:
-                        denominator = 1
-                    fact_df.iloc[2, 0] = numerator / denominator
-                    fact_df.iloc[1, 0] = fact_df.iloc[1, 0] * fact_df.iloc[2, 0]
-
-            cols = ['Actual Paid', 'Devl Factor', 'Ultimate Incurred', get_force_term(game), 'Loss Cost', 'Trend Adj', 'Reform Adj', 'Weights',
+            ladder = analytics.ChainLadder(devl_data)
+
+            cols = ['Actual Paid', 'Devl Factor', 'Ultimate Incurred', game_ctx.force_term, 'Loss Cost', 'Trend Adj', 'Reform Adj', 'Weights',
                     'Adj Loss Cost', 'Fixed Expenses', 'Expos Var Expenses', 'Prem Var Expenses', 'Marketing Expenses', 'Profit Margin',
                     'Current Premium', 'Indicated Premium', 'Rate Change']
             display_yrs = [f'Acc Yr {acc_yr}' for acc_yr in clm_yrs]
             display_yrs.reverse()
-            display_df = pd.DataFrame(columns=display_yrs, index=cols)
-            display_df_fmt = pd.DataFrame(columns=display_yrs, index=cols)
+            display_df = analytics.pd.DataFrame(columns=display_yrs, index=cols)
+            display_df_fmt = analytics.pd.DataFrame(columns=display_yrs, index=cols)
             i = 0
             est_values = None
             wtd_lcost = None
             for categ, row in display_df.iterrows():
                 if categ == 'Actual Paid':
-                    for j in range(len(acc_yrs)):
-                        display_df.iloc[i, j] = df.iloc[min(j, len(devl_mths) - 1), len(acc_yrs) - j - 1]
+                    display_df.iloc[i] = ladder.latest[::-1]
                     display_df_fmt.iloc[i] = display_df.iloc[i].map(lambda x: '' if x == 0 else '${:,.0f}'.format(x))
                 elif categ == 'Devl Factor':
-                    for k in range(len(acc_yrs)):
-                        if k < 2:
-                            display_df.iloc[i, k] = fact_df.iloc[k + 1].values[0]
-                        else:
-                            display_df.iloc[i, k] = 1
+                    display_df.iloc[i] = ladder.to_ultimate[ladder.latest_devl][::-1]
                     display_df_fmt.iloc[i] = display_df.iloc[i].map(lambda x: '' if x == 0 else '{:,.3f}'.format(x))
                 elif categ == 'Ultimate Incurred':
-                    for l in range(len(acc_yrs)):
-                        display_df.iloc[i, l] = display_df.iloc[i - 2, l] * display_df.iloc[i - 1, l]
+                    display_df.iloc[i] = ladder.ultimates[::-1]
                     display_df_fmt.iloc[i] = display_df.iloc[i].map(lambda x: '' if x == 0 else '${:,.0f}'.format(x))
-                elif categ == get_force_term(game):
+                elif categ == game_ctx.force_term:
                     for m in range(len(acc_yrs)):
-                        display_df.iloc[i, m] = financial_df.iloc[len(financial_df) - m - 1 - (max(unique_years) - selected_year), 1]
+                        display_df.iloc[i, m] = financials[selected_year - m]['in_force']
                     display_df_fmt.iloc[i] = display_df.iloc[i].map(lambda x: '' if x == 0 else '{:,.0f}'.format(x))
                     in_force = display_df.iloc[i, 0]
                 elif categ == 'Loss Cost':
@@ -2713,7 +1074,7 @@ def decision_input(request, game_id):
                         else:
                             display_df.iloc[i, n] = 0
                     lcost = [(clm_yrs[len(clm_yrs) - q - 1], float(lc)) for q, lc in enumerate(display_df.iloc[i].values)]
-                    est_values = perform_logistic_regression_indication(lcost, reform_fact, sel_trend_loss_margin)
+                    est_values = analytics.perform_logistic_regression_indication(lcost, reform_fact, sel_trend_loss_margin)
                     display_df_fmt.iloc[i] = display_df.iloc[i].map(lambda x: '' if x == 0 else '${:,.2f}'.format(x))
                 elif categ == 'Trend Adj':
                     for o in range(len(acc_yrs)):
@@ -2754,7 +1115,7 @@ def decision_input(request, game_id):
             if in_force != 0:
                 fixed_cost = fixed_exp / in_force
                 display_df_fmt.iloc[wtd_ind + 1, 0] = f'${round(fixed_exp/in_force,2):,.2f}'
-                current_prem = float(round(financial_df.iloc[len(financial_df) - 1 - (max(unique_years) - selected_year)]['written_premium'] / in_force, 2))
+                current_prem = float(round(financials[selected_year]['written_premium'] / in_force, 2))
             else:
                 display_df_fmt.iloc[wtd_ind + 1, 0] = 0
                 current_prem = 0
@@ -2769,7 +1130,7 @@ def decision_input(request, game_id):
                 if test_prem != indicated_prem:
                     messages.warning(request, "Premium re-calculated due to changed parameters.  Please review and submit again.")
                 else:
-                    if not Lock.acquire_lock(game_id, request.user):
+                    if not Lock.acquire_lock(game_id, request.user, holder=request.session.session_key):
                         messages.warning(request, "Another team-member is in the submission page.  Cannot submit.")
                         return redirect('Pricing-game_dashboard', game_id=game_id)
                     else:
@@ -2797,15 +1158,10 @@ def decision_input(request, game_id):
             display_df_fmt.iloc[wtd_ind + 7, 0] = f'${indicated_prem:,.2f}'
             display_df_fmt.iloc[wtd_ind + 8, 0] = f'{round(100 * rate_chg, 1):,.1f}%'
 
-            index_list = [8, 12, 16, 19]  # insert blank rows
-            blank_row = pd.DataFrame([['' for _ in display_df_fmt.columns]], columns=display_df_fmt.columns)
-            for index in index_list:
-                display_df_fmt = pd.concat([display_df_fmt.iloc[:index], blank_row, display_df_fmt.iloc[index:]])
-                display_df_fmt.index = display_df_fmt.index.where(display_df_fmt.index != 0, ' ')
-
-            financial_data_table = display_df_fmt.to_html(classes='my-financial-table',
-                                                          border=0, justify='initial',
-                                                          index=True, escape=False)
+            table_rows = [(label, list(cells)) for label, cells in zip(display_df_fmt.index, display_df_fmt.values)]
+            for index in [8, 12, 16, 19]:  # insert blank rows
+                table_rows.insert(index, SPACER)
+            financial_data_table = ReportTable(display_df_fmt.columns, table_rows).html(escape=False)
 
             # All data is ready - create context and render
             context = {
@@ -2845,30 +1201,17 @@ def decision_input(request, game_id):
 
 
 @login_required
-def decision_confirm(request, game_id):
+@game_view
+def decision_confirm(request, game_id, game_ctx):
     user = request.user
-    game = get_object_or_404(IndivGames, Q(game_id=game_id))
-    players_list = game.players.all()
-    human_players = []
-    for player in players_list:
-        if player.player_type == 'user':
-            human_players.append(player.player_name)
-    if game.game_observable is False and user.username not in human_players:
-        raise Http404("You are not permitted to view the game.")
+    game = game_ctx.game
     
-    # Determine game difficulty
-    is_novice_game = False
-    try:
-        game_prefs = GamePrefs.objects.get(user=game.initiator)
-        if game_prefs.game_difficulty == 'Novice':
-            is_novice_game = True
-    except GamePrefs.DoesNotExist:
-        pass
+    is_novice_game = game_ctx.is_novice_game
 
     if request.POST.get('Back to Dashboard') == 'Back to Dashboard':
         # Release the lock
         try:
-            Lock.release_lock(game_id, request.user)
+            Lock.release_lock(game_id, request.user, holder=request.session.session_key)
             del request.session['locked_game_id']
         except:
             pass
@@ -2879,7 +1222,7 @@ def decision_confirm(request, game_id):
         request.session['ret_from_confirm'] = True
         # Release the lock
         try:
-            Lock.release_lock(game_id, request.user)
+            Lock.release_lock(game_id, request.user, holder=request.session.session_key)
             del request.session['locked_game_id']
         except:
             pass
@@ -2919,14 +1262,14 @@ def decision_confirm(request, game_id):
             # This ensures proper sequencing for the server simulation
             message = ChatMessage(
                 from_user=None,
-                game_id=IndivGames.objects.get(game_id=game_id),
+                game_id=game,
                 content=f'Regulatory filing for {request.user} approved.',
             )
             message.save()
 
         # Release the lock after successful submission
         try:
-            Lock.release_lock(game_id, request.user)
+            Lock.release_lock(game_id, request.user, holder=request.session.session_key)
             del request.session['locked_game_id']
         except:
             pass
@@ -2981,41 +1324,57 @@ def send_message(request):
         return JsonResponse({"message": content})
 
 
+def message_cursor(request):
+    """The client's latest_sequence, or None when it is not a whole number."""
+    try:
+        return int(request.GET.get('latest_sequence', 0))
+    except ValueError:
+        return None
+
+
+def fetch_messages_etag(request):
+    """Changes whenever the game gets a message, so unchanged polls are answered with a 304."""
+    latest_sequence = message_cursor(request)
+    if latest_sequence is None:
+        return None
+    game_id = request.GET.get('game_id')
+    kinds = '.'.join(request.GET.getlist('kind'))
+    return f'"{game_id}-{latest_sequence}-{kinds}-{latest_sequence_number(game_id)}"'
+
+
 @login_required
+@condition(etag_func=fetch_messages_etag)
 def fetch_messages(request):
     if request.method == 'GET':
         game_id = request.GET.get('game_id')
-        latest_sequence = int(request.GET.get('latest_sequence', 0))
-
-        messages = ChatMessage.objects.filter(
-            game_id=game_id,
-            sequence_number__gt=latest_sequence
-        ).order_by('sequence_number')
-
-        message_list = []
-        review_cnt = 0
-        for msg in messages:
-            # Perform timezone conversion to Django's default timezone
-            timestamp_with_timezone = timezone.localtime(msg.timestamp)
-            from_sender = msg.from_user.username if msg.from_user else "game_server"
-            if msg.content == 'Review decisions.' and from_sender == 'game_server':
-                review_cnt += 1
-            message_list.append({
-                'from_sender': from_sender,
-                'time': timestamp_with_timezone.strftime('%H:%M:%S'),
-                'content': msg.content,
-                'sequence_number': msg.sequence_number
-            })
+        latest_sequence = message_cursor(request)
+        if latest_sequence is None:
+            return JsonResponse({'error': 'latest_sequence must be a whole number'}, status=400)
+        kinds = request.GET.getlist('kind')  # optional event kind filter, e.g. ?kind=review&kind=osfi
 
-        message_list = message_list[-50:]
+        # rows the game server inserted directly have no kind yet: type and count them before filtering by kind
+        push_pending(game_id)
 
-        return JsonResponse({"messages": message_list, "review_cnt": review_cnt})
+        # only rows after the client's cursor, newest 50 at most, oldest first
+        message_list = messages_after(game_id, latest_sequence, kinds=kinds)
+        if message_list:
+            latest_sequence = message_list[-1]['sequence_number']
+
+        event_counts = GameEventCounter.counts(game_id)
+        return JsonResponse({"messages": message_list, "review_cnt": event_counts.get('review', 0),
+                             "event_counts": event_counts, "latest_sequence": latest_sequence})
 
 
 @login_required
 def fetch_game_list(request):
     if request.method == 'GET':
         user = request.user
+        # an unchanged lobby is answered from the version row alone
+        lobby = LobbyVersion.current(user)
+        next_poll = lobby.suggested_poll_seconds()
+        if request.GET.get('version') == str(lobby.version):
+            return JsonResponse({"changed": False, "version": lobby.version, "next_poll": next_poll})
+
         player_game_ids = Players.objects.filter(player_id=user).values_list('game', flat=True)
 
         all_games = IndivGames.objects.filter(
@@ -3066,6 +1425,9 @@ def fetch_game_list(request):
             })
 
         return JsonResponse({
+            "changed": True,
+            "version": lobby.version,
+            "next_poll": next_poll,
             "active_games": active_games_data,
             "accessible_games": accessible_games_data
         })
\ No newline at end of file
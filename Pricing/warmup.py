@@ -0,0 +1,163 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from .cache import latest_id
+from .game_context import GameContext
+from .models import IndivGames, Financials, Indications, Triangles
+
+logger = logging.getLogger(__name__)
+
+# Threads warming games at once, and games allowed to wait for one; further requests are dropped
+WARMUP_WORKERS = 2
+WARMUP_MAX_QUEUE = 32
+
+
+def published_version(game_id):
+    """Newest Financials and Indications ids of the game: the game server adds both when it publishes a year."""
+    return IndivGames.objects.filter(game_id=game_id).annotate(
+        latest_financial=latest_id(Financials.objects.filter(game_id=game_id)),
+        latest_indication=latest_id(Indications.objects.filter(game_id=game_id)),
+    ).values_list('latest_financial', 'latest_indication').first()
+
+
+class WarmupMetrics:
+    """Queue depth and warm-up latency of a ReportWarmer, per game and per report."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.latency = {}
+
+    def record(self, name, seconds):
+        with self.lock:
+            count, total, worst, _ = self.latency.get(name, (0, 0.0, 0.0, 0.0))
+            self.latency[name] = (count + 1, total + seconds, max(worst, seconds), seconds)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'queue_depth': self.queued,
+                'running': self.running,
+                'completed': self.completed,
+                'failed': self.failed,
+                'dropped': self.dropped,
+                'latency': {name: {'count': count, 'mean': total / count, 'max': worst, 'last': last}
+                            for name, (count, total, worst, last) in self.latency.items()},
+            }
+
+
+class ReportWarmer:
+    """Builds and caches every report of a game's human players in the background.
+
+    When the game server publishes a year, each player reloads the dashboard and opens the
+    same reports within seconds.  schedule() queues the game on a small thread pool once per
+    published version, so those requests find their reports cached.  Games that keep the
+    queue full are dropped rather than piling up behind it.
+    """
+
+    def __init__(self, workers=WARMUP_WORKERS, max_queue=WARMUP_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.metrics = WarmupMetrics()
+        self.lock = threading.Lock()
+        self.executor = None
+        self.versions = {}
+
+    def schedule(self, game_id):
+        """Queue game_id unless its published version is already warm or waiting; returns whether it was queued."""
+        version = published_version(game_id)
+        if version is None:
+            return False
+        with self.lock:
+            if self.versions.get(game_id) == version:
+                return False
+            if self.metrics.queued >= self.max_queue:
+                with self.metrics.lock:
+                    self.metrics.dropped += 1
+                logger.warning('Report warm-up queue full; dropped game %s', game_id)
+                return False
+            self.versions[game_id] = version
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='report-warmup')
+            with self.metrics.lock:
+                self.metrics.queued += 1
+            self.executor.submit(self.run, game_id, version)
+        return True
+
+    def run(self, game_id, version):
+        with self.metrics.lock:
+            self.metrics.queued -= 1
+            self.metrics.running += 1
+        start = time.perf_counter()
+        try:
+            warm_game(game_id, self.metrics)
+        except Exception:
+            logger.exception('Report warm-up of game %s failed', game_id)
+            with self.lock:
+                if self.versions.get(game_id) == version:
+                    del self.versions[game_id]  # let the next trigger try again
+            with self.metrics.lock:
+                self.metrics.failed += 1
+        else:
+            with self.metrics.lock:
+                self.metrics.completed += 1
+        finally:
+            seconds = time.perf_counter() - start
+            self.metrics.record('game', seconds)
+            with self.metrics.lock:
+                self.metrics.running -= 1
+            connection.close()  # the pool's threads each hold their own connection
+            logger.info('Warmed reports of game %s in %.2fs (queue depth %d)', game_id, seconds, self.metrics.queued)
+
+
+def warm_game(game_id, metrics=None):
+    """Build the latest year of every report of the game's human players into the cache."""
+    from .claim_trends import ClaimTrendAnalysis, IncompleteFinancials  # like the report views, load numpy once needed
+    from . import reports as game_reports
+
+    game_ctx = GameContext.load(game_id, None)
+    game = game_ctx.game
+
+    def timed(name, build):
+        start = time.perf_counter()
+        build()
+        if metrics is not None:
+            metrics.record(name, time.perf_counter() - start)
+
+    # The game-wide reports are shared by every player
+    timed('industry', lambda: game_reports.industry_report(game, None))
+    timed('valuation', lambda: game_reports.valuation_report(game, None, game_ctx.force_term))
+
+    for player in User.objects.filter(username__in=game_ctx.human_players):
+        timed('mktgsales', lambda: game_reports.mktgsales_report(game, player, None, game_ctx.force_term))
+        timed('financials', lambda: game_reports.financials_report(game, player, None, game_ctx.force_term))
+        latest_year = Triangles.objects.filter(game_id=game, player_id=player).order_by('-year') \
+            .values_list('year', flat=True).first()
+        if latest_year is not None:
+            try:
+                timed('claim_trend', lambda: ClaimTrendAnalysis.for_player_year(game, player, latest_year, latest_year))
+            except IncompleteFinancials:
+                # the rest of the year is still arriving; the report builds it on first view
+                logger.info('Skipped the claim trend warm-up of %s in game %s: financials incomplete',
+                            player.username, game_id)
+
+
+report_warmer = ReportWarmer()
+
+
+def warm_on_review(sender, game_id, kind, **kwargs):
+    """game_event_recorded receiver: a "Review decisions." notice means a new year has been published.
+
+    The game server inserts that notice straight into the table, so it is counted (and the
+    signal sent) when ChatMessage.classify_pending claims it: from the game's message
+    watcher while a dashboard socket is open, or from the dashboard's fetch_messages poll.
+    """
+    if kind == 'review':
+        transaction.on_commit(lambda: report_warmer.schedule(game_id))
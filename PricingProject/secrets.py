@@ -1,8 +1,14 @@
-import boto3
+import ast
 import base64
+import hashlib
+import json
 import os
+import threading
+import warnings
+from pathlib import Path
 from dotenv import load_dotenv
-from botocore.exceptions import ClientError
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.functional import lazy
 
 # Use this code snippet in your app.
 # If you need more information about configurations or implementing the sample code, visit the AWS docs:
@@ -20,8 +26,16 @@ DEV = os.environ.get('dev')
 
 #  print(f'AWS_ACCESS: {AWS_ACCESS}  AWS_SECRET: {AWS_SECRET}  DEV: {DEV}')
 
+# The keys settings.py reads; EnvSecrets takes each from the environment variable of the same name
+SECRET_KEYS = ('DJANGO_SECRET_KEY', 'POSTGRES_DB', 'POSTGRES_USER', 'POSTGRES_PASSWORD', 'POSTGRES_HOST',
+               'POSTGRES_PORT', 'POSTGRES_HOST_DEV', 'POSTGRES_PORT_DEV')
+SECRETS_CACHE_PATH = Path(os.environ.get('PRICING_SECRETS_CACHE', Path(__file__).resolve().parent.parent / '.secrets_cache'))
+SECRETS_CACHE_TTL = 60 * 60
+
 
 def get_secrets():
+    import boto3  # slow to import, and only needed when the secrets are not held locally
+
     secret_name = "arn:aws:secretsmanager:us-east-1:547847502175:secret:PricingProject-hIvNc3"
     region_name = "us-east-1"
 
@@ -33,42 +47,168 @@ def get_secrets():
         service_name='secretsmanager',
         region_name=region_name
     )
-    # In this sample we only handle the specific exceptions for the 'GetSecretValue' API.
-    # See https://docs.aws.amazon.com/secretsmanager/latest/apireference/API_GetSecretValue.html
-    # We rethrow the exception by default.
+    # ClientError and BotoCoreError propagate; AwsSecrets reports them as SecretsUnavailable
+    response = client.get_secret_value(SecretId=secret_name)
+    # Depending on whether the secret is a string or binary, one of these fields is populated
+    if 'SecretString' in response:
+        return response['SecretString']
+    if 'SecretBinary' in response:
+        return base64.b64decode(response['SecretBinary']).decode()
+    raise SecretsUnavailable(f'{secret_name} has neither a SecretString nor a SecretBinary')
+
+
+class SecretsUnavailable(Exception):
+    """The provider could not be reached, or has nothing to give."""
+
+
+class EnvSecrets:
+    """Secrets from environment variables named after SECRET_KEYS (a .env file is loaded above)."""
+
+    def available(self):
+        return 'DJANGO_SECRET_KEY' in os.environ
+
+    def load(self):
+        return {key: os.environ[key] for key in SECRET_KEYS if key in os.environ}
+
+
+class FileSecrets:
+    """Secrets from a file holding the same dict literal as the Secrets Manager secret."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def available(self):
+        return bool(self.path) and os.path.exists(self.path)
+
+    def load(self):
+        with open(self.path) as f:
+            return ast.literal_eval(f.read())
+
+
+class AwsSecrets:
+    """The PricingProject secret in AWS Secrets Manager."""
+
+    def available(self):
+        return True
+
+    def load(self):
+        try:
+            from botocore.exceptions import BotoCoreError, ClientError
+            secret = get_secrets()
+        except ImportError as exc:
+            raise SecretsUnavailable('boto3 is not installed') from exc
+        except (BotoCoreError, ClientError) as exc:
+            raise SecretsUnavailable(f'AWS Secrets Manager: {exc}') from exc
+        try:
+            return ast.literal_eval(secret)
+        except (ValueError, SyntaxError) as exc:
+            raise SecretsUnavailable(f'AWS Secrets Manager: the secret is not a dict literal ({exc})') from exc
+
 
+class CachedSecrets:
+    """provider's secrets, kept on disk encrypted for ttl seconds so a boot can skip the fetch.
+
+    The key is key, else PRICING_SECRETS_KEY or, failing that, the AWS secret access key, so the
+    file is no more use than the credentials that could fetch the secret anyway.  Without a key,
+    or without the cryptography package, every load goes to provider.
+    """
+
+    def __init__(self, provider, path=SECRETS_CACHE_PATH, ttl=SECRETS_CACHE_TTL, key=None):
+        self.provider = provider
+        self.path = Path(path)
+        self.ttl = ttl
+        self.key = key
+
+    def available(self):
+        return self.provider.available()
+
+    def fernet(self):
+        material = self.key or os.environ.get('PRICING_SECRETS_KEY') or AWS_SECRET
+        if not material:
+            return None
+        try:
+            from cryptography.fernet import Fernet
+        except ImportError:
+            return None
+        return Fernet(base64.urlsafe_b64encode(hashlib.sha256(material.encode()).digest()))
+
+    def load(self):
+        fernet = self.fernet()
+        if fernet is None:
+            return self.provider.load()
+        from cryptography.fernet import InvalidToken
+        try:
+            return json.loads(fernet.decrypt(self.path.read_bytes(), ttl=self.ttl))
+        except (OSError, InvalidToken, ValueError):
+            pass  # missing, expired, or written under another key
+        secrets = self.provider.load()
+        tmp = self.path.with_name(f'{self.path.name}.{os.getpid()}')
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(fernet.encrypt(json.dumps(secrets).encode()))
+        os.replace(tmp, self.path)
+        return secrets
+
+
+def secrets_provider(name=None):
+    """The provider named by PRICING_SECRETS_PROVIDER (env, file or aws), else the first available.
+
+    env applies when DJANGO_SECRET_KEY is set, file when PRICING_SECRETS_FILE names a file;
+    otherwise the secret is fetched from AWS through the encrypted disk cache.
+    """
+    providers = {
+        'env': EnvSecrets(),
+        'file': FileSecrets(os.environ.get('PRICING_SECRETS_FILE')),
+        'aws': CachedSecrets(AwsSecrets()),
+    }
+    name = name or os.environ.get('PRICING_SECRETS_PROVIDER')
+    if name:
+        if name not in providers:
+            raise ImproperlyConfigured(f'PRICING_SECRETS_PROVIDER must be one of {", ".join(providers)}, not {name!r}')
+        return providers[name]
+    return next(provider for provider in providers.values() if provider.available())
+
+
+def load_secrets(name=None):
+    """The secrets as a dict, from the provider secrets_provider(name) picks.
+
+    A provider named explicitly must deliver.  Otherwise, when AWS cannot be reached (no
+    credentials, no network, no boto3), this warns and returns no secrets: settings still
+    import, so management commands that touch neither the database nor SECRET_KEY run, and
+    the rest fail when they first use them.
+    """
+    name = name or os.environ.get('PRICING_SECRETS_PROVIDER')
     try:
-        get_secret_value_response = client.get_secret_value(
-            SecretId=secret_name
-        )
-    except ClientError as e:
-        if e.response['Error']['Code'] == 'DecryptionFailureException':
-            # Secrets Manager can't decrypt the protected secret text using the provided KMS key.
-            # Deal with the exception here, and/or rethrow at your discretion.
-            raise e
-        elif e.response['Error']['Code'] == 'InternalServiceErrorException':
-            # An error occurred on the server side.
-            # Deal with the exception here, and/or rethrow at your discretion.
-            raise e
-        elif e.response['Error']['Code'] == 'InvalidParameterException':
-            # You provided an invalid value for a parameter.
-            # Deal with the exception here, and/or rethrow at your discretion.
-            raise e
-        elif e.response['Error']['Code'] == 'InvalidRequestException':
-            # You provided a parameter value that is not valid for the current state of the resource.
-            # Deal with the exception here, and/or rethrow at your discretion.
-            raise e
-        elif e.response['Error']['Code'] == 'ResourceNotFoundException':
-            # We can't find the resource that you asked for.
-            # Deal with the exception here, and/or rethrow at your discretion.
-            raise e
-    else:
-        # Decrypts secret using the associated KMS key.
-        # Depending on whether the secret is a string or binary, one of these fields will be populated.
-        if 'SecretString' in get_secret_value_response:
-            secret = get_secret_value_response['SecretString']
-        else:
-            decoded_binary_secret = base64.b64decode(get_secret_value_response['SecretBinary'])
-
-    # Your code goes here.
-    return secret
\ No newline at end of file
+        return secrets_provider(name).load()
+    except SecretsUnavailable as exc:
+        if name:
+            raise
+        warnings.warn(f'No secrets loaded ({exc}); set PRICING_SECRETS_PROVIDER or DJANGO_SECRET_KEY '
+                      f'and the POSTGRES_* variables', RuntimeWarning)
+        return {}
+
+
+class LazySecrets:
+    """load_secrets(name), loaded on the first lookup instead of when the settings are imported.
+
+    lazy(key) is a str stand-in for a setting: SECRET_KEY and the database credentials are
+    only read when Django signs something or connects, so management commands that do
+    neither never reach the provider (or AWS).
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self.lock = threading.Lock()
+        self.secrets = None
+
+    def load(self):
+        with self.lock:
+            if self.secrets is None:
+                self.secrets = load_secrets(self.name)
+            return self.secrets
+
+    def get(self, key, default=None):
+        return self.load().get(key, default)
+
+    def lazy(self, key, default=''):
+        return lazy(self.get, str)(key, default)
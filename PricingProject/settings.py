@@ -10,10 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 import socket
-import ast
 import os
 from pathlib import Path
-from .secrets import get_secrets, DEV
+from .secrets import LazySecrets, DEV
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -27,10 +26,15 @@ print(f'BASE_DIR is {BASE_DIR}')
 
 
 # SECURITY WARNING: don't run with debug turned on in production!
-IPADD = socket.gethostbyname(socket.gethostname())
-ec2 = True
-if IPADD in ('192.168.5.72', '127.0.1.1', '127.0.0.1') or DEV == 'True':
-    ec2 = False
+# dev=True or dev=False says where we run; only without it is the host's address looked up,
+# which may go out to DNS
+IPADD = None
+if DEV is None:
+    try:
+        IPADD = socket.gethostbyname(socket.gethostname())
+    except OSError:
+        pass  # unresolvable: assume the server
+ec2 = DEV != 'True' and IPADD not in ('192.168.5.72', '127.0.1.1', '127.0.0.1')
 
 if ec2:
     DEBUG = False
@@ -44,17 +48,15 @@ print(f'DEBUG: {DEBUG}  STATIC_ROOT: {STATIC_ROOT}')
 
 print(f'EC2 environment: {ec2}  Ip address:{IPADD}  Dev: {DEV}')
 
-secret = get_secrets()
-secret_dict = ast.literal_eval(secret)
+# From the environment, a file or (through an encrypted disk cache) AWS Secrets Manager; see
+# PricingProject.secrets.load_secrets.  Nothing is loaded until SECRET_KEY or the database is
+# first used, and without any secrets Django complains then rather than here.
+secret_dict = LazySecrets()
 
-SECRET_KEY = secret_dict['DJANGO_SECRET_KEY']
+SECRET_KEY = secret_dict.lazy('DJANGO_SECRET_KEY')
 
-POSTGRES_PORT = secret_dict['POSTGRES_PORT']
-POSTGRES_HOST = secret_dict['POSTGRES_HOST']
-
-if DEBUG:
-    POSTGRES_PORT = secret_dict['POSTGRES_PORT_DEV']
-    POSTGRES_HOST = secret_dict['POSTGRES_HOST_DEV']
+POSTGRES_PORT = secret_dict.lazy('POSTGRES_PORT_DEV' if DEBUG else 'POSTGRES_PORT')
+POSTGRES_HOST = secret_dict.lazy('POSTGRES_HOST_DEV' if DEBUG else 'POSTGRES_HOST')
 
 ALLOWED_HOSTS = ['127.0.0.1', 'pricinggame.ca', 'www.pricinggame.ca']
 
@@ -76,6 +78,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django_extensions',
     'django.contrib.staticfiles',
+    'channels',
     'crispy_forms',
     'crispy_bootstrap4',
     'Pricing.apps.PricingConfig',
@@ -112,6 +115,54 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'PricingProject.wsgi.application'
+ASGI_APPLICATION = 'PricingProject.asgi.application'
+
+# Redis picks the channel layer and cache backends below, so it is set in the environment
+# rather than read from the (lazily loaded) secrets
+REDIS_URL = os.environ.get('REDIS_URL')
+
+# Channel layer for the message centre push; in-memory serves a single process (and tests),
+# set REDIS_URL to fan out across processes.
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [REDIS_URL]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
+
+# Report and analytics cache: a per-process LRU in front of a tier every worker shares, on local
+# disk for the workers of one node, or in Redis when REDIS_URL is set.
+if REDIS_URL:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'Pricing.cache.TieredCache',
+        'TIMEOUT': 60 * 60,
+        'KEY_PREFIX': 'pricing',
+        'OPTIONS': {
+            'LOCAL_MAX_ENTRIES': 256,
+            'LOCAL_TIMEOUT': 60,
+            'SHARED': SHARED_CACHE,
+        },
+    }
+}
 
 
 # Database
@@ -120,9 +171,9 @@ WSGI_APPLICATION = 'PricingProject.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': secret_dict['POSTGRES_DB'],
-        'USER': secret_dict['POSTGRES_USER'],
-        'PASSWORD': secret_dict['POSTGRES_PASSWORD'],
+        'NAME': secret_dict.lazy('POSTGRES_DB'),
+        'USER': secret_dict.lazy('POSTGRES_USER'),
+        'PASSWORD': secret_dict.lazy('POSTGRES_PASSWORD'),
         'HOST': POSTGRES_HOST,
         'PORT': POSTGRES_PORT,
     }